@@ -4,6 +4,8 @@ import json
 import os
 import platform
 import sys
+import threading
+import time
 from html import escape
 from pathlib import Path
 
@@ -15,22 +17,45 @@ from PySide6.QtWidgets import (QAbstractItemView, QApplication, QBoxLayout,
                                QCheckBox, QComboBox, QFileDialog, QGridLayout,
                                QHBoxLayout, QLabel, QListWidget,
                                QListWidgetItem, QMainWindow, QMenu,
-                               QMessageBox, QPushButton, QScrollArea,
-                               QStackedWidget, QVBoxLayout, QWidget)
-
+                               QMessageBox, QProgressDialog, QPushButton,
+                               QScrollArea, QStackedWidget, QVBoxLayout,
+                               QWidget)
+
+from core.aggregates import ScanSummary, summarize, top_n
+from core.archives import find_extracted_archives
+from core.content_index import ContentIndex
+from core.dir_tree import DirTree, DirTreeBuilder
+from core.excludes import TRASH_DIR_NAME
 from core.executor import execute_move_plan, undo_last
+from core.hash_cache import HashCache
 from core.history import append_history, clear_history, read_history
 from core.logger import setup_logger
 from core.planner import ActionPlan, build_plan
-from core.scanner import (_parse_age, _parse_size, detect_duplicates,
-                          scan_directory)
+from core.progress import (HASH_PHASE, ProgressSnapshot, ProgressToken,
+                           ScanCancelled)
+from core.read_policy import ReadPolicy
+from core.result_store import ScanResultStore
+from core.scan_index import ScanIndex
+from core.scanner import (ALL_TYPES, DEFAULT_CONFIRM_ALGORITHM,
+                          DEFAULT_PREFILTER_ALGORITHM, ScanEstimate,
+                          ScanResult, _parse_age, _parse_size,
+                          detect_duplicates, estimate_scan, scan_directory)
 from core.selfcheck import run_selfcheck
 from core.settings import Filters, Settings
+from core.watcher import get_watcher, start_watch, stop_watch
 
 LOGGER = setup_logger()
 
 
 class MainWindow(QMainWindow):
+    # So lange bleibt der ungefilterte Scan für geänderte Filter-Werte gültig
+    SCAN_REUSE_SECONDS = 30
+    # Sekunden für die Stichproben-Schätzung vor einem vollen Scan
+    SCAN_ESTIMATE_SECONDS = 1.5
+    # Ablage-Ordner des Inhaltsindex werden höchstens so oft abgeglichen
+    CONTENT_INDEX_MAX_AGE = 24 * 3600
+    # Voll-Abgleich des Scan-Index (erfasst auch überschriebene Dateien)
+    SCAN_INDEX_RECONCILE_SECONDS = 24 * 3600
     THEME_A11Y_HINTS = {
         "light": "Helles Standardschema mit guter Lesbarkeit für normale Raumbeleuchtung.",
         "dark": "Dunkles Schema für blendfreie Nutzung am Abend oder in dunklen Räumen.",
@@ -409,6 +434,53 @@ class MainWindow(QMainWindow):
             )
         return "".join(cards)
 
+    def _build_dashboard_scan_overview(self) -> str:
+        """Kurzfassung der letzten Analyse (Typ-Summen, größter Unterordner)."""
+
+        summary = getattr(self, "scan_summary", None)
+        if summary is None:
+            estimate = getattr(self, "scan_estimate", None)
+            if estimate is not None and estimate[0] == self.root_path:
+                return escape(self._format_scan_estimate(estimate[1]))
+            return "noch keine – Ordner wählen und Analyse starten."
+        type_labels = {
+            "images": "Bilder",
+            "videos": "Videos",
+            "archives": "Archive",
+            "other": "Andere",
+        }
+        per_type = ", ".join(
+            f"{type_labels.get(name, name)} {total.bytes / (1024 * 1024):.1f} MB"
+            for name, total in summary.by_type.items()
+            if total.count
+        )
+        text = f"{summary.files} Dateien, {summary.bytes / (1024 * 1024):.1f} MB"
+        if per_type:
+            text += f" ({per_type})"
+        dir_tree = self._get_dir_tree() if self.root_path else None
+        if dir_tree is not None:
+            # nur die oberste Ebene des gespeicherten Baums lesen
+            largest = dir_tree.children(self.root_path, limit=3)
+            if largest:
+                text += " · größte Unterordner: " + ", ".join(
+                    f"{entry.path.name} ({entry.bytes / (1024 * 1024):.1f} MB)"
+                    for entry in largest
+                )
+        return escape(text)
+
+    @staticmethod
+    def _format_scan_estimate(estimate: ScanEstimate) -> str:
+        """Schätzung als Text, z. B. „ca. 1200 Dateien (1100–1300), ca. 800 MB“."""
+        files, files_low, files_high = estimate.files
+        size, size_low, size_high = (value / (1024 * 1024) for value in estimate.bytes)
+        if estimate.exact:
+            return f"{files:.0f} Dateien, {size:.1f} MB (vollständig gezählt)"
+        return (
+            f"Schätzung: ca. {files:.0f} Dateien ({files_low:.0f}–{files_high:.0f}), "
+            f"ca. {size:.0f} MB ({size_low:.0f}–{size_high:.0f}, "
+            f"{estimate.confidence:.0%} Sicherheit)"
+        )
+
     def _build_dashboard_role_hint(self) -> str:
         """Liefert zwei kurze Bedienpfade für Laien und Entwickler."""
 
@@ -765,7 +837,14 @@ class MainWindow(QMainWindow):
         )
         self.plan: ActionPlan | None = None
         self.scan_results = []
+        self.scan_summary: ScanSummary | None = None
+        self.scan_estimate: tuple[Path, ScanEstimate] | None = None
         self.duplicates_map = {}
+        self.similar_images = {}
+        # Archiv -> Ordner, in dem sein Inhalt schon entpackt liegt
+        self.extracted_archives: dict[Path, Path] = {}
+        # Datei -> gleiche Inhalte in den Ablage-Ordnern (Inhaltsindex)
+        self.stored_elsewhere: dict[Path, list[Path]] = {}
         # Lade zentralen Textkatalog, damit alle Hilfe- und UI‑Texte anpassbar sind.
         self.ui_texts: dict[str, str] = {}
         self._load_ui_texts()
@@ -1717,6 +1796,18 @@ class MainWindow(QMainWindow):
         self._setup_plan_page()
         self.stack.addWidget(self.page_plan)
 
+    def closeEvent(self, event) -> None:  # noqa: N802 - Qt API
+        """Beendet beim Schließen die Live-Überwachung (inotify-Thread und -Handle)."""
+        self._stop_live_watch()
+        super().closeEvent(event)
+
+    def _stop_live_watch(self) -> None:
+        """Beendet die Live-Überwachung des zuletzt überwachten Ordners, falls aktiv."""
+        watched = getattr(self, "_watched_root", None)
+        if watched is not None:
+            stop_watch(watched)
+            self._watched_root = None
+
     def resizeEvent(self, event) -> None:  # noqa: N802 - Qt API
         """Aktualisiert die Vorschau bei Größenänderung, wenn Auto-Modi aktiv sind."""
 
@@ -2331,7 +2422,8 @@ class MainWindow(QMainWindow):
             f"• Linux-Berechtigungen: {permission_prefix} {safe_permission_status}<br/>"
             f"• Aktives Preset: {active_preset}<br/>"
             f"• Dateitypen-Filter: {active_types}<br/>"
-            f"• Duplikat-Prüfung: {duplicates_mode}<br/><br/>"
+            f"• Duplikat-Prüfung: {duplicates_mode}<br/>"
+            f"• Letzte Analyse: {self._build_dashboard_scan_overview()}<br/><br/>"
             f"• Einstellungen dauerhaft: {persistence_icon} {persistence_text}<br/><br/>"
             "<b>Hilfe in einfacher Sprache:</b><br/>"
             "1) Wählen Sie einen Ordner.<br/>"
@@ -2693,7 +2785,7 @@ class MainWindow(QMainWindow):
         hl_dup = QHBoxLayout()
         hl_dup.addWidget(QLabel("Duplikate:"))
         self.combo_dups = QComboBox()
-        self.combo_dups.addItems(["none", "quick", "safe"])
+        self.combo_dups.addItems(["none", "quick", "safe", "content", "similar_images"])
         hl_dup.addWidget(self.combo_dups)
         layout.addLayout(hl_dup)
 
@@ -2984,6 +3076,22 @@ class MainWindow(QMainWindow):
             self.settings.confirm_threshold = int(raw.get("confirm_threshold", 10))
             self.settings.filters = Filters.from_dict(filters)
             self.settings.duplicates_mode = raw.get("duplicates_mode", "none")
+            self.settings.hash_prefilter = Settings._normalize_hash_algorithm(
+                raw.get("hash_prefilter"), DEFAULT_PREFILTER_ALGORITHM
+            )
+            self.settings.hash_confirm = Settings._normalize_hash_algorithm(
+                raw.get("hash_confirm"), DEFAULT_CONFIRM_ALGORITHM
+            )
+            for key in ("hash_prefilter", "hash_confirm"):
+                wanted = str(raw.get(key) or "").strip().lower()
+                if wanted and wanted != getattr(self.settings, key):
+                    # z. B. xxh3_64 ohne installiertes xxhash
+                    LOGGER.warning(
+                        "Preset '%s': Hash-Verfahren '%s' ist hier nicht verfügbar, nutze '%s'. Nächster Schritt: Paket nachinstallieren (xxh3_64 braucht 'pip install xxhash') oder Preset anpassen.",
+                        preset_name,
+                        wanted,
+                        getattr(self.settings, key),
+                    )
             self._save_settings_with_feedback("Preset laden")
             self.current_preset_label.setText("Aktuelles Preset: " + preset_name)
 
@@ -3012,6 +3120,10 @@ class MainWindow(QMainWindow):
             types=types,
             size=self.combo_size.currentText(),
             age=self.combo_age.currentText(),
+            exclude=self.settings.filters.exclude,
+            top_n=self.settings.filters.top_n,
+            one_file_system=self.settings.filters.one_file_system,
+            max_depth=self.settings.filters.max_depth,
         )
         self.settings.duplicates_mode = self.combo_dups.currentText()
         self._save_settings_with_feedback("Optionen")
@@ -3215,21 +3327,167 @@ class MainWindow(QMainWindow):
 
         self.lbl_scan_status.setText("Scanne Ordner… Bitte warten.")
         QApplication.processEvents()
+        progress, progress_dialog = self._create_scan_progress()
+        try:
+            return self._run_scan(perm_message, progress)
+        except ScanCancelled:
+            self.lbl_scan_status.setText(
+                "Analyse abgebrochen. Nächster Schritt: In den Optionen erneut auf „Weiter“ "
+                "klicken; bereits berechnete Prüfsummen bleiben gespeichert."
+            )
+            return False
+        finally:
+            progress_dialog.close()
+
+    def _create_scan_progress(self) -> tuple[ProgressToken, QProgressDialog]:
+        """Fortschrittsfenster mit Abbrechen-Knopf für Scan und Duplikatsuche.
+
+        Der Rückruf läuft im Qt-Hauptthread (siehe `core.progress`) und
+        verarbeitet dabei anstehende Ereignisse, damit „Abbrechen“ reagiert.
+        """
+        dialog = QProgressDialog("Scanne Ordner…", "Abbrechen", 0, 0, self)
+        dialog.setWindowTitle("Analyse läuft")
+        dialog.setWindowModality(Qt.WindowModal)
+        dialog.setMinimumDuration(500)
+        dialog.setAutoClose(False)
+        dialog.setAutoReset(False)
+        token = ProgressToken()
+
+        def show(snapshot: ProgressSnapshot) -> None:
+            self._take_scan_estimate()
+            estimate = (
+                self.scan_estimate[1]
+                if self.scan_estimate and self.scan_estimate[0] == self.root_path
+                else None
+            )
+            dialog.setLabelText(self._format_scan_progress(snapshot, estimate))
+            if snapshot.phase == HASH_PHASE and snapshot.bytes_to_hash:
+                dialog.setMaximum(1000)
+                dialog.setValue(
+                    min(999, 1000 * snapshot.bytes_hashed // snapshot.bytes_to_hash)
+                )
+            QApplication.processEvents()
+
+        token.callback = show
+        dialog.canceled.connect(token.cancel)
+        return token, dialog
+
+    @staticmethod
+    def _format_scan_progress(
+        snapshot: ProgressSnapshot, estimate: ScanEstimate | None = None
+    ) -> str:
+        if snapshot.eta_seconds is None:
+            eta = "Restzeit wird berechnet…"
+        else:
+            eta = f"Restzeit ca. {max(int(snapshot.eta_seconds), 1)} s"
+        if snapshot.phase == HASH_PHASE:
+            done_mb = snapshot.bytes_hashed / (1024 * 1024)
+            total_mb = snapshot.bytes_to_hash / (1024 * 1024)
+            rate_mb = snapshot.bytes_hashed_per_second / (1024 * 1024)
+            return (
+                f"Suche Duplikate… {done_mb:.0f} von {total_mb:.0f} MB geprüft "
+                f"({rate_mb:.1f} MB/s)\n{eta}"
+            )
+        text = (
+            f"Scanne Ordner… {snapshot.files} Dateien "
+            f"({snapshot.files_per_second:.0f}/s), "
+            f"{snapshot.dirs_pending} Ordner offen\n{eta}"
+        )
+        if estimate is not None and estimate.files[0] > 0:
+            share = min(snapshot.files / estimate.files[0], 0.99)
+            text += (
+                f"\nErwartet: ca. {estimate.files[0]:.0f} Dateien "
+                f"(bisher ca. {share:.0%})"
+            )
+        return text
+
+    def _run_scan(self, perm_message: str, progress: ProgressToken) -> bool:
         # parse thresholds
         size_bytes = _parse_size(self.settings.filters.size)
         age_secs = _parse_age(self.settings.filters.age)
         types = self.settings.filters.types
         assert self.root_path, "root_path sollte gesetzt sein"
-        results = scan_directory(self.root_path, types, size_bytes, age_secs)
-        dups = detect_duplicates(results, self.settings.duplicates_mode)
+        if getattr(self, "_watched_root", None) != (
+            self.root_path if self.settings.live_watch else None
+        ):
+            # Ordner gewechselt oder Live-Modus aus: alten Watcher beenden
+            self._stop_live_watch()
+        watcher = get_watcher(self.root_path) if self.settings.live_watch else None
+        if watcher is not None:
+            # Live-Modus: Ergebnisse kommen ohne Plattenzugriff aus dem Speicher
+            results = watcher.query(
+                types,
+                size_bytes,
+                age_secs,
+                exclude=self.settings.filters.exclude,
+                one_file_system=self.settings.filters.one_file_system,
+                max_depth=self.settings.filters.max_depth,
+            )
+        else:
+            # Filter laufen im Speicher über den letzten ungefilterten Scan
+            results = self._get_unfiltered_scan(progress).filter(
+                types, size_bytes, age_secs
+            )
+            if self.settings.live_watch:
+                try:
+                    start_watch(self.root_path)
+                    self._watched_root = self.root_path
+                except RuntimeError as exc:
+                    LOGGER.warning("Live-Überwachung nicht gestartet: %s", exc)
+        if self.settings.filters.top_n:
+            # Nur die N größten Dateien behalten (z. B. Preset quick_large)
+            results = top_n(results, self.settings.filters.top_n)
+        # Kennzahlen und Ordnerbaum für Statuszeile und Dashboard in einem Durchlauf
+        tree = DirTreeBuilder(self.root_path)
+        self.scan_summary = summarize(tree.track(results), top=3)
+        dir_tree = self._get_dir_tree()
+        if dir_tree is not None:
+            try:
+                dir_tree.store(tree)
+            except Exception as exc:
+                LOGGER.warning("Ordnerbaum nicht gespeichert: %s", exc)
+        # Eine Lese-Regel pro Analyse: die MB/s-Grenze gilt für den ganzen Lauf
+        read_policy = ReadPolicy(
+            gentle=self.settings.hash_gentle_reads,
+            max_bytes_per_second=self.settings.hash_read_limit_mb * 1024 * 1024,
+        )
+        dups = detect_duplicates(
+            results,
+            self.settings.duplicates_mode,
+            hash_cache=self._get_hash_cache(),
+            workers=self.settings.hash_workers,
+            per_device=self.settings.hash_per_device,
+            prefilter=self.settings.hash_prefilter,
+            confirm=self.settings.hash_confirm,
+            progress=progress,
+            read_policy=read_policy,
+        )
         self.scan_results = results
-        self.duplicates_map = dups
+        if self.settings.duplicates_mode == "similar_images":
+            # Ähnliche Bilder sind keine Byte-Kopien: nichts automatisch behalten/verschieben
+            self.similar_images = dups
+            self.duplicates_map = {}
+        else:
+            self.similar_images = {}
+            self.duplicates_map = dups
+        # Nur das Inhaltsverzeichnis der Archive wird gelesen, nichts entpackt
+        self.extracted_archives = find_extracted_archives(results)
+        self.stored_elsewhere = self._lookup_stored_elsewhere(
+            results, progress, read_policy
+        )
         total_files = len(results)
         dup_groups = len(dups)
-        total_size = sum(r.size for r in results)
+        group_label = (
+            "Ähnliche Bild-Gruppen (nicht vorausgewählt)"
+            if self.similar_images
+            else "Duplikat-Gruppen"
+        )
+        total_size = self.scan_summary.bytes
         size_mb = total_size / (1024 * 1024)
         self.lbl_scan_status.setText(
-            f"{perm_message}<br/>Gefundene Dateien: {total_files}<br/>Duplikat-Gruppen: {dup_groups}<br/>Gesamtgröße: {size_mb:.2f} MB"
+            f"{perm_message}<br/>Gefundene Dateien: {total_files}<br/>{group_label}: {dup_groups}<br/>Gesamtgröße: {size_mb:.2f} MB"
+            f"<br/>Bereits entpackte Archive: {len(self.extracted_archives)}"
+            f"<br/>Schon in Ablage-Ordnern: {len(self.stored_elsewhere)}"
         )
         # Ergebnisse speichern und Liste sortiert aufbauen
         self.list_scan_results.clear()
@@ -3241,6 +3499,221 @@ class MainWindow(QMainWindow):
         self._update_scan_selection_status()
         return True
 
+    def _get_unfiltered_scan(
+        self, progress: ProgressToken | None = None
+    ) -> ScanResultStore:
+        """Liefert alle Dateien des Ordners ohne Filter, bei Bedarf neu gescannt.
+
+        Der letzte Scan wird nur wiederverwendet, wenn sich seitdem nur
+        Größe, Alter oder Typen geändert haben und er jünger als
+        `SCAN_REUSE_SECONDS` ist. Eine erneute Analyse mit gleichen Filtern,
+        ein anderer Ordner, andere Ausschluss-Muster oder Ordner-Grenzen
+        (Dateisystem, Tiefe) und verschobene Dateien lesen den Ordner immer
+        neu; mit Scan-Index nur die geänderten Teile.
+        """
+        assert self.root_path, "root_path sollte gesetzt sein"
+        filters = self.settings.filters
+        scan_key = (
+            self.root_path,
+            tuple(filters.exclude),
+            filters.one_file_system,
+            filters.max_depth,
+        )
+        filter_key = (tuple(filters.types), filters.size, filters.age)
+        cached = getattr(self, "_unfiltered_scan", None)
+        if cached is not None:
+            key, last_filters, scanned_at, store = cached
+            if (
+                key == scan_key
+                and last_filters != filter_key
+                and time.monotonic() - scanned_at < self.SCAN_REUSE_SECONDS
+            ):
+                # Nur die Filter geändert: kein Plattenzugriff
+                self._unfiltered_scan = (key, filter_key, scanned_at, store)
+                return store
+        scan_index = self._get_scan_index()
+        if scan_index is None or not scan_index.indexed(self.root_path):
+            # Bekannte Ordner frischt der Index schnell auf; sonst parallel schätzen
+            self._start_scan_estimate(filters)
+        try:
+            store = scan_directory(
+                self.root_path,
+                list(ALL_TYPES),
+                0,
+                0.0,
+                workers=self.settings.scan_workers,
+                index=scan_index,
+                compact=True,
+                exclude=filters.exclude,
+                progress=progress,
+                one_file_system=filters.one_file_system,
+                max_depth=filters.max_depth,
+            )
+        finally:
+            # eine zu spät fertige Schätzung wird verworfen
+            self._pending_estimate = None
+        self._unfiltered_scan = (scan_key, filter_key, time.monotonic(), store)
+        return store
+
+    def _start_scan_estimate(self, filters: Filters) -> None:
+        """Startet die Stichproben-Schätzung (`SCAN_ESTIMATE_SECONDS`) neben dem Scan.
+
+        Die Schätzung läuft in einem Hintergrund-Thread, der volle Scan
+        wartet nicht darauf. `_take_scan_estimate()` übernimmt das Ergebnis
+        im Qt-Hauptthread, sobald es vorliegt. Fehler verhindern den Scan nicht.
+        """
+        assert self.root_path, "root_path sollte gesetzt sein"
+        root = self.root_path
+        result: dict[str, ScanEstimate] = {}
+        self._pending_estimate = (root, result)
+
+        def run() -> None:
+            try:
+                result["estimate"] = estimate_scan(
+                    root,
+                    list(ALL_TYPES),
+                    0,
+                    0.0,
+                    time_budget=self.SCAN_ESTIMATE_SECONDS,
+                    exclude=filters.exclude,
+                    one_file_system=filters.one_file_system,
+                    max_depth=filters.max_depth,
+                )
+            except Exception as exc:
+                LOGGER.warning("Schätzung nicht möglich: %s", exc)
+
+        threading.Thread(target=run, name="scan-estimate", daemon=True).start()
+
+    def _take_scan_estimate(self) -> None:
+        """Zeigt eine fertige Hintergrund-Schätzung an (nur im Qt-Hauptthread aufrufen).
+
+        Das Dashboard und das Fortschrittsfenster zeigen die Schätzung, bis
+        der volle Scan fertig ist.
+        """
+        pending = getattr(self, "_pending_estimate", None)
+        if pending is None or "estimate" not in pending[1]:
+            return
+        self._pending_estimate = None
+        root, result = pending
+        estimate = result["estimate"]
+        self.scan_estimate = (root, estimate)
+        self.scan_summary = None
+        self.lbl_scan_status.setText(
+            escape(self._format_scan_estimate(estimate)) + "<br/>Scanne Ordner…"
+        )
+        self._refresh_dashboard_info()
+
+    def _get_dir_tree(self) -> DirTree | None:
+        """Liefert den gespeicherten Ordnerbaum (lazy) oder None bei Fehlern."""
+        dir_tree = getattr(self, "_dir_tree", None)
+        if dir_tree is None:
+            try:
+                dir_tree = DirTree()
+            except Exception as exc:
+                LOGGER.warning(
+                    "Ordnerbaum nicht verfügbar (%s). Nächster Schritt: Schreibrechte für data/ prüfen.",
+                    exc,
+                )
+                return None
+            self._dir_tree = dir_tree
+        return dir_tree
+
+    def _get_scan_index(self) -> ScanIndex | None:
+        """Liefert den dauerhaften Scan-Index (lazy) oder None, wenn deaktiviert.
+
+        Jeder Startordner wird spätestens nach `SCAN_INDEX_RECONCILE_SECONDS`
+        einmal voll abgeglichen, auch ohne geänderte Ordner-mtime.
+        """
+        if not self.settings.use_scan_index:
+            return None
+        scan_index = getattr(self, "_scan_index", None)
+        if scan_index is None:
+            try:
+                scan_index = ScanIndex(
+                    reconcile_every=self.SCAN_INDEX_RECONCILE_SECONDS
+                )
+            except Exception as exc:
+                LOGGER.warning(
+                    "Scan-Index nicht verfügbar (%s). Nächster Schritt: Schreibrechte für data/ prüfen; Scan läuft ohne Index.",
+                    exc,
+                )
+                return None
+            self._scan_index = scan_index
+        return scan_index
+
+    def _lookup_stored_elsewhere(
+        self,
+        results: ScanResultStore | list[ScanResult],
+        progress: ProgressToken | None = None,
+        read_policy: ReadPolicy | None = None,
+    ) -> dict[Path, list[Path]]:
+        """Sucht die Treffer im Inhaltsindex der Ablage-Ordner.
+
+        Ablage-Ordner kommen aus `Settings.content_index_roots`. Ordner, die
+        länger als `CONTENT_INDEX_MAX_AGE` nicht abgeglichen wurden, werden
+        vorher inkrementell aktualisiert; nicht mehr eingestellte Ordner
+        werden aus dem Index entfernt.
+        """
+        roots = [
+            Path(root)
+            for root in self.settings.content_index_roots
+            if Path(root) != self.root_path
+        ]
+        if not roots:
+            return {}
+        hash_cache = self._get_hash_cache()
+        workers = self.settings.hash_workers
+        try:
+            with ContentIndex(
+                prefilter=self.settings.hash_prefilter,
+                confirm=self.settings.hash_confirm,
+            ) as index:
+                updated = index.roots()
+                for stale in set(updated) - set(roots):
+                    index.remove_root(stale)
+                now = time.time()
+                for root in roots:
+                    if now - updated.get(root, 0.0) > self.CONTENT_INDEX_MAX_AGE:
+                        index.update_root(
+                            root,
+                            hash_cache=hash_cache,
+                            workers=workers,
+                            progress=progress,
+                            read_policy=read_policy,
+                        )
+                return index.lookup(
+                    results,
+                    hash_cache=hash_cache,
+                    workers=workers,
+                    progress=progress,
+                    read_policy=read_policy,
+                )
+        except ScanCancelled:
+            raise
+        except Exception as exc:
+            LOGGER.warning(
+                "Inhaltsindex nicht verfügbar (%s). Nächster Schritt: Ablage-Ordner in den Einstellungen prüfen.",
+                exc,
+            )
+            return {}
+
+    def _get_hash_cache(self) -> HashCache | None:
+        """Liefert den Prüfsummen-Cache (lazy) oder None, wenn deaktiviert."""
+        if not self.settings.use_hash_cache:
+            return None
+        hash_cache = getattr(self, "_hash_cache", None)
+        if hash_cache is None:
+            try:
+                hash_cache = HashCache()
+            except Exception as exc:
+                LOGGER.warning(
+                    "Prüfsummen-Cache nicht verfügbar (%s). Nächster Schritt: Schreibrechte für data/ prüfen; Duplikatsuche läuft ohne Cache.",
+                    exc,
+                )
+                return None
+            self._hash_cache = hash_cache
+        return hash_cache
+
     def _format_scan_hit_row_text(self, hit_path: str, size_mb: float) -> str:
         cleaned_path = hit_path.strip()
         if not cleaned_path:
@@ -3277,7 +3750,9 @@ class MainWindow(QMainWindow):
         wenn "Größe" gewählt ist.
         """
         # Wenn noch keine Ergebnisse vorliegen, abbrechen
-        if not hasattr(self, "scan_results") or not isinstance(self.scan_results, list):
+        if not hasattr(self, "scan_results") or not isinstance(
+            self.scan_results, (list, ScanResultStore)
+        ):
             return
         # Prüfen, ob das Sortierfeld vorhanden ist (kann im Test fehlen)
         sort_field = getattr(self, "combo_scan_sort", None)
@@ -3285,18 +3760,18 @@ class MainWindow(QMainWindow):
             return
         criterion = sort_field.currentText().strip().lower()
         # Erstelle sortierte Liste nach gewähltem Kriterium
-        if criterion == "größe":
-            # Nach Dateigröße (Bytes) absteigend, dann nach Pfad
-            sorted_results = sorted(
-                self.scan_results,
-                key=lambda r: (-r.size, str(r.path).lower()),
-            )
+        by_size = criterion == "größe"
+
+        def sort_key(r: ScanResult) -> tuple[int, str]:
+            # "Größe": nach Bytes absteigend, sonst (Standard) nur alphabetisch
+            # nach Pfad (case-insensitive)
+            return (-r.size if by_size else 0, str(r.path).lower())
+
+        # Kompakte Ergebnis-Ablage bleibt kompakt (kein Umweg über eine Liste)
+        if isinstance(self.scan_results, ScanResultStore):
+            sorted_results = self.scan_results.sorted(key=sort_key)
         else:
-            # Standard: alphabetisch nach Pfad (case-insensitive)
-            sorted_results = sorted(
-                self.scan_results,
-                key=lambda r: str(r.path).lower(),
-            )
+            sorted_results = sorted(self.scan_results, key=sort_key)
         # Merke sortierte Liste für spätere Planung
         self.scan_results = sorted_results
         # Liste neu aufbauen
@@ -3323,6 +3798,17 @@ class MainWindow(QMainWindow):
         # Nach Sortierung gesamte Liste markieren, um keine unabsichtliche Verwirrung zu erzeugen
         if self.list_scan_results.count() > 0:
             self.list_scan_results.selectAll()
+        # Ähnliche Bilder nur auf ausdrücklichen Wunsch verschieben: Markierung entfernen
+        similar_paths = {
+            str(hit.path).strip()
+            for group in getattr(self, "similar_images", {}).values()
+            for hit in group
+        }
+        if similar_paths:
+            for index in range(self.list_scan_results.count()):
+                item = self.list_scan_results.item(index)
+                if item and item.data(Qt.UserRole) in similar_paths:
+                    item.setSelected(False)
         self._update_scan_selection_status()
 
     def _copy_selected_scan_paths(self) -> None:
@@ -3419,7 +3905,7 @@ class MainWindow(QMainWindow):
         # build plan
         # compute trash directory under download_dir
         assert self.root_path, "root_path sollte gesetzt sein"
-        trash_dir = self.root_path / ".downloads_organizer_trash"
+        trash_dir = self.root_path / TRASH_DIR_NAME
         trash_dir.mkdir(parents=True, exist_ok=True)
         selected_paths = {
             str(item.data(Qt.UserRole)).strip()
@@ -3461,6 +3947,9 @@ class MainWindow(QMainWindow):
             selected_duplicates_map,
             self.root_path,
             trash_dir,
+            extracted_archives=self.extracted_archives,
+            stored_elsewhere=self.stored_elsewhere,
+            similar_images=self.similar_images,
         )
         if self.plan is None:
             raise RuntimeError(
@@ -3570,6 +4059,8 @@ class MainWindow(QMainWindow):
                 return
         ok, msg = execute_move_plan(self.plan)
         QMessageBox.information(self, "Ausführen", msg)
+        # Dateien wurden verschoben: nächster Scan muss den Ordner neu lesen
+        self._unfiltered_scan = None
         if ok:
             # Nach erfolgreicher Ausführung Verlaufsdaten speichern
             try:
@@ -3659,6 +4150,7 @@ class MainWindow(QMainWindow):
     def _undo_last(self) -> None:
         ok, msg = undo_last()
         QMessageBox.information(self, "Undo", msg)
+        self._unfiltered_scan = None
         # After undo, update list maybe
         # Nothing else to do
 
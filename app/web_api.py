@@ -4,9 +4,17 @@ Dieses Modul stellt einen minimalen FastAPI‑Server bereit. Es definiert zwei
 Endpunkte, die in künftigen Iterationen ausgebaut werden können:
 
 * ``/status`` – gibt eine einfache Statusmeldung zurück, ob der Dienst läuft.
-* ``/dry_run`` – simuliert einen Aufräumlauf (derzeit nur Plausibilitätsprüfung
-  des Pfades). In späteren Versionen sollen hier die Scan‑ und Plan‑Funktionen
-  aus dem Kernmodul verwendet werden.
+* ``/dry_run`` – simuliert einen Aufräumlauf. Läuft für den Pfad eine
+  Live-Überwachung (``core.watcher``), antwortet der Endpunkt sofort mit
+  Dateianzahl und Gesamtgröße aus dem Speicher, ohne die Platte zu lesen.
+  Ist in den Einstellungen ``live_watch`` aktiv, startet der Server beim
+  Hochfahren selbst eine Überwachung für ``download_dir`` und beendet sie
+  beim Herunterfahren.
+  Sonst liefert er nach etwa zwei Sekunden eine Stichproben-Schätzung mit
+  Spannweite (``scanner.estimate_scan``), auch für riesige Ordner.
+* ``/folders`` – zeigt aus dem zuletzt gespeicherten Ordnerbaum
+  (``core.dir_tree``) die Unterordner eines Ordners mit den meisten
+  aufräumbaren Bytes. Es wird nur die angefragte Ebene gelesen.
 
 Die API ist bewusst laienfreundlich gestaltet: Fehlermeldungen sind klar
 formuliert und geben nächste Schritte vor. Für den produktiven Einsatz
@@ -19,12 +27,60 @@ verwendet werden.
 
 from __future__ import annotations
 
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import Dict
+from typing import AsyncIterator, Dict, List, Optional, Union
 
 from fastapi import FastAPI
 
-app = FastAPI(title="Provoware Clean Tool 2026 API")
+from core.dir_tree import DirTree
+from core.logger import setup_logger
+from core.scanner import ALL_TYPES, estimate_scan, unique_size
+from core.settings import Settings
+from core.watcher import get_watcher, is_supported, start_watch, stop_watch
+
+LOGGER = setup_logger()
+
+
+def _watch_root() -> Optional[Path]:
+    """Return ``download_dir`` when live watching is enabled and possible."""
+    try:
+        settings = Settings.load()
+    except Exception as exc:
+        LOGGER.warning(
+            "Einstellungen nicht lesbar (%s). Nächster Schritt: data/settings.json prüfen; /dry_run schätzt ohne Live-Überwachung.",
+            exc,
+        )
+        return None
+    root = Path(settings.download_dir) if settings.download_dir else None
+    if not settings.live_watch or root is None or not root.is_dir():
+        return None
+    if not is_supported():
+        LOGGER.warning(
+            "Live-Überwachung braucht Linux-inotify. Nächster Schritt: /dry_run liefert Schätzungen ohne Live-Modus."
+        )
+        return None
+    return root
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI) -> AsyncIterator[None]:
+    """Start the watcher for ``download_dir`` with the server and stop it after."""
+    root = _watch_root()
+    if root is not None:
+        try:
+            start_watch(root)
+        except RuntimeError as exc:
+            LOGGER.warning("Live-Überwachung nicht gestartet: %s", exc)
+            root = None
+    try:
+        yield
+    finally:
+        if root is not None:
+            stop_watch(root)
+
+
+app = FastAPI(title="Provoware Clean Tool 2026 API", lifespan=lifespan)
 
 
 @app.get("/status", summary="Status abrufen")
@@ -54,9 +110,10 @@ def dry_run(path: str | None = None) -> Dict[str, str]:
     Returns
     -------
     Dict[str, str]
-        Ein Wörterbuch mit Status und Nachricht. Im Erfolgsfall wird ein
-        Platzhaltertext für den noch nicht implementierten Trockenlauf
-        zurückgegeben.
+        Ein Wörterbuch mit Status und Nachricht sowie ``files`` und
+        ``bytes``. Ist der Pfad live überwacht, sind das exakte Werte; sonst
+        Schätzwerte mit ``files_low``/``files_high``, ``bytes_low``/
+        ``bytes_high`` (95 %-Spannweite) und ``estimate`` = ``"true"``.
     """
     if not path:
         return {
@@ -69,8 +126,76 @@ def dry_run(path: str | None = None) -> Dict[str, str]:
             "status": "fehler",
             "message": f"Pfad {path} existiert nicht. Bitte prüfen Sie die Eingabe.",
         }
-    # Platzhalter: In späteren Versionen wird hier der Scanner/Planner genutzt
+    watcher = get_watcher(p) if p.is_dir() else None
+    if watcher is not None:
+        hits = watcher.results()
+        return {
+            "status": "ok",
+            "message": f"Live-Stand für {path}: {len(hits)} Dateien.",
+            "files": str(len(hits)),
+            "bytes": str(unique_size(hits)),
+        }
+    if not p.is_dir():
+        return {
+            "status": "fehler",
+            "message": f"Pfad {path} ist kein Ordner. Bitte einen Ordner angeben.",
+        }
+    estimate = estimate_scan(p, list(ALL_TYPES), 0, 0.0, time_budget=2.0)
+    files, files_low, files_high = estimate.files
+    size, size_low, size_high = estimate.bytes
+    if estimate.exact:
+        message = f"Vollständig gezählt für {path}: {files:.0f} Dateien."
+    else:
+        message = (
+            f"Schätzung für {path}: ca. {files:.0f} Dateien "
+            f"({files_low:.0f}–{files_high:.0f}, 95 % Sicherheit)."
+        )
+    return {
+        "status": "ok",
+        "message": message,
+        "files": str(round(files)),
+        "bytes": str(round(size)),
+        "files_low": str(round(files_low)),
+        "files_high": str(round(files_high)),
+        "bytes_low": str(round(size_low)),
+        "bytes_high": str(round(size_high)),
+        "estimate": "false" if estimate.exact else "true",
+    }
+
+
+@app.get("/folders", summary="Ordner mit den meisten aufräumbaren Bytes")
+def folders(
+    path: str | None = None, sub: str | None = None, limit: int = 20
+) -> Dict[str, Union[str, List[Dict[str, str]]]]:
+    """Liefert die Unterordner aus dem gespeicherten Ordnerbaum, größte zuerst.
+
+    Parameter
+    ---------
+    path: str
+        Startordner der letzten Analyse in der GUI.
+    sub: str, optional
+        Unterordner zum Aufklappen; ohne Angabe die oberste Ebene.
+    limit: int, optional
+        Höchstzahl gelieferter Einträge (Standard 20).
+    """
+    if not path:
+        return {
+            "status": "fehler",
+            "message": "Pfad darf nicht leer sein. Bitte geben Sie einen gültigen Ordner an.",
+        }
+    root = Path(path)
+    with DirTree() as tree:
+        if tree.scanned_at(root) is None:
+            return {
+                "status": "fehler",
+                "message": f"Für {path} liegt noch keine Analyse vor. Nächster Schritt: In der GUI 'Analyse starten'.",
+            }
+        entries = tree.children(root, Path(sub) if sub else None, limit=limit)
     return {
         "status": "ok",
-        "message": f"Trockenlauf für {path} ist noch nicht implementiert, folgt in späteren Versionen.",
+        "message": f"{len(entries)} Unterordner mit aufräumbaren Dateien.",
+        "folders": [
+            {"path": str(e.path), "bytes": str(e.bytes), "files": str(e.files)}
+            for e in entries
+        ],
     }
@@ -0,0 +1,175 @@
+"""
+core.aggregates – Kennzahlen direkt aus dem Scan-Strom.
+
+Für Schnellaktionen wie „große Dateien“ und für Dashboard-Karten reichen die
+N größten (oder ältesten) Dateien, Summen pro Dateityp und eine Größen-Übersicht
+pro Ordner. Die Operatoren hier verarbeiten ``ScanResult``-Einträge einzeln,
+zum Beispiel direkt aus ``scanner.iter_scan()``, und brauchen dabei nur
+Speicher für die N Treffer, die Typen und die Ordner der gewählten Tiefe –
+nicht für den ganzen Baum.
+
+Hardlinks zählen bei den Byte-Summen nur einmal; dafür merken sich die
+Operatoren nur die Inodes von Dateien mit mehreren Links.
+"""
+
+from __future__ import annotations
+
+import heapq
+import itertools
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from .scanner import ALL_TYPES, ScanResult
+from .validation import require_choice, require_non_negative_number
+
+TOP_ORDERS = ("size", "age")
+
+
+class _HardlinkFilter:
+    """Remember multi-link inodes so their bytes are only counted once."""
+
+    def __init__(self) -> None:
+        self._seen: Set[Tuple[int, int]] = set()
+
+    def first_time(self, item: ScanResult) -> bool:
+        if item.nlink <= 1 or not item.inode:
+            return True
+        key = item.inode_key()
+        if key in self._seen:
+            return False
+        self._seen.add(key)
+        return True
+
+
+class TopN:
+    """Keep the ``n`` largest (``by="size"``) or oldest (``by="age"``) files.
+
+    Uses a min-heap of size ``n``; ties keep the entry seen first.
+    """
+
+    def __init__(self, n: int, by: str = "size") -> None:
+        self.n = int(require_non_negative_number(n, "n"))
+        self.by = require_choice(by, TOP_ORDERS, "by")
+        self._heap: List[Tuple[float, int, ScanResult]] = []
+        self._counter = itertools.count()
+
+    def add(self, item: ScanResult) -> None:
+        if not self.n:
+            return
+        score = float(item.size) if self.by == "size" else -item.mtime
+        # negative counter: among equal scores the earlier entry ranks higher
+        entry = (score, -next(self._counter), item)
+        if len(self._heap) < self.n:
+            heapq.heappush(self._heap, entry)
+        elif entry[:2] > self._heap[0][:2]:
+            heapq.heapreplace(self._heap, entry)
+
+    def results(self) -> List[ScanResult]:
+        """Return the kept files, best first."""
+        ranked = sorted(self._heap, key=lambda entry: entry[:2], reverse=True)
+        return [item for _score, _order, item in ranked]
+
+
+@dataclass
+class TypeTotal:
+    """Number of files and bytes for one file type."""
+
+    count: int = 0
+    bytes: int = 0
+
+
+class TypeTotals:
+    """Count files and bytes per file type."""
+
+    def __init__(self) -> None:
+        self.totals: Dict[str, TypeTotal] = {name: TypeTotal() for name in ALL_TYPES}
+        self._links = _HardlinkFilter()
+
+    def add(self, item: ScanResult) -> None:
+        total = self.totals.setdefault(item.file_type, TypeTotal())
+        total.count += 1
+        if self._links.first_time(item):
+            total.bytes += item.size
+
+
+class DirectoryRollup:
+    """Sum bytes and file counts per directory, cut off at ``depth`` below root.
+
+    ``depth=1`` adds everything up per direct subfolder of ``root``; files
+    directly in ``root`` count for ``root`` itself. Memory grows with the
+    number of directories at that depth, not with the number of files.
+    """
+
+    def __init__(self, root: Path, depth: int = 1) -> None:
+        self.root = Path(root)
+        self.depth = int(require_non_negative_number(depth, "depth"))
+        self.bytes: Dict[Path, int] = {}
+        self.counts: Dict[Path, int] = {}
+        self._links = _HardlinkFilter()
+        self._root_parts = len(self.root.parts)
+
+    def add(self, item: ScanResult) -> None:
+        parts = item.path.parent.parts
+        if parts[: self._root_parts] != self.root.parts:
+            return
+        key = Path(*parts[: self._root_parts + self.depth])
+        self.counts[key] = self.counts.get(key, 0) + 1
+        if self._links.first_time(item):
+            self.bytes[key] = self.bytes.get(key, 0) + item.size
+
+    def largest(self, n: Optional[int] = None) -> List[Tuple[Path, int]]:
+        """Return ``(directory, bytes)`` pairs, largest first."""
+        ranked = sorted(self.bytes.items(), key=lambda pair: (-pair[1], str(pair[0])))
+        return ranked if n is None else ranked[:n]
+
+
+@dataclass
+class ScanSummary:
+    """Result of `summarize()`: everything collected in one pass."""
+
+    files: int = 0
+    bytes: int = 0
+    top: List[ScanResult] = field(default_factory=list)
+    by_type: Dict[str, TypeTotal] = field(default_factory=dict)
+    by_directory: List[Tuple[Path, int]] = field(default_factory=list)
+
+
+def summarize(
+    results: Iterable[ScanResult],
+    top: int = 10,
+    by: str = "size",
+    root: Optional[Path] = None,
+    depth: int = 1,
+) -> ScanSummary:
+    """Compute top-N, per-type totals and (with ``root``) a folder rollup.
+
+    ``results`` is consumed exactly once, so a generator such as
+    `scanner.iter_scan()` works without collecting the tree into a list.
+    """
+    top_files = TopN(top, by)
+    types = TypeTotals()
+    rollup = DirectoryRollup(root, depth) if root is not None else None
+    links = _HardlinkFilter()
+    summary = ScanSummary()
+    for item in results:
+        summary.files += 1
+        if links.first_time(item):
+            summary.bytes += item.size
+        top_files.add(item)
+        types.add(item)
+        if rollup is not None:
+            rollup.add(item)
+    summary.top = top_files.results()
+    summary.by_type = types.totals
+    if rollup is not None:
+        summary.by_directory = rollup.largest()
+    return summary
+
+
+def top_n(results: Iterable[ScanResult], n: int, by: str = "size") -> List[ScanResult]:
+    """Return the ``n`` largest or oldest files of a result stream, best first."""
+    collector = TopN(n, by)
+    for item in results:
+        collector.add(item)
+    return collector.results()
@@ -0,0 +1,138 @@
+"""
+core.archives – Archive erkennen, die schon entpackt daneben liegen.
+
+Typisch für Downloads: ``foo.zip`` und daneben der entpackte Ordner ``foo/``.
+Das Archiv belegt dann nur noch doppelt Platz. ``find_extracted_archives()``
+liest dafür nur das Inhaltsverzeichnis eines Archivs – bei ZIP das zentrale
+Verzeichnis am Dateiende, bei TAR die Kopfzeilen der Einträge (die Daten
+dazwischen werden übersprungen) – und entpackt nichts. Auch Archive mit
+mehreren Gigabyte kosten so nur wenige Lesezugriffe.
+
+Ein Archiv gilt als entpackt, wenn jede enthaltene Datei mit gleichem Namen
+und gleicher Größe in einem der Kandidaten-Ordner liegt:
+
+* ``foo/`` neben ``foo.zip`` (Einträge relativ zu diesem Ordner), oder
+* der Ordner des Archivs selbst, wenn alle Einträge in einem gemeinsamen
+  Oberordner liegen (``foo.zip`` enthält ``foo/...``).
+
+Zusätzliche Dateien im entpackten Ordner stören nicht. Der Planer markiert
+solche Archive mit dem Grund ``archive_extracted``.
+
+Nur ZIP und unkomprimiertes TAR haben ein Inhaltsverzeichnis, das ohne
+Entpacken lesbar ist. ``.tar.gz``/``.tar.bz2`` müssten dafür komplett
+entpackt werden, 7z und RAR kann die Standardbibliothek nicht lesen; diese
+Archive werden übersprungen.
+"""
+
+from __future__ import annotations
+
+import os
+import posixpath
+import stat
+import tarfile
+import zipfile
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+from .scanner import ScanResult
+
+# Metadata folder added by macOS when zipping; extractors may drop it
+_IGNORED_PREFIXES = ("__MACOSX/",)
+
+
+def _safe_member(name: str) -> Optional[str]:
+    """Return the normalized relative member name, or None if it escapes."""
+    name = name.replace("\\", "/")
+    if name.startswith("/") or (len(name) > 1 and name[1] == ":"):
+        return None
+    normalized = posixpath.normpath(name)
+    if normalized in (".", "") or normalized.startswith("../") or normalized == "..":
+        return None
+    return normalized
+
+
+def archive_members(path: Path) -> Optional[Dict[str, int]]:
+    """Return ``{member name: size}`` of the regular files in an archive.
+
+    Only the member index is read. Returns None for unsupported formats
+    (compressed TAR, 7z, RAR), unreadable archives and archives with
+    unsafe member names (absolute or leaving the target folder).
+    """
+    members: Dict[str, int] = {}
+    try:
+        if zipfile.is_zipfile(path):
+            with zipfile.ZipFile(path) as archive:
+                entries = [
+                    (info.filename, info.file_size)
+                    for info in archive.infolist()
+                    if not info.is_dir()
+                ]
+        elif path.suffix.lower() == ".tar":
+            # "r:" refuses compressed streams; headers are read, data is skipped
+            with tarfile.open(path, "r:") as archive:
+                entries = [(info.name, info.size) for info in archive if info.isfile()]
+        else:
+            return None
+    except (OSError, zipfile.BadZipFile, tarfile.TarError, EOFError):
+        return None
+    for name, size in entries:
+        if name.startswith(_IGNORED_PREFIXES):
+            continue
+        member = _safe_member(name)
+        if member is None:
+            return None
+        members[member] = size
+    return members
+
+
+def _contains_members(base: Path, members: Dict[str, int], archive: Path) -> bool:
+    for name, size in members.items():
+        target = base / name
+        if target == archive:
+            return False
+        try:
+            info = os.stat(target)
+        except OSError:
+            return False
+        if not stat.S_ISREG(info.st_mode) or info.st_size != size:
+            return False
+    return True
+
+
+def extracted_folder(
+    path: Path, members: Optional[Dict[str, int]] = None
+) -> Optional[Path]:
+    """Return the folder holding the extracted contents of archive ``path``.
+
+    ``members`` defaults to `archive_members()`. Returns None if the
+    archive is unsupported, empty or not (completely) extracted.
+    """
+    if members is None:
+        members = archive_members(path)
+    if not members:
+        return None
+    candidates: List[Path] = [path.parent / path.stem]
+    tops = {name.split("/", 1)[0] for name in members}
+    if len(tops) == 1 and all("/" in name for name in members):
+        candidates.append(path.parent)
+    for base in candidates:
+        if base.is_dir() and _contains_members(base, members, path):
+            if base == path.parent:
+                return base / next(iter(tops))
+            return base
+    return None
+
+
+def find_extracted_archives(files: Iterable[ScanResult]) -> Dict[Path, Path]:
+    """Map each archive among ``files`` that is already extracted to its folder.
+
+    Only files of type ``archives`` are opened.
+    """
+    found: Dict[Path, Path] = {}
+    for item in files:
+        if item.file_type != "archives":
+            continue
+        folder = extracted_folder(item.path)
+        if folder is not None:
+            found[item.path] = folder
+    return found
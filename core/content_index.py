@@ -0,0 +1,430 @@
+"""
+core.content_index – Inhalte über mehrere Ordner hinweg wiederfinden.
+
+``detect_duplicates()`` vergleicht nur die Dateien eines Scans. Liegt ein Foto
+aus Downloads längst in ``~/Pictures``, bleibt das unbemerkt. Der Inhaltsindex
+merkt sich dafür die Dateien weiterer Ordner („Ablage-Ordner“, z. B.
+``~/Pictures`` und ``~/Documents``) in ``data/content_index.sqlite3``, in
+denselben Stufen wie die Duplikatsuche: Größe → Teil-Prüfsumme (erste und
+letzte 64 KiB) → volle Prüfsumme.
+
+``lookup()`` beantwortet „liegt diese Datei schon woanders?“ allein aus dem
+Index: Nur Dateien, deren Größe im Index vorkommt, werden angefasst, und nur
+die Datei aus Downloads wird gehasht – die Ablage-Ordner werden dafür weder
+gelesen noch erneut gehasht. Das Ergebnis entspricht dem Stand des letzten
+``update_root()``.
+
+``update_root()`` hält einen Ablage-Ordner aktuell. Das Auflisten übernimmt
+der Scan-Index (``core.scan_index``): Ordner mit unveränderter mtime werden
+nicht neu gelesen. Prüfsummen werden nur für neue Dateien und Dateien mit
+geänderter Größe, mtime oder Inode neu berechnet; bei einem zweiten Lauf ohne
+Änderungen wird nichts gehasht. Mit ``full_hashes=False`` entstehen die vollen
+Prüfsummen erst bei der ersten passenden Abfrage (einmalig, dann gespeichert).
+
+Ablage-Ordner sollten sich nicht überlappen; eine Datei gehört immer zu dem
+Ordner, mit dem sie zuletzt aktualisiert wurde.
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import (TYPE_CHECKING, Dict, Iterable, List, Optional, Sequence,
+                    Tuple)
+
+from .progress import ProgressToken
+from .read_policy import ReadPolicy
+from .scan_index import ScanIndex
+from .scanner import (ALL_TYPES, DEFAULT_CONFIRM_ALGORITHM,
+                      DEFAULT_PREFILTER_ALGORITHM, HASH_ALGORITHMS,
+                      PARTIAL_HASH_EDGE, HashPool, ScanResult,
+                      _cached_file_hash)
+from .validation import (require_choice, require_existing_dir,
+                         require_non_negative_number, require_type)
+
+if TYPE_CHECKING:
+    from .hash_cache import HashCache
+
+CONTENT_INDEX_PATH: Path = (
+    Path(__file__).resolve().parent.parent / "data" / "content_index.sqlite3"
+)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS roots (
+    root BLOB PRIMARY KEY,
+    updated_at REAL NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS contents (
+    path BLOB PRIMARY KEY,
+    root BLOB NOT NULL,
+    dev INTEGER NOT NULL,
+    ino INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    partial TEXT,
+    full TEXT
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS contents_size ON contents (size, partial);
+CREATE INDEX IF NOT EXISTS contents_root ON contents (root);
+"""
+
+# (path key, dev, ino, mtime, partial, full) of one stored file
+_Row = Tuple[bytes, int, int, float, Optional[str], Optional[str]]
+
+
+class ContentIndex:
+    """Persistent size → partial hash → full hash index over several roots.
+
+    Parameters
+    ----------
+    path: Path, optional
+        Database file. Defaults to ``data/content_index.sqlite3``.
+    prefilter, confirm: str, optional
+        Algorithms from `scanner.HASH_ALGORITHMS` for the partial and the full
+        digest. Changing them drops all stored digests; the next
+        `update_root()` computes them again.
+    scan_index: ScanIndex, optional
+        Listing cache used by `update_root()`; defaults to the shared
+        ``data/scan_index.sqlite3``.
+    """
+
+    def __init__(
+        self,
+        path: Optional[Path] = None,
+        prefilter: str = DEFAULT_PREFILTER_ALGORITHM,
+        confirm: str = DEFAULT_CONFIRM_ALGORITHM,
+        scan_index: Optional[ScanIndex] = None,
+    ) -> None:
+        self.prefilter = require_choice(prefilter, list(HASH_ALGORITHMS), "prefilter")
+        self.confirm = require_choice(confirm, list(HASH_ALGORITHMS), "confirm")
+        self.path = path or CONTENT_INDEX_PATH
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path))
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._scan_index = scan_index
+        self._owns_scan_index = scan_index is None
+        algorithms = f"{self.prefilter}|{self.confirm}"
+        row = self._conn.execute(
+            "SELECT value FROM meta WHERE key = 'algorithms'"
+        ).fetchone()
+        if row is None or row[0] != algorithms:
+            with self._conn:
+                self._conn.execute("UPDATE contents SET partial = NULL, full = NULL")
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO meta (key, value) VALUES ('algorithms', ?)",
+                    (algorithms,),
+                )
+
+    def close(self) -> None:
+        """Close the database (and the scan index opened by this object)."""
+        self._conn.close()
+        if self._owns_scan_index and self._scan_index is not None:
+            self._scan_index.close()
+
+    def __enter__(self) -> "ContentIndex":
+        return self
+
+    def __exit__(self, *_exc: object) -> None:
+        self.close()
+
+    # ----- roots ------------------------------------------------------------
+
+    def roots(self) -> Dict[Path, float]:
+        """Return the indexed roots with the time of their last update."""
+        return {
+            Path(os.fsdecode(root_key)): updated_at
+            for root_key, updated_at in self._conn.execute(
+                "SELECT root, updated_at FROM roots ORDER BY root"
+            )
+        }
+
+    def remove_root(self, root: Path) -> None:
+        """Forget ``root`` and all of its files."""
+        root_key = os.fsencode(str(root))
+        with self._conn:
+            self._conn.execute("DELETE FROM contents WHERE root = ?", (root_key,))
+            self._conn.execute("DELETE FROM roots WHERE root = ?", (root_key,))
+
+    def update_root(
+        self,
+        root: Path,
+        exclude: Sequence[str] = (),
+        hash_cache: Optional["HashCache"] = None,
+        workers: int = 1,
+        full_hashes: bool = True,
+        trust_dir_mtime: bool = True,
+        progress: Optional[ProgressToken] = None,
+        read_policy: Optional[ReadPolicy] = None,
+    ) -> Tuple[int, int]:
+        """Bring the stored files and digests of ``root`` up to date.
+
+        Parameters
+        ----------
+        root: Path
+            Folder to index, e.g. ``~/Pictures``.
+        exclude: Sequence[str], optional
+            Extra exclude patterns as in `scanner.scan_directory()`.
+        hash_cache: HashCache, optional
+            Digests already known from duplicate searches are reused.
+        workers: int, optional
+            Hashing threads (see `scanner.HashPool`).
+        full_hashes: bool, optional
+            Also compute full digests now, so later lookups never read
+            files in ``root``. ``False`` defers them to the first lookup
+            that needs them.
+        trust_dir_mtime: bool, optional
+            ``False`` relists every directory (see `ScanIndex.refresh()`).
+        progress: ProgressToken, optional
+            Counts listed directories and hashed bytes; allows cancelling.
+        read_policy: ReadPolicy, optional
+            Cache-friendly reads and bandwidth cap while hashing (see
+            `core.read_policy`).
+
+        Returns
+        -------
+        Tuple[int, int]
+            ``(new or changed, removed)`` file counts.
+        """
+        validated_root = require_existing_dir(root, "root")
+        index = self._listing_index()
+        index.refresh(
+            validated_root,
+            trust_dir_mtime=trust_dir_mtime,
+            exclude=exclude,
+            progress=progress,
+        )
+        files = index.query(validated_root, list(ALL_TYPES), 0, 0.0, exclude=exclude)
+        root_key = os.fsencode(str(validated_root))
+        stored = {
+            path_key: (dev, ino, size, mtime)
+            for path_key, dev, ino, size, mtime in self._conn.execute(
+                "SELECT path, dev, ino, size, mtime FROM contents WHERE root = ?",
+                (root_key,),
+            )
+        }
+        changed: List[Tuple[bytes, bytes, int, int, int, float]] = []
+        for f in files:
+            path_key = os.fsencode(str(f.path))
+            state = (f.dev, f.inode, f.size, f.mtime)
+            if stored.pop(path_key, None) != state:
+                changed.append((path_key, root_key, *state))
+        with self._conn:
+            # a changed file loses its digests: they belong to the old content
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO contents "
+                "(path, root, dev, ino, size, mtime, partial, full) "
+                "VALUES (?, ?, ?, ?, ?, ?, NULL, NULL)",
+                changed,
+            )
+            self._conn.executemany(
+                "DELETE FROM contents WHERE path = ?",
+                ((path_key,) for path_key in stored),
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO roots (root, updated_at) VALUES (?, ?)",
+                (root_key, time.time()),
+            )
+        pool = HashPool(int(require_non_negative_number(workers, "workers")) or 1)
+        self._fill_digests(root_key, "partial", hash_cache, pool, progress, read_policy)
+        if full_hashes:
+            self._fill_digests(
+                root_key, "full", hash_cache, pool, progress, read_policy
+            )
+        return len(changed), len(stored)
+
+    def _listing_index(self) -> ScanIndex:
+        if self._scan_index is None:
+            self._scan_index = ScanIndex()
+        return self._scan_index
+
+    def _hash_all(
+        self,
+        files: Sequence[ScanResult],
+        column: str,
+        hash_cache: Optional["HashCache"],
+        pool: HashPool,
+        progress: Optional[ProgressToken],
+        read_policy: Optional[ReadPolicy] = None,
+    ) -> List[str]:
+        """Return the ``column`` ('partial' or 'full') digest of each file."""
+        partial = column == "partial"
+        algorithm = self.prefilter if partial else self.confirm
+        if progress is not None:
+            progress.plan_hashing(
+                sum(
+                    min(f.size, 2 * PARTIAL_HASH_EDGE) if partial else f.size
+                    for f in files
+                )
+            )
+
+        def digest(f: ScanResult) -> str:
+            return _cached_file_hash(
+                f.path,
+                hash_cache,
+                algorithm=algorithm,
+                partial=partial,
+                progress=progress,
+                read_policy=read_policy,
+            )
+
+        return pool.map(digest, files, progress)
+
+    def _fill_digests(
+        self,
+        root_key: bytes,
+        column: str,
+        hash_cache: Optional["HashCache"],
+        pool: HashPool,
+        progress: Optional[ProgressToken],
+        read_policy: Optional[ReadPolicy] = None,
+    ) -> None:
+        """Compute the missing ``column`` digests of all files below ``root_key``."""
+        missing = [
+            ScanResult(
+                path=Path(os.fsdecode(path_key)),
+                size=size,
+                mtime=0.0,
+                file_type="other",
+                dev=dev,
+                inode=ino,
+            )
+            for path_key, dev, ino, size in self._conn.execute(
+                f"SELECT path, dev, ino, size FROM contents "
+                f"WHERE root = ? AND size > 0 AND {column} IS NULL",
+                (root_key,),
+            )
+        ]
+        if not missing:
+            return
+        digests = self._hash_all(
+            missing, column, hash_cache, pool, progress, read_policy
+        )
+        with self._conn:
+            self._conn.executemany(
+                f"UPDATE contents SET {column} = ? WHERE path = ?",
+                (
+                    (digest, os.fsencode(str(f.path)))
+                    for f, digest in zip(missing, digests)
+                ),
+            )
+        if hash_cache is not None:
+            hash_cache.flush()
+
+    # ----- lookups ----------------------------------------------------------
+
+    def _stored_full(
+        self, row: _Row, size: int, read_policy: Optional[ReadPolicy] = None
+    ) -> str:
+        """Return the full digest of a stored file, computing it once if missing.
+
+        The stored file is stat'ed first, also when its digest is known: it
+        may have been deleted or rewritten since the last `update_root()`.
+        An entry whose file no longer has the indexed size and mtime never
+        matches.
+        """
+        path_key, _dev, _ino, mtime, _partial, full = row
+        path = Path(os.fsdecode(path_key))
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return ""
+        if stat.st_size != size or stat.st_mtime_ns / 1_000_000_000 != mtime:
+            return ""
+        if full is not None:
+            return full
+        digest = _cached_file_hash(
+            path, None, algorithm=self.confirm, read_policy=read_policy
+        )
+        with self._conn:
+            self._conn.execute(
+                "UPDATE contents SET full = ? WHERE path = ?", (digest, path_key)
+            )
+        return digest
+
+    def lookup(
+        self,
+        files: Iterable[ScanResult],
+        hash_cache: Optional["HashCache"] = None,
+        workers: int = 1,
+        progress: Optional[ProgressToken] = None,
+        read_policy: Optional[ReadPolicy] = None,
+    ) -> Dict[Path, List[Path]]:
+        """Find files whose content is already stored in an indexed root.
+
+        Files with a size that no indexed file has are decided without
+        reading them; the others are hashed in two stages like
+        `scanner.detect_duplicates()` in 'content' mode. The file itself and
+        other links to the same inode do not count. A stored file is only
+        reported while it still exists with the indexed size and mtime.
+        Files are read according to ``read_policy``. ``files`` is iterated
+        once, so a `ScanResultStore` is never turned into a list.
+
+        Returns
+        -------
+        Dict[Path, List[Path]]
+            For each file found elsewhere, the indexed paths with the same
+            content.
+        """
+        pool = HashPool(int(require_non_negative_number(workers, "workers")) or 1)
+        rows_by_size: Dict[int, List[_Row]] = {}
+        candidates: List[Tuple[ScanResult, List[_Row]]] = []
+        # one item at a time: a ScanResultStore stays compact, only hits are kept
+        for item in files:
+            f = require_type(item, ScanResult, "files")
+            if f.size <= 0:
+                continue
+            if f.size not in rows_by_size:
+                rows_by_size[f.size] = self._conn.execute(
+                    "SELECT path, dev, ino, mtime, partial, full FROM contents "
+                    "WHERE size = ?",
+                    (f.size,),
+                ).fetchall()
+            own_key = os.fsencode(str(f.path))
+            rows = [
+                row
+                for row in rows_by_size[f.size]
+                if row[0] != own_key and (row[1], row[2]) != (f.dev, f.inode)
+            ]
+            if rows:
+                candidates.append((f, rows))
+        if not candidates:
+            return {}
+
+        for column in ("partial", "full"):
+            digests = self._hash_all(
+                [f for f, _rows in candidates],
+                column,
+                hash_cache,
+                pool,
+                progress,
+                read_policy,
+            )
+            survivors: List[Tuple[ScanResult, List[_Row]]] = []
+            for (f, rows), digest in zip(candidates, digests):
+                if not digest:
+                    continue
+                if column == "partial":
+                    matching = [row for row in rows if row[4] == digest]
+                else:
+                    matching = [
+                        row
+                        for row in rows
+                        if self._stored_full(row, f.size, read_policy) == digest
+                    ]
+                if matching:
+                    survivors.append((f, matching))
+            candidates = survivors
+        if hash_cache is not None:
+            hash_cache.flush()
+        return {
+            f.path: [Path(os.fsdecode(row[0])) for row in rows]
+            for f, rows in candidates
+        }
@@ -0,0 +1,189 @@
+"""
+core.dir_tree – Ordnerbaum mit aufsummierten Größen (wie ``du``).
+
+Während die Scan-Treffer durchlaufen, summiert ``DirTreeBuilder`` Bytes und
+Dateianzahl für jeden Ordner samt aller Oberordner bis zum Startordner. Es
+ist kein zweiter Durchlauf über die Platte nötig. ``DirTree`` speichert das
+Ergebnis in ``data/dir_tree.sqlite3``; GUI und Web-API lesen beim Aufklappen
+nur die direkten Unterordner des gewählten Ordners (``children()``), der
+ganze Baum muss dafür nie im Speicher liegen.
+
+Gezählt werden die Treffer des Scans, also die Dateien, die der Filter zum
+Aufräumen vorschlägt. Hardlinks zählen pro Inode einmal.
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+from .scanner import ScanResult
+from .validation import require_type
+
+TREE_PATH: Path = Path(__file__).resolve().parent.parent / "data" / "dir_tree.sqlite3"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS trees (
+    root BLOB PRIMARY KEY,
+    scanned_at REAL NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS dir_totals (
+    root BLOB NOT NULL,
+    path BLOB NOT NULL,
+    parent BLOB,
+    bytes INTEGER NOT NULL,
+    files INTEGER NOT NULL,
+    PRIMARY KEY (root, path)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS dir_totals_parent ON dir_totals (root, parent, bytes);
+"""
+
+
+@dataclass
+class DirTotal:
+    """Cumulative size of one directory including all subdirectories."""
+
+    path: Path
+    bytes: int
+    files: int
+
+
+class DirTreeBuilder:
+    """Accumulate per-directory totals from a stream of scan results.
+
+    Each file is added to its directory and every parent up to ``root``
+    right away, so no post-processing pass is needed. Memory grows with the
+    number of directories that contain hits, not with the number of files.
+    """
+
+    def __init__(self, root: Path) -> None:
+        self.root = str(require_type(root, Path, "root"))
+        self.totals: Dict[str, List[int]] = {self.root: [0, 0]}
+        self._seen_links: Set[Tuple[int, int]] = set()
+
+    def add(self, item: ScanResult) -> None:
+        counted = True
+        if item.nlink > 1 and item.inode:
+            key = item.inode_key()
+            counted = key not in self._seen_links
+            self._seen_links.add(key)
+        directory = os.path.dirname(str(item.path))
+        while True:
+            total = self.totals.get(directory)
+            if total is None:
+                total = self.totals[directory] = [0, 0]
+            total[1] += 1
+            if counted:
+                total[0] += item.size
+            if directory == self.root or len(directory) <= len(self.root):
+                break
+            directory = os.path.dirname(directory)
+
+    def track(self, results: Iterable[ScanResult]) -> Iterator[ScanResult]:
+        """Pass ``results`` through unchanged while adding each one."""
+        for item in results:
+            self.add(item)
+            yield item
+
+    def rows(self) -> Iterator[Tuple[str, Optional[str], int, int]]:
+        """Yield ``(path, parent, bytes, files)``; the root has no parent."""
+        for path, (size, files) in self.totals.items():
+            parent = None if path == self.root else os.path.dirname(path)
+            yield path, parent, size, files
+
+
+class DirTree:
+    """SQLite store for directory trees with lazy drill-down.
+
+    Parameters
+    ----------
+    path: Path, optional
+        Database file. Defaults to ``data/dir_tree.sqlite3``.
+    """
+
+    def __init__(self, path: Optional[Path] = None) -> None:
+        self.path = path or TREE_PATH
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path))
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self._conn.close()
+
+    def __enter__(self) -> "DirTree":
+        return self
+
+    def __exit__(self, *_exc: object) -> None:
+        self.close()
+
+    def store(self, builder: DirTreeBuilder) -> None:
+        """Replace the stored tree of ``builder.root`` with the new totals."""
+        root_key = os.fsencode(builder.root)
+        with self._conn:
+            self._conn.execute("DELETE FROM dir_totals WHERE root = ?", (root_key,))
+            self._conn.executemany(
+                "INSERT INTO dir_totals (root, path, parent, bytes, files) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (
+                    (
+                        root_key,
+                        os.fsencode(path),
+                        None if parent is None else os.fsencode(parent),
+                        size,
+                        files,
+                    )
+                    for path, parent, size, files in builder.rows()
+                ),
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO trees (root, scanned_at) VALUES (?, ?)",
+                (root_key, time.time()),
+            )
+
+    def scanned_at(self, root: Path) -> Optional[float]:
+        """Return when the tree for ``root`` was stored, or None."""
+        row = self._conn.execute(
+            "SELECT scanned_at FROM trees WHERE root = ?", (os.fsencode(str(root)),)
+        ).fetchone()
+        return float(row[0]) if row else None
+
+    def total(self, root: Path, path: Optional[Path] = None) -> Optional[DirTotal]:
+        """Return the totals of ``path`` (default: ``root`` itself)."""
+        target = path or root
+        row = self._conn.execute(
+            "SELECT bytes, files FROM dir_totals WHERE root = ? AND path = ?",
+            (os.fsencode(str(root)), os.fsencode(str(target))),
+        ).fetchone()
+        if row is None:
+            return None
+        return DirTotal(path=Path(target), bytes=row[0], files=row[1])
+
+    def children(
+        self, root: Path, path: Optional[Path] = None, limit: Optional[int] = None
+    ) -> List[DirTotal]:
+        """Return the direct subdirectories of ``path`` with hits, largest first.
+
+        Only this one level is read from the database.
+        """
+        sql = (
+            "SELECT path, bytes, files FROM dir_totals WHERE root = ? AND parent = ? "
+            "ORDER BY bytes DESC, path"
+        )
+        params: List[object] = [
+            os.fsencode(str(root)),
+            os.fsencode(str(path or root)),
+        ]
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(max(int(limit), 0))
+        return [
+            DirTotal(path=Path(os.fsdecode(key)), bytes=size, files=files)
+            for key, size, files in self._conn.execute(sql, params)
+        ]
@@ -0,0 +1,230 @@
+"""
+core.excludes – Ordner und Dateien beim Scannen auslassen.
+
+Der Papierkorb-Ordner ``.downloads_organizer_trash`` (legt die GUI beim
+Planen unter dem Startordner an) wird immer übersprungen, sonst schlägt jeder
+Lauf bereits verschobene Dateien erneut vor. Dazu kommen Muster aus einer
+Datei ``.cleanignore`` im Startordner (Schreibweise wie ``.gitignore``) und
+Ausschluss-Muster aus Presets/Filtern (``Filters.exclude``).
+
+Alle Muster werden einmal pro Scan zu regulären Ausdrücken übersetzt und vor
+dem Absteigen auf Ordner angewendet, ausgeschlossene Teilbäume werden also gar
+nicht erst gelesen.
+
+Unterstützte ``.gitignore``-Regeln: Kommentare (``#``), Leerzeilen,
+Verneinung (``!``), ``/`` am Ende (nur Ordner), ``/`` am Anfang oder in der
+Mitte (relativ zum Startordner, sonst passt das Muster in jeder Tiefe),
+``*``, ``?``, ``[...]`` und ``**``. Nur die ``.cleanignore`` im Startordner
+wird gelesen, nicht die in Unterordnern.
+
+Zwei Grenzen für den Durchlauf gehören ebenfalls hierher, weil sie genauso
+vor dem Absteigen greifen: ``one_file_system`` betritt keine Ordner auf einem
+anderen Dateisystem (Netzlaufwerke, Bind-Mounts; Vergleich von ``st_dev`` mit
+dem Startordner) und ``max_depth`` begrenzt die Ordnertiefe wie
+``find -maxdepth`` (1 = nur Dateien direkt im Startordner, 0 = unbegrenzt).
+"""
+
+from __future__ import annotations
+
+import os
+import re
+from pathlib import Path
+from typing import List, Optional, Pattern, Sequence, Tuple
+
+TRASH_DIR_NAME = ".downloads_organizer_trash"
+IGNORE_FILE_NAME = ".cleanignore"
+
+# (regex on the "/"-separated path relative to root, negated, directories only)
+_Rule = Tuple[Pattern[str], bool, bool]
+
+
+def _translate(pattern: str) -> str:
+    """Translate one gitignore glob (without ``!`` and trailing ``/``) to a regex."""
+    anchored = "/" in pattern
+    pattern = pattern.lstrip("/")
+    parts: List[str] = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if pattern.startswith("**/", i):
+            parts.append("(?:.*/)?")
+            i += 3
+            continue
+        if pattern.startswith("**", i):
+            parts.append(".*")
+            i += 2
+            continue
+        if char == "*":
+            parts.append("[^/]*")
+        elif char == "?":
+            parts.append("[^/]")
+        elif char == "[":
+            end = pattern.find("]", i + 2)
+            if end < 0:
+                parts.append(re.escape(char))
+            else:
+                body = pattern[i + 1 : end]
+                if body.startswith("!"):
+                    body = "^" + body[1:]
+                parts.append(f"[{body.replace(chr(92), chr(92) * 2)}]")
+                i = end
+        elif char == "\\" and i + 1 < len(pattern):
+            i += 1
+            parts.append(re.escape(pattern[i]))
+        else:
+            parts.append(re.escape(char))
+        i += 1
+    body = "".join(parts)
+    return body if anchored else f"(?:.*/)?{body}"
+
+
+def _compile(pattern: str) -> Optional[_Rule]:
+    line = pattern.rstrip("\n").rstrip()
+    if not line or line.startswith("#"):
+        return None
+    negated = line.startswith("!")
+    if negated:
+        line = line[1:]
+    elif line.startswith("\\"):
+        line = line[1:]  # "\#name" and "\!name" match literally
+    dir_only = line.endswith("/")
+    line = line.rstrip("/")
+    if not line:
+        return None
+    return re.compile(_translate(line) + r"\Z"), negated, dir_only
+
+
+class ExcludeRules:
+    """Compiled exclude patterns for one scan root.
+
+    Parameters
+    ----------
+    root: Path
+        Scan root; anchored patterns are relative to it.
+    patterns: Sequence[str], optional
+        gitignore-style patterns; later patterns win over earlier ones.
+    one_file_system: bool, optional
+        Do not descend into directories on another device than ``root``.
+    max_depth: int, optional
+        Directory levels to list, ``root`` being level 1. 0 means unlimited.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        patterns: Sequence[str] = (),
+        one_file_system: bool = False,
+        max_depth: int = 0,
+    ) -> None:
+        self.root = str(root).rstrip(os.sep) or os.sep
+        self.patterns = [str(pattern) for pattern in patterns]
+        self.one_file_system = bool(one_file_system)
+        self.max_depth = max(int(max_depth), 0)
+        self._prefix_len = len(self.root.rstrip(os.sep)) + 1
+        self._rules: List[_Rule] = [
+            rule for rule in map(_compile, self.patterns) if rule is not None
+        ]
+        self._root_dev: Optional[int] = None
+        if self.one_file_system:
+            try:
+                self._root_dev = os.stat(self.root).st_dev
+            except OSError:
+                pass
+
+    @classmethod
+    def for_root(
+        cls,
+        root: Path,
+        extra: Sequence[str] = (),
+        one_file_system: bool = False,
+        max_depth: int = 0,
+    ) -> "ExcludeRules":
+        """Combine ``root/.cleanignore`` with ``extra`` patterns (extra win)."""
+        try:
+            lines = (
+                (Path(root) / IGNORE_FILE_NAME)
+                .read_text(encoding="utf-8", errors="replace")
+                .splitlines()
+            )
+        except OSError:
+            lines = []
+        else:
+            # the ignore file itself is configuration, never a cleanup candidate
+            lines.insert(0, f"/{IGNORE_FILE_NAME}")
+        return cls(root, [*lines, *extra], one_file_system, max_depth)
+
+    @property
+    def filters_files(self) -> bool:
+        """True when any pattern may exclude files (not only the trash dir)."""
+        return bool(self._rules)
+
+    def signature(self) -> str:
+        """Stable text form of the effective rules, for cache keys."""
+        lines = [pattern.strip() for pattern in self.patterns if pattern.strip()]
+        # comment lines, so they can never clash with a real pattern
+        if self.one_file_system:
+            lines.append("#:one_file_system")
+        if self.max_depth:
+            lines.append(f"#:max_depth={self.max_depth}")
+        return "\n".join(lines)
+
+    def _relative(self, path: str) -> str:
+        rel = path[self._prefix_len :]
+        return rel.replace(os.sep, "/") if os.sep != "/" else rel
+
+    def depth(self, dirpath: str) -> int:
+        """Return the level of directory ``dirpath``; ``root`` is level 1."""
+        if dirpath == self.root:
+            return 1
+        return 2 + self._relative(dirpath).count("/")
+
+    def descends(self, dirpath: str) -> bool:
+        """Return True if the subdirectories of ``dirpath`` are within reach."""
+        return not self.max_depth or self.depth(dirpath) < self.max_depth
+
+    def crosses_device(self, entry: os.DirEntry) -> bool:
+        """Return True if directory ``entry`` lies on another file system.
+
+        Costs one ``lstat`` per directory, only with ``one_file_system``.
+        Raises ``OSError`` like ``entry.stat()``.
+        """
+        if self._root_dev is None:
+            return False
+        return entry.stat(follow_symlinks=False).st_dev != self._root_dev
+
+    def excludes(self, path: str, is_dir: bool) -> bool:
+        """Return True if the entry at ``path`` (below root) is excluded.
+
+        Only the entry itself is checked; traversal never reaches children of
+        an excluded directory, see `excludes_tree()` for collected paths.
+        """
+        if is_dir and os.path.basename(path) == TRASH_DIR_NAME:
+            return True
+        if not self._rules:
+            return False
+        rel = self._relative(path)
+        for regex, negated, dir_only in reversed(self._rules):
+            if dir_only and not is_dir:
+                continue
+            if regex.match(rel):
+                return not negated
+        return False
+
+    def excludes_tree(self, path: str, dev: Optional[int] = None) -> bool:
+        """Like `excludes()` for a file, but also checks every parent below root.
+
+        For paths collected without pruning (live mode), the depth limit and,
+        given the file's ``dev``, the file system limit are checked as well.
+        """
+        if self.max_depth and self.depth(os.path.dirname(path)) > self.max_depth:
+            return True
+        if dev is not None and self._root_dev is not None and dev != self._root_dev:
+            return True
+        rel = self._relative(path)
+        parts = rel.split("/")
+        current = self.root
+        for part in parts[:-1]:
+            current = os.path.join(current, part)
+            if self.excludes(current, True):
+                return True
+        return self.excludes(path, False)
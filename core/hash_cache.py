@@ -0,0 +1,135 @@
+"""
+core.hash_cache – dauerhafter Zwischenspeicher für Datei-Prüfsummen.
+
+Der Duplikatmodus ``safe`` liest jede Kandidatendatei komplett, um ihre
+Prüfsumme zu bilden. Bei großen Videos kostet das bei jedem Lauf viele
+Gigabyte Lesezugriff. Dieser Cache merkt sich die Prüfsumme pro
+``(st_dev, st_ino, size, mtime_ns)`` in einer kleinen SQLite-Datenbank im
+Ordner ``data``. Ändert sich Größe oder mtime, ist der Eintrag automatisch
+ungültig. Die Anzahl der Einträge ist begrenzt; bei Überlauf werden die am
+längsten nicht genutzten Einträge entfernt (LRU).
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional
+
+CACHE_PATH: Path = (
+    Path(__file__).resolve().parent.parent / "data" / "hash_cache.sqlite3"
+)
+DEFAULT_MAX_ENTRIES = 200_000
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS hashes (
+    dev INTEGER NOT NULL,
+    ino INTEGER NOT NULL,
+    kind TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    digest TEXT NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (dev, ino, kind)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS hashes_last_used ON hashes (last_used);
+"""
+
+
+class HashCache:
+    """Inode-keyed digest cache with LRU eviction.
+
+    Parameters
+    ----------
+    path: Path, optional
+        Database file. Defaults to ``data/hash_cache.sqlite3``.
+    max_entries: int, optional
+        Upper bound for stored digests; older entries are evicted on `flush()`.
+    """
+
+    def __init__(
+        self, path: Optional[Path] = None, max_entries: int = DEFAULT_MAX_ENTRIES
+    ) -> None:
+        self.path = path or CACHE_PATH
+        self.max_entries = max(int(max_entries), 1)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        """Write pending changes and close the database."""
+        self.flush()
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self) -> "HashCache":
+        return self
+
+    def __exit__(self, *_exc: object) -> None:
+        self.close()
+
+    def get(self, stat: os.stat_result, kind: str) -> Optional[str]:
+        """Return the cached digest for a file state, or None.
+
+        A stored entry whose size or mtime differs from ``stat`` belongs to an
+        older version of the file and is dropped.
+        """
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT size, mtime_ns, digest FROM hashes "
+                "WHERE dev = ? AND ino = ? AND kind = ?",
+                (stat.st_dev, stat.st_ino, kind),
+            ).fetchone()
+            if row is None:
+                return None
+            if row[0] != stat.st_size or row[1] != stat.st_mtime_ns:
+                self._conn.execute(
+                    "DELETE FROM hashes WHERE dev = ? AND ino = ? AND kind = ?",
+                    (stat.st_dev, stat.st_ino, kind),
+                )
+                return None
+            self._conn.execute(
+                "UPDATE hashes SET last_used = ? "
+                "WHERE dev = ? AND ino = ? AND kind = ?",
+                (time.time(), stat.st_dev, stat.st_ino, kind),
+            )
+            return str(row[2])
+
+    def put(self, stat: os.stat_result, kind: str, digest: str) -> None:
+        """Store the digest for a file state (``stat`` taken before hashing)."""
+        if not digest:
+            return
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO hashes "
+                "(dev, ino, kind, size, mtime_ns, digest, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    stat.st_dev,
+                    stat.st_ino,
+                    kind,
+                    stat.st_size,
+                    stat.st_mtime_ns,
+                    digest,
+                    time.time(),
+                ),
+            )
+
+    def flush(self) -> None:
+        """Commit pending changes and evict least recently used entries."""
+        with self._lock:
+            count = self._conn.execute("SELECT COUNT(*) FROM hashes").fetchone()[0]
+            overflow = count - self.max_entries
+            if overflow > 0:
+                self._conn.execute(
+                    "DELETE FROM hashes WHERE (dev, ino, kind) IN ("
+                    "SELECT dev, ino, kind FROM hashes ORDER BY last_used LIMIT ?)",
+                    (overflow,),
+                )
+            self._conn.commit()
@@ -0,0 +1,418 @@
+"""
+core.image_similarity – ähnliche Bilder finden (Duplikatmodus ``similar_images``).
+
+Neu kodierte, verkleinerte oder leicht beschnittene Kopien eines Fotos haben
+andere Bytes als das Original; die Prüfsummen-Modi finden sie nicht. Hier
+bekommt jedes Bild einen 64-Bit-Wahrnehmungs-Hash: ``phash`` (Kosinus-
+Transformation eines 32×32-Graustufenbilds, robust gegen Neukodierung und
+Größenänderung) oder ``dhash`` (Helligkeitsverlauf eines 9×8-Bilds,
+schneller). Zwei Bilder gelten als ähnlich, wenn sich ihre Hashes in höchstens
+``max_distance`` Bits unterscheiden; Gruppen entstehen transitiv.
+
+Für große Sammlungen (100 000 Bilder und mehr):
+
+* JPEGs werden über ``Image.draft()`` gleich verkleinert dekodiert.
+* Das Hashen läuft in einem Prozess-Pool (Dekodieren hält den GIL). Die
+  Worker starten über ``forkserver`` (Windows: ``spawn``), nie per ``fork``:
+  Ein Fork der GUI mitten in laufenden Threads kann im Kind an Sperren
+  hängen bleiben, die ein anderer Thread gerade hielt.
+* Hashes landen im ``HashCache`` (Schlüssel Gerät, Inode, Größe, mtime);
+  unveränderte Bilder werden beim nächsten Lauf nicht mehr geöffnet.
+* Die Suche nach nahen Hashes nutzt Multi-Index-Hashing statt jedes Paar zu
+  vergleichen: Der Hash wird in 4 Blöcke à 16 Bit geteilt. Liegen zwei Hashes
+  höchstens ``r`` Bits auseinander, stimmt mindestens ein Block bis auf
+  ``r // 4`` Bits überein; nur Bilder aus diesen Tabellen-Fächern werden
+  verglichen.
+
+Pillow ist optional: Ohne Pillow liefert ``similar_image_groups()`` keine
+Gruppen und ``PIL_AVAILABLE`` ist False.
+"""
+
+from __future__ import annotations
+
+import itertools
+import math
+import multiprocessing
+import operator
+import os
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import TYPE_CHECKING, Dict, List, Optional, Sequence, Set, Tuple
+
+from .progress import ProgressToken, ScanCancelled
+from .validation import require_choice, require_non_negative_number
+
+try:  # optional, needed to decode images
+    from PIL import Image
+except ImportError:  # pragma: no cover - depends on the environment
+    Image = None
+
+if TYPE_CHECKING:
+    from .hash_cache import HashCache
+    from .scanner import ScanResult
+
+PIL_AVAILABLE = Image is not None
+
+IMAGE_HASH_ALGORITHMS = ("phash", "dhash")
+DEFAULT_IMAGE_HASH = "phash"
+# Bits (of 64) two hashes may differ in; 8 catches re-encoded and resized copies
+DEFAULT_MAX_DISTANCE = 8
+HASH_BITS = 64
+
+# Images per task sent to a worker process; amortizes pickling overhead
+BATCH_SIZE = 32
+
+# Never fork: the calling process (GUI, web API) runs other threads
+POOL_CONTEXT = multiprocessing.get_context(
+    "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+)
+
+_DCT_SIZE = 32
+_DCT_LOW = 8
+# _DCT_COS[k][n] = cos(pi * (2n + 1) * k / 64): the 8 lowest DCT-II frequencies
+_DCT_COS = [
+    [math.cos(math.pi * (2 * n + 1) * k / (2 * _DCT_SIZE)) for n in range(_DCT_SIZE)]
+    for k in range(_DCT_LOW)
+]
+
+
+def _bits_to_int(bits: Sequence[bool]) -> int:
+    value = 0
+    for bit in bits:
+        value = (value << 1) | bool(bit)
+    return value
+
+
+def _popcount(value: int) -> int:
+    return bin(value).count("1")
+
+
+# int.bit_count() (Python 3.10+) is several times faster than counting in bin()
+_popcount = getattr(int, "bit_count", _popcount)
+
+
+def hamming(a: int, b: int) -> int:
+    """Return the number of differing bits of two hashes."""
+    return _popcount(a ^ b)
+
+
+def _grayscale(img: "Image.Image", size: Tuple[int, int]) -> List[int]:
+    # JPEG: let the decoder scale down by up to 8x before converting
+    img.draft("L", (size[0] * 2, size[1] * 2))
+    small = img.convert("L").resize(size, Image.Resampling.BILINEAR)
+    return list(small.getdata())
+
+
+def _dhash(img: "Image.Image") -> int:
+    pixels = _grayscale(img, (9, 8))
+    return _bits_to_int(
+        pixels[row * 9 + col] < pixels[row * 9 + col + 1]
+        for row in range(8)
+        for col in range(8)
+    )
+
+
+def _phash(img: "Image.Image") -> int:
+    pixels = _grayscale(img, (_DCT_SIZE, _DCT_SIZE))
+    rows = [pixels[r * _DCT_SIZE : (r + 1) * _DCT_SIZE] for r in range(_DCT_SIZE)]
+    # separable DCT, only the 8x8 low-frequency block is computed
+    row_coeffs = [
+        [sum(map(operator.mul, row, cos)) for cos in _DCT_COS] for row in rows
+    ]
+    columns = list(zip(*row_coeffs))
+    low = [
+        sum(map(operator.mul, cos, columns[v]))
+        for cos in _DCT_COS
+        for v in range(_DCT_LOW)
+    ]
+    median = sorted(low)[len(low) // 2]
+    return _bits_to_int(value > median for value in low)
+
+
+def image_hash(path: str, algorithm: str = DEFAULT_IMAGE_HASH) -> Optional[int]:
+    """Return the 64-bit perceptual hash of the image at ``path``.
+
+    Returns None if Pillow is missing or the file cannot be decoded.
+    """
+    if Image is None:
+        return None
+    try:
+        with Image.open(path) as img:
+            return _phash(img) if algorithm == "phash" else _dhash(img)
+    except Exception:
+        return None
+
+
+def _hash_batch(paths: Sequence[str], algorithm: str) -> List[Optional[int]]:
+    """Worker entry point: hash several images in one task."""
+    return [image_hash(path, algorithm) for path in paths]
+
+
+def _block_widths(blocks: int) -> List[int]:
+    base, extra = divmod(HASH_BITS, blocks)
+    return [base + 1 if block < extra else base for block in range(blocks)]
+
+
+def _lookup_cost(max_distance: int, blocks: int, expected: int) -> float:
+    """Estimated work per query: table probes plus compared candidates."""
+    cost = 0.0
+    for width in _block_widths(blocks):
+        probes = sum(
+            math.comb(width, k) for k in range(min(max_distance // blocks, width) + 1)
+        )
+        cost += probes * (1 + expected / 2**width)
+    return cost
+
+
+class HammingIndex:
+    """Multi-index lookup of 64-bit hashes within a Hamming radius.
+
+    Each hash is split into ``blocks`` parts, each with its own table. A
+    query only compares against hashes sharing one part up to
+    ``max_distance // blocks`` flipped bits, which by the pigeonhole
+    principle includes every hash within ``max_distance``.
+
+    Parameters
+    ----------
+    max_distance: int
+        Largest Hamming distance reported by `near()`.
+    expected: int, optional
+        Expected number of stored hashes; picks the number of blocks with
+        the fewest probes and comparisons per query.
+    blocks: int, optional
+        Fixed number of blocks instead of the automatic choice.
+    """
+
+    def __init__(
+        self, max_distance: int, expected: int = 0, blocks: Optional[int] = None
+    ) -> None:
+        self.max_distance = int(
+            require_non_negative_number(max_distance, "max_distance")
+        )
+        if blocks is None:
+            blocks = min(
+                range(1, min(self.max_distance + 1, HASH_BITS) + 1),
+                key=lambda m: _lookup_cost(self.max_distance, m, expected),
+            )
+        self.blocks = min(max(int(blocks), 1), HASH_BITS)
+        self._layout: List[Tuple[int, int, List[int]]] = []
+        shift = 0
+        for width in _block_widths(self.blocks):
+            radius = min(self.max_distance // self.blocks, width)
+            # XOR masks with up to ``radius`` bits set inside this block
+            flips = [
+                sum(1 << bit for bit in combo)
+                for count in range(radius + 1)
+                for combo in itertools.combinations(range(width), count)
+            ]
+            self._layout.append((shift, (1 << width) - 1, flips))
+            shift += width
+        self._tables: List[Dict[int, List[int]]] = [{} for _ in range(self.blocks)]
+        self.values: List[int] = []
+
+    def add(self, value: int) -> int:
+        """Store ``value`` and return its position in `values`."""
+        position = len(self.values)
+        self.values.append(value)
+        for table, (shift, mask, _flips) in zip(self._tables, self._layout):
+            table.setdefault((value >> shift) & mask, []).append(position)
+        return position
+
+    def candidates(self, value: int) -> Set[int]:
+        """Return the positions sharing one block within the block radius."""
+        found: Set[int] = set()
+        for table, (shift, mask, flips) in zip(self._tables, self._layout):
+            part = (value >> shift) & mask
+            # probe and merge in C: map/filter/chain instead of a Python loop
+            keys = [part ^ flip for flip in flips]
+            found.update(
+                itertools.chain.from_iterable(filter(None, map(table.get, keys)))
+            )
+        return found
+
+    def near(self, value: int, after: int = -1) -> List[Tuple[int, int]]:
+        """Return ``(position, distance)`` of every stored hash within reach.
+
+        Only positions greater than ``after`` are compared, so a caller
+        walking all stored hashes can look at each pair once.
+        """
+        values = self.values
+        limit = self.max_distance
+        popcount = _popcount
+        return [
+            (position, distance)
+            for position in self.candidates(value)
+            if position > after
+            and (distance := popcount(value ^ values[position])) <= limit
+        ]
+
+
+def _find(parents: List[int], node: int) -> int:
+    while parents[node] != node:
+        parents[node] = parents[parents[node]]
+        node = parents[node]
+    return node
+
+
+def cluster_hashes(hashes: Sequence[int], max_distance: int) -> List[List[int]]:
+    """Group positions of ``hashes`` whose chains stay within ``max_distance``.
+
+    Equal hashes are looked up once. Returns only groups with 2+ members,
+    each sorted, in order of their first member.
+    """
+    by_value: Dict[int, List[int]] = {}
+    for position, value in enumerate(hashes):
+        by_value.setdefault(value, []).append(position)
+    index = HammingIndex(max_distance, expected=len(by_value))
+    for value in by_value:
+        index.add(value)
+    parents = list(range(len(index.values)))
+    for position, value in enumerate(index.values):
+        for other, _distance in index.near(value, after=position):
+            root_a, root_b = _find(parents, position), _find(parents, other)
+            if root_a != root_b:
+                parents[max(root_a, root_b)] = min(root_a, root_b)
+    clusters: Dict[int, List[int]] = {}
+    for position, value in enumerate(index.values):
+        clusters.setdefault(_find(parents, position), []).extend(by_value[value])
+    groups = [sorted(members) for members in clusters.values() if len(members) > 1]
+    groups.sort(key=lambda members: members[0])
+    return groups
+
+
+def _hash_kind(algorithm: str) -> str:
+    return f"{algorithm}64"
+
+
+def _compute_hashes(
+    paths: Sequence[str],
+    algorithm: str,
+    workers: int,
+    sizes: Sequence[int],
+    progress: Optional[ProgressToken],
+) -> List[Optional[int]]:
+    """Hash ``paths`` in batches, in worker processes when ``workers > 1``."""
+    batches = [
+        range(start, min(start + BATCH_SIZE, len(paths)))
+        for start in range(0, len(paths), BATCH_SIZE)
+    ]
+    out: List[Optional[int]] = [None] * len(paths)
+    if workers <= 1 or len(batches) < 2:
+        for batch in batches:
+            for i in batch:
+                if progress is not None:
+                    progress.check()
+                out[i] = image_hash(paths[i], algorithm)
+                if progress is not None:
+                    progress.hashed(sizes[i])
+        return out
+    with ProcessPoolExecutor(max_workers=workers, mp_context=POOL_CONTEXT) as pool:
+        futures = {
+            pool.submit(_hash_batch, [paths[i] for i in batch], algorithm): batch
+            for batch in batches
+        }
+        try:
+            running = set(futures)
+            while running:
+                done, running = wait(
+                    running,
+                    timeout=progress.interval if progress is not None else None,
+                    return_when=FIRST_COMPLETED,
+                )
+                for future in done:
+                    batch = futures[future]
+                    for i, value in zip(batch, future.result()):
+                        out[i] = value
+                    if progress is not None:
+                        progress.hashed(sum(sizes[i] for i in batch))
+                if progress is not None:
+                    progress.report()
+                    progress.check()
+        except ScanCancelled:
+            for future in futures:
+                future.cancel()
+            raise
+    return out
+
+
+def similar_image_groups(
+    files: Sequence["ScanResult"],
+    hash_cache: Optional["HashCache"] = None,
+    workers: int = 1,
+    algorithm: str = DEFAULT_IMAGE_HASH,
+    max_distance: int = DEFAULT_MAX_DISTANCE,
+    progress: Optional[ProgressToken] = None,
+) -> List[List["ScanResult"]]:
+    """Group visually similar images among ``files``.
+
+    Only files of type ``images`` are looked at; each inode is hashed once.
+    Unreadable images are left out. Without Pillow the result is empty.
+
+    Parameters
+    ----------
+    files: Sequence[ScanResult]
+        Scan results; other file types are ignored.
+    hash_cache: HashCache, optional
+        Stores the hashes per inode and mtime.
+    workers: int, optional
+        Worker processes for decoding; 1 hashes in this process.
+    algorithm: str, optional
+        'phash' (default) or 'dhash'.
+    max_distance: int, optional
+        Largest number of differing hash bits within a group.
+    progress: ProgressToken, optional
+        Counts decoded image bytes; checked for cancellation between images
+        (between batches with worker processes).
+
+    Returns
+    -------
+    List[List[ScanResult]]
+        Groups with two or more files; hardlinks of one inode stay together.
+    """
+    algorithm = require_choice(algorithm, list(IMAGE_HASH_ALGORITHMS), "algorithm")
+    max_distance = int(require_non_negative_number(max_distance, "max_distance"))
+    if Image is None:
+        return []
+    kind = _hash_kind(algorithm)
+    by_inode: Dict[Tuple[int, int], List["ScanResult"]] = {}
+    for f in files:
+        if f.file_type == "images" and f.size > 0:
+            by_inode.setdefault(f.inode_key(), []).append(f)
+    representatives = [members[0] for members in by_inode.values()]
+    if progress is not None:
+        progress.plan_hashing(sum(f.size for f in representatives))
+    hashes: List[Optional[int]] = [None] * len(representatives)
+    stats: Dict[int, os.stat_result] = {}
+    missing: List[int] = []
+    for i, f in enumerate(representatives):
+        if hash_cache is not None:
+            try:
+                stats[i] = os.stat(f.path)
+            except OSError:
+                continue
+            cached = hash_cache.get(stats[i], kind)
+            if cached is not None:
+                hashes[i] = int(cached, 16)
+                if progress is not None:
+                    progress.skip_hash(f.size)
+                continue
+        missing.append(i)
+    computed = _compute_hashes(
+        [str(representatives[i].path) for i in missing],
+        algorithm,
+        max(int(workers), 1),
+        [representatives[i].size for i in missing],
+        progress,
+    )
+    for i, value in zip(missing, computed):
+        hashes[i] = value
+        if value is not None and hash_cache is not None and i in stats:
+            hash_cache.put(stats[i], kind, f"{value:016x}")
+    known = [i for i, value in enumerate(hashes) if value is not None]
+    return [
+        [
+            f
+            for position in cluster
+            for f in by_inode[representatives[known[position]].inode_key()]
+        ]
+        for cluster in cluster_hashes([hashes[i] for i in known], max_distance)
+    ]
@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from dataclasses import dataclass, field
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, List, Optional, Tuple
 
 from .scanner import ScanResult
 from .validation import (require_condition, require_existing_dir,
@@ -25,10 +25,25 @@ class ActionPlan:
     items: List[PlanItem] = field(default_factory=list)
 
     def summary(self) -> Tuple[int, int]:
-        """Return a tuple (count, total_bytes) for the plan."""
+        """Return a tuple (count, total_bytes) for the plan.
+
+        ``total_bytes`` is the space that can be reclaimed: hardlinked files
+        count once per inode, and only when every link of that inode is part
+        of the plan (otherwise the data stays reachable and nothing is freed).
+        """
         count = len(self.items)
+        inodes: Dict[Tuple[int, int], List[int]] = {}
+        for item in self.items:
+            try:
+                stat = item.src.stat()
+            except OSError:
+                continue
+            entry = inodes.setdefault((stat.st_dev, stat.st_ino), [0, 0, 0])
+            entry[0] += 1
+            entry[1] = stat.st_nlink
+            entry[2] = stat.st_size
         total_bytes = sum(
-            item.src.stat().st_size for item in self.items if item.src.exists()
+            size for links, nlink, size in inodes.values() if links >= nlink
         )
         return count, total_bytes
 
@@ -38,6 +53,9 @@ def build_plan(
     duplicate_groups: Dict[int, List[ScanResult]],
     root: Path,
     trash_dir: Path,
+    extracted_archives: Optional[Dict[Path, Path]] = None,
+    stored_elsewhere: Optional[Dict[Path, List[Path]]] = None,
+    similar_images: Optional[Dict[int, List[ScanResult]]] = None,
 ) -> ActionPlan:
     """Create an action plan based on scan results and duplicate groups.
 
@@ -51,11 +69,22 @@ def build_plan(
         The root directory of the scan. Used to compute relative paths.
     trash_dir: Path
         Directory where files will be moved.
+    extracted_archives: Dict[Path, Path], optional
+        Archives whose contents already lie extracted next to them, as
+        returned by `archives.find_extracted_archives()`.
+    stored_elsewhere: Dict[Path, List[Path]], optional
+        Files whose content already lies in another folder, as returned by
+        `content_index.ContentIndex.lookup()`.
+    similar_images: Dict[int, List[ScanResult]], optional
+        Groups from `detect_duplicates(mode="similar_images")`. They are not
+        byte-identical, so no member is kept automatically; members among
+        ``files`` (i.e. chosen by the user) get the reason similar_image.
 
     Returns
     -------
     ActionPlan
-        A plan containing all file moves and reasons (duplicate or filtered).
+        A plan containing all file moves and reasons (duplicate,
+        similar_image, archive_extracted, stored_elsewhere or filtered).
     """
     validated_files = require_sequence_of_type(files, ScanResult, "files")
     validated_root = require_existing_dir(root, "root")
@@ -67,6 +96,11 @@ def build_plan(
         )
 
     plan = ActionPlan()
+    similar_set = {
+        file_entry.path
+        for group in (similar_images or {}).values()
+        for file_entry in group
+    }
     duplicates_set = set()
     for group in duplicate_groups.values():
         if not group:
@@ -77,7 +111,16 @@ def build_plan(
                 duplicates_set.add(file_entry.path)
 
     for file_entry in validated_files:
-        reason = "duplicate" if file_entry.path in duplicates_set else "filtered"
+        if file_entry.path in duplicates_set:
+            reason = "duplicate"
+        elif file_entry.path in similar_set:
+            reason = "similar_image"
+        elif extracted_archives and file_entry.path in extracted_archives:
+            reason = "archive_extracted"
+        elif stored_elsewhere and file_entry.path in stored_elsewhere:
+            reason = "stored_elsewhere"
+        else:
+            reason = "filtered"
         src = file_entry.path
         try:
             rel = src.relative_to(validated_root)
@@ -0,0 +1,173 @@
+"""
+core.progress – Fortschritt melden und lange Läufe abbrechen.
+
+``ProgressToken`` wird an ``scan_directory()`` und ``detect_duplicates()``
+übergeben. Scanner und Hashing zählen darüber gelesene Ordner, gefundene
+Dateien und gehashte Bytes; die GUI bekommt daraus regelmäßig einen
+``ProgressSnapshot`` mit Dateien/s, Bytes/s, offenen Ordnern und einer
+Restzeit-Schätzung.
+
+Abbrechen: ``cancel()`` darf aus jedem Thread aufgerufen werden. Der Scan
+prüft das vor jedem Ordner, das Hashing vor jedem gelesenen Block; danach
+wird ``ScanCancelled`` ausgelöst. Der Rückruf (``callback``) läuft immer im
+Thread, der das Token angelegt hat (bei der GUI also im Qt-Hauptthread),
+auch wenn Scan oder Hashing mit mehreren Threads arbeiten.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Optional
+
+SCAN_PHASE = "scan"
+HASH_PHASE = "hash"
+
+
+class ScanCancelled(Exception):
+    """Raised inside a scan or duplicate search after `ProgressToken.cancel()`."""
+
+
+@dataclass
+class ProgressSnapshot:
+    """Consistent copy of the counters of a `ProgressToken`."""
+
+    phase: str
+    files: int
+    directories: int
+    dirs_pending: int
+    bytes_hashed: int
+    bytes_to_hash: int
+    elapsed: float
+    files_per_second: float
+    bytes_hashed_per_second: float
+    eta_seconds: Optional[float]
+
+
+class ProgressToken:
+    """Thread-safe progress counters with a cancel flag.
+
+    Parameters
+    ----------
+    callback: callable, optional
+        Receives a `ProgressSnapshot` at most every ``interval`` seconds,
+        only in the thread that created the token.
+    interval: float, optional
+        Minimum seconds between two callback calls.
+    """
+
+    def __init__(
+        self,
+        callback: Optional[Callable[[ProgressSnapshot], None]] = None,
+        interval: float = 0.2,
+    ) -> None:
+        self.callback = callback
+        self.interval = max(float(interval), 0.0)
+        self._lock = threading.Lock()
+        self._cancelled = threading.Event()
+        self._owner = threading.get_ident()
+        self._started = time.monotonic()
+        self._hash_started: Optional[float] = None
+        self._last_report = 0.0
+        self.phase = SCAN_PHASE
+        self.files = 0
+        self.directories = 0
+        self.dirs_pending = 0
+        self.bytes_hashed = 0
+        self.bytes_to_hash = 0
+
+    # ----- cancellation -----------------------------------------------------
+
+    def cancel(self) -> None:
+        """Ask the running scan or duplicate search to stop."""
+        self._cancelled.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def check(self) -> None:
+        """Raise `ScanCancelled` if `cancel()` was called."""
+        if self._cancelled.is_set():
+            raise ScanCancelled("Vorgang abgebrochen.")
+
+    # ----- counters ---------------------------------------------------------
+
+    def directory_done(self, files: int, pending: int) -> None:
+        """Count one listed directory with ``files`` hits; ``pending`` are queued."""
+        with self._lock:
+            self.directories += 1
+            self.files += files
+            self.dirs_pending = pending
+        self.report()
+        self.check()
+
+    def plan_hashing(self, total_bytes: int) -> None:
+        """Announce ``total_bytes`` more bytes that are about to be hashed."""
+        with self._lock:
+            if self.phase != HASH_PHASE:
+                self.phase = HASH_PHASE
+                self.dirs_pending = 0
+                self._hash_started = time.monotonic()
+            self.bytes_to_hash += max(int(total_bytes), 0)
+        self.report(force=True)
+
+    def skip_hash(self, count: int) -> None:
+        """Take ``count`` planned bytes back, e.g. for a hash cache hit."""
+        with self._lock:
+            self.bytes_to_hash = max(self.bytes_to_hash - count, self.bytes_hashed)
+
+    def hashed(self, count: int) -> None:
+        """Count ``count`` bytes just fed into a hash; raise when cancelled."""
+        with self._lock:
+            self.bytes_hashed += count
+        self.report()
+        self.check()
+
+    # ----- reporting --------------------------------------------------------
+
+    def snapshot(self) -> ProgressSnapshot:
+        """Return the current counters with rates and a remaining-time estimate.
+
+        While hashing, the estimate is exact up to the read rate: the bytes
+        still to hash divided by the bytes hashed per second so far. While
+        scanning the total is unknown; the estimate assumes the pending
+        directories take as long as the ones already listed, so it grows
+        when deeper levels turn up.
+        """
+        now = time.monotonic()
+        with self._lock:
+            elapsed = now - self._started
+            hash_elapsed = now - self._hash_started if self._hash_started else 0.0
+            files_rate = self.files / elapsed if elapsed > 0 else 0.0
+            bytes_rate = self.bytes_hashed / hash_elapsed if hash_elapsed > 0 else 0.0
+            eta: Optional[float] = None
+            if self.phase == HASH_PHASE:
+                if bytes_rate > 0:
+                    remaining = max(self.bytes_to_hash - self.bytes_hashed, 0)
+                    eta = remaining / bytes_rate
+            elif self.directories and elapsed > 0:
+                eta = self.dirs_pending * elapsed / self.directories
+            return ProgressSnapshot(
+                phase=self.phase,
+                files=self.files,
+                directories=self.directories,
+                dirs_pending=self.dirs_pending,
+                bytes_hashed=self.bytes_hashed,
+                bytes_to_hash=self.bytes_to_hash,
+                elapsed=elapsed,
+                files_per_second=files_rate,
+                bytes_hashed_per_second=bytes_rate,
+                eta_seconds=eta,
+            )
+
+    def report(self, force: bool = False) -> None:
+        """Call the callback if due; a no-op outside the creating thread."""
+        if self.callback is None or threading.get_ident() != self._owner:
+            return
+        now = time.monotonic()
+        if not force and now - self._last_report < self.interval:
+            return
+        self._last_report = now
+        self.callback(self.snapshot())
@@ -0,0 +1,140 @@
+"""
+core.read_policy – schonend lesen beim Hashen.
+
+Beim Hashen wird jede Kandidaten-Datei einmal komplett gelesen. Ohne weitere
+Vorkehrungen landet dabei alles im Seiten-Cache des Betriebssystems und
+verdrängt Daten, die andere Programme gerade brauchen; außerdem schreibt
+jeder Lesezugriff eine neue Zugriffszeit (atime) zurück. Auf gemeinsam
+genutzten Servern bremst ein Duplikat-Scan so alle anderen Dienste.
+
+``ReadPolicy(gentle=True)`` liest deshalb „cache-schonend“:
+
+* Dateien werden mit ``O_NOATIME`` geöffnet, wenn das erlaubt ist (nur für
+  eigene Dateien oder mit ``CAP_FOWNER``); sonst ganz normal.
+* Ganze Dateien werden als sequenziell angekündigt
+  (``POSIX_FADV_SEQUENTIAL``, größeres Vorauslesen), Stichproben als
+  wahlfrei (``POSIX_FADV_RANDOM``, kein unnötiges Vorauslesen).
+* Bereits gehashte Bereiche werden sofort wieder aus dem Cache entlassen
+  (``POSIX_FADV_DONTNEED``). Das gilt auch für Seiten, die schon vorher im
+  Cache lagen.
+
+``max_bytes_per_second`` begrenzt zusätzlich die Lesebandbreite eines Laufs,
+über alle Hash-Threads zusammen. So kann eine Duplikatsuche auch während der
+Arbeitszeit laufen. Eine Policy gehört zu genau einem Lauf: Die Grenze gilt
+für alle Dateien, die mit ihr gelesen werden.
+
+Ohne ``posix_fadvise`` (Windows, macOS) bleibt nur die Bandbreitengrenze
+wirksam.
+"""
+
+from __future__ import annotations
+
+import errno
+import os
+import threading
+import time
+from pathlib import Path
+from typing import IO, Optional
+
+from .progress import ProgressToken
+from .validation import require_non_negative_number
+
+# Longest single sleep while throttled, so a cancel is noticed quickly
+_THROTTLE_SLICE = 0.1
+
+_NOATIME = getattr(os, "O_NOATIME", 0)
+_FADVISE = getattr(os, "posix_fadvise", None)
+
+
+class ReadPolicy:
+    """How the hashing code opens and reads files during one run.
+
+    Parameters
+    ----------
+    gentle: bool, optional
+        Read without updating atime and without filling the page cache
+        (see module docstring).
+    max_bytes_per_second: float, optional
+        Read bandwidth cap for the whole run, shared by all threads.
+        0 (default) reads at full speed.
+    """
+
+    def __init__(self, gentle: bool = False, max_bytes_per_second: float = 0) -> None:
+        self.gentle = bool(gentle)
+        self.max_bytes_per_second = float(
+            require_non_negative_number(max_bytes_per_second, "max_bytes_per_second")
+        )
+        self._lock = threading.Lock()
+        self._next_free = 0.0
+        self._noatime = self.gentle and bool(_NOATIME)
+
+    def _opener(self, path: str, flags: int) -> int:
+        if self._noatime:
+            try:
+                return os.open(path, flags | _NOATIME)
+            except PermissionError as exc:
+                # O_NOATIME needs ownership of the file or CAP_FOWNER
+                if exc.errno != errno.EPERM:
+                    raise
+        return os.open(path, flags)
+
+    def open(self, path: Path, sequential: bool = True) -> IO[bytes]:
+        """Open ``path`` for unbuffered binary reading.
+
+        ``sequential`` announces a read from start to end; ``False``
+        announces scattered reads (sampled hashes).
+        """
+        f = open(path, "rb", buffering=0, opener=self._opener)
+        if self.gentle and _FADVISE is not None:
+            advice = os.POSIX_FADV_SEQUENTIAL if sequential else os.POSIX_FADV_RANDOM
+            try:
+                _FADVISE(f.fileno(), 0, 0, advice)
+            except OSError:
+                pass
+        return f
+
+    def consumed(
+        self,
+        fd: int,
+        offset: int,
+        length: int,
+        progress: Optional[ProgressToken] = None,
+    ) -> None:
+        """Handle ``length`` bytes at ``offset`` that were just hashed.
+
+        Drops them from the page cache in gentle mode, then waits as long as
+        the bandwidth cap requires.
+        """
+        if self.gentle and _FADVISE is not None and length > 0:
+            try:
+                _FADVISE(fd, offset, length, os.POSIX_FADV_DONTNEED)
+            except OSError:
+                pass
+        self.throttle(length, progress)
+
+    def throttle(self, count: int, progress: Optional[ProgressToken] = None) -> None:
+        """Wait until ``count`` more bytes fit into the bandwidth cap.
+
+        Every call reserves the next free time slot, so concurrent threads
+        together never read faster than the cap. Raises `ScanCancelled`
+        while waiting once ``progress`` is cancelled.
+        """
+        if self.max_bytes_per_second <= 0 or count <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self._next_free = (
+                max(self._next_free, now) + count / self.max_bytes_per_second
+            )
+            until = self._next_free
+        while True:
+            remaining = until - time.monotonic()
+            if remaining <= 0:
+                return
+            if progress is not None:
+                progress.check()
+            time.sleep(min(remaining, _THROTTLE_SLICE))
+
+
+# Plain reads: no fadvise, no O_NOATIME, no cap
+DEFAULT_READ_POLICY = ReadPolicy()
@@ -0,0 +1,296 @@
+"""
+core.result_store – speichersparende Ablage vieler Scan-Ergebnisse.
+
+Eine Liste aus ``ScanResult``-Objekten kostet pro Datei mehrere hundert Byte
+(Objekt, ``Path`` mit Einzelteilen, Zahlen als eigene Objekte). Bei Millionen
+Dateien wächst die GUI so auf Gigabytes. ``ScanResultStore`` legt die Daten
+spaltenweise ab: Ordnerpfade und Geräte stehen einmal in einer Tabelle,
+Dateinamen in einem gemeinsamen Byte-Puffer, Größen, mtimes, Typen und
+Inodes in kompakten ``array``-Spalten. Der Ordner wird nur pro Lauf
+aufeinanderfolgender Zeilen gespeichert, Geräte-Nummern erst ab dem zweiten
+Gerät und Link-Zahlen nur für Dateien mit mehr als einem Link. ``ScanResult``-Objekte (samt
+``Path``) entstehen erst beim Zugriff, daher funktionieren
+``detect_duplicates()`` und ``build_plan()`` unverändert.
+
+Sortieren und Filtern (`sorted()`, `filter()`) kopieren keine Daten, sondern
+liefern Sichten mit einer eigenen Zeilenliste auf dieselben Spalten. Filtern
+läuft mit NumPy vektorisiert, falls installiert, sonst über die Arrays.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from array import array
+from bisect import bisect_right
+from collections.abc import Sequence
+from pathlib import Path
+from typing import (Any, Callable, Dict, Iterable, Iterator, List, Optional,
+                    Union, overload)
+
+from .scanner import ALL_TYPES, ScanResult
+from .validation import require_non_negative_number, require_sequence_of_type
+
+try:  # optional: vectorized filtering
+    import numpy
+except ImportError:  # pragma: no cover - depends on the environment
+    numpy = None
+
+_TYPE_CODES: Dict[str, int] = {name: code for code, name in enumerate(ALL_TYPES)}
+# Name offsets switch from 4 to 8 bytes once the name buffer outgrows this
+_MAX_NAME_END = 0xFFFF_FFFF
+
+
+class _Columns:
+    """Shared column data of a store and all views derived from it."""
+
+    def __init__(self) -> None:
+        self.dirs: List[str] = []
+        self.dir_ids: Dict[str, int] = {}
+        # scandir yields a directory at once, so rows form runs per directory
+        self.dir_starts = array("I")
+        self.dir_runs = array("I")
+        self.names = bytearray()
+        self.name_ends = array("I")
+        self.sizes = array("q")
+        self.mtimes = array("d")
+        self.types = array("B")
+        self.dev_table: List[int] = []
+        # created once a second device shows up; until then every row is 0
+        self.devs: Optional[array] = None
+        self.inodes = array("Q")
+        # most files have one link, so only the exceptions are kept
+        self.nlinks: Dict[int, int] = {}
+
+    def append(self, result: ScanResult) -> int:
+        row = len(self.sizes)
+        dirname, name = os.path.split(str(result.path))
+        dir_id = self.dir_ids.get(dirname)
+        if dir_id is None:
+            dir_id = self.dir_ids[dirname] = len(self.dirs)
+            self.dirs.append(dirname)
+        if not self.dir_runs or self.dir_runs[-1] != dir_id:
+            self.dir_starts.append(row)
+            self.dir_runs.append(dir_id)
+        self.names += os.fsencode(name)
+        if len(self.names) > _MAX_NAME_END and self.name_ends.typecode == "I":
+            self.name_ends = array("Q", self.name_ends)
+        self.name_ends.append(len(self.names))
+        self.sizes.append(result.size)
+        self.mtimes.append(result.mtime)
+        self.types.append(_TYPE_CODES.get(result.file_type, _TYPE_CODES["other"]))
+        dev_code = self._dev_code(result.dev)
+        if dev_code and self.devs is None:
+            self.devs = array("H", bytes(2 * row))
+        if self.devs is not None:
+            self.devs.append(dev_code)
+        self.inodes.append(result.inode)
+        if result.nlink != 1:
+            self.nlinks[row] = result.nlink
+        return row
+
+    def _dev_code(self, dev: int) -> int:
+        # a scan touches only a handful of devices, so st_dev is interned too
+        try:
+            return self.dev_table.index(dev)
+        except ValueError:
+            self.dev_table.append(dev)
+            return len(self.dev_table) - 1
+
+    def path_text(self, row: int) -> str:
+        start = self.name_ends[row - 1] if row else 0
+        name = os.fsdecode(bytes(self.names[start : self.name_ends[row]]))
+        dir_id = self.dir_runs[bisect_right(self.dir_starts, row) - 1]
+        return os.path.join(self.dirs[dir_id], name)
+
+    def result(self, row: int) -> ScanResult:
+        return ScanResult(
+            path=Path(self.path_text(row)),
+            size=self.sizes[row],
+            mtime=self.mtimes[row],
+            file_type=ALL_TYPES[self.types[row]],
+            dev=self.dev_table[self.devs[row] if self.devs is not None else 0],
+            inode=self.inodes[row],
+            nlink=self.nlinks.get(row, 1),
+        )
+
+
+class ScanResultStore(Sequence):
+    """Columnar container that reads like a list of results.
+
+    Items are materialized as new `ScanResult` objects on every access, so
+    identity checks (``is``) only hold within one materialized group.
+    ``duplicate_group`` is not stored; it is always None on read.
+    """
+
+    def __init__(self) -> None:
+        self._cols = _Columns()
+        # row numbers into the columns; None means all rows in insert order
+        self._rows: Optional[array] = None
+
+    @classmethod
+    def from_results(cls, results: Iterable[ScanResult]) -> "ScanResultStore":
+        """Build a store from any iterable; generators are consumed lazily."""
+        store = cls()
+        store.extend(results)
+        return store
+
+    def _view(self, rows: array) -> "ScanResultStore":
+        view = ScanResultStore()
+        view._cols = self._cols
+        view._rows = rows
+        return view
+
+    def _row(self, index: int) -> int:
+        return index if self._rows is None else self._rows[index]
+
+    # ----- writing ----------------------------------------------------------
+
+    def append(self, result: ScanResult) -> None:
+        """Add one result; its directory is interned."""
+        row = self._cols.append(result)
+        if self._rows is not None:
+            self._rows.append(row)
+
+    def extend(self, results: Iterable[ScanResult]) -> None:
+        for result in results:
+            self.append(result)
+
+    # ----- columns ----------------------------------------------------------
+
+    @property
+    def sizes(self) -> array:
+        """Size column in bytes, in the order of this store."""
+        return self._column(self._cols.sizes)
+
+    @property
+    def mtimes(self) -> array:
+        """mtime column in seconds since the epoch."""
+        return self._column(self._cols.mtimes)
+
+    @property
+    def type_codes(self) -> array:
+        """File type column as indexes into `scanner.ALL_TYPES`."""
+        return self._column(self._cols.types)
+
+    def _column(self, column: array) -> array:
+        if self._rows is None:
+            return column
+        return array(column.typecode, (column[row] for row in self._rows))
+
+    def path_text(self, index: int) -> str:
+        """Return the path of one entry as a string without building a Path."""
+        return self._cols.path_text(self._row(index))
+
+    # ----- sequence protocol ------------------------------------------------
+
+    def __len__(self) -> int:
+        if self._rows is None:
+            return len(self._cols.sizes)
+        return len(self._rows)
+
+    @overload
+    def __getitem__(self, index: int) -> ScanResult: ...
+
+    @overload
+    def __getitem__(self, index: slice) -> List[ScanResult]: ...
+
+    def __getitem__(
+        self, index: Union[int, slice]
+    ) -> Union[ScanResult, List[ScanResult]]:
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("ScanResultStore index out of range")
+        return self._cols.result(self._row(index))
+
+    def __iter__(self) -> Iterator[ScanResult]:
+        rows = range(len(self._cols.sizes)) if self._rows is None else self._rows
+        for row in rows:
+            yield self._cols.result(row)
+
+    # ----- views ------------------------------------------------------------
+
+    def sorted(self, key: Callable[[ScanResult], Any]) -> "ScanResultStore":
+        """Return a view ordered by ``key`` (stable, like `sorted()`).
+
+        Only the keys are held in memory at once, not the materialized items.
+        """
+        keys = [key(item) for item in self]
+        order = sorted(range(len(keys)), key=keys.__getitem__)
+        del keys
+        if all(index == position for position, index in enumerate(order)):
+            # already in order (e.g. a sequential walk): no row list needed
+            return self._view(self._rows)
+        return self.take(order)
+
+    def take(self, indexes: Iterable[int]) -> "ScanResultStore":
+        """Return a view with the entries at ``indexes``, in that order."""
+        return self._view(array("I", (self._row(index) for index in indexes)))
+
+    def filter(
+        self,
+        types: List[str],
+        size_threshold: int,
+        age_threshold: float,
+        now: Optional[float] = None,
+    ) -> "ScanResultStore":
+        """Return a view with the entries matching the scanner filters.
+
+        Same rules as `scanner.filter_results()`, evaluated on the columns
+        without materializing any item, so trying other thresholds on a kept
+        unfiltered scan needs no disk access.
+        """
+        validated_types = set(require_sequence_of_type(types, str, "types"))
+        min_size = int(require_non_negative_number(size_threshold, "size_threshold"))
+        min_age = require_non_negative_number(age_threshold, "age_threshold")
+        # "now - mtime >= min_age" rewritten as one cutoff for the whole column
+        cutoff = (time.time() if now is None else now) - min_age
+        codes = sorted(_TYPE_CODES[name] for name in validated_types & set(ALL_TYPES))
+        if numpy is not None:
+            rows = self._filter_numpy(codes, min_size, min_age, cutoff)
+        else:
+            rows = self._filter_plain(codes, min_size, min_age, cutoff)
+        return self._view(rows)
+
+    def _filter_numpy(
+        self, codes: List[int], min_size: int, min_age: float, cutoff: float
+    ) -> array:
+        cols = self._cols
+        out = array("I")
+        if not len(cols.sizes):
+            return out
+        mask = numpy.isin(numpy.frombuffer(cols.types, dtype=numpy.uint8), codes)
+        if min_size:
+            mask &= numpy.frombuffer(cols.sizes, dtype=numpy.int64) >= min_size
+        if min_age:
+            mask &= numpy.frombuffer(cols.mtimes, dtype=numpy.float64) <= cutoff
+        if self._rows is None:
+            matched = numpy.flatnonzero(mask)
+        elif len(self._rows):
+            rows = numpy.frombuffer(self._rows, dtype=numpy.uint32)
+            matched = rows[mask[rows]]
+        else:
+            return out
+        out.frombytes(matched.astype(numpy.uint32).tobytes())
+        return out
+
+    def _filter_plain(
+        self, codes: List[int], min_size: int, min_age: float, cutoff: float
+    ) -> array:
+        cols = self._cols
+        wanted = bytes(code in codes for code in range(len(ALL_TYPES)))
+        sizes, mtimes, types = cols.sizes, cols.mtimes, cols.types
+        rows: Iterable[int] = range(len(sizes)) if self._rows is None else self._rows
+        return array(
+            "I",
+            (
+                row
+                for row in rows
+                if wanted[types[row]]
+                and (not min_size or sizes[row] >= min_size)
+                and (not min_age or mtimes[row] <= cutoff)
+            ),
+        )
@@ -0,0 +1,264 @@
+"""
+core.scan_cursor – große Ordner in Etappen scannen.
+
+``scan_directory(..., time_budget=30)`` hört nach 30 Sekunden auf, neue
+Ordner zu lesen. Mit einem ``ScanCursor`` setzt der nächste Aufruf genau dort
+fort – auch nach einem Neustart des Programms oder nach einem Abbruch
+(``ScanCancelled``). Der Cursor speichert dafür in ``data/scan_cursor.sqlite3``
+die noch offenen Ordner (die Front des Durchlaufs) und die bisher gefundenen
+Treffer, regelmäßig während des Laufs und an seinem Ende.
+
+Jeder Aufruf liefert die Treffer aller bisher gelesenen Ordner. Ist kein
+Ordner mehr offen, ist der Scan vollständig (``done``) und der gespeicherte
+Stand wird gelöscht; der nächste Aufruf beginnt von vorn.
+
+Ein Cursor gehört zu genau einem Startordner und einer Filter-Kombination
+(Typen, Größe, Alter, Ausschluss-Muster). Änderungen in bereits gelesenen
+Ordnern während einer Pause bemerkt er nicht; ``reset()`` beginnt neu.
+"""
+
+from __future__ import annotations
+
+import os
+import sqlite3
+import time
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+from .excludes import ExcludeRules
+from .scan_index import filter_key
+from .scanner import ScanResult
+from .validation import require_existing_dir, require_sequence_of_type
+
+CURSOR_PATH: Path = (
+    Path(__file__).resolve().parent.parent / "data" / "scan_cursor.sqlite3"
+)
+
+# Seconds between two saves of the frontier and the new hits during a walk
+CHECKPOINT_SECONDS = 5.0
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS cursors (
+    root BLOB NOT NULL,
+    filter_key TEXT NOT NULL,
+    frontier BLOB NOT NULL,
+    PRIMARY KEY (root, filter_key)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS cursor_hits (
+    root BLOB NOT NULL,
+    filter_key TEXT NOT NULL,
+    path BLOB NOT NULL,
+    dev INTEGER NOT NULL,
+    ino INTEGER NOT NULL,
+    nlink INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime REAL NOT NULL,
+    file_type TEXT NOT NULL,
+    PRIMARY KEY (root, filter_key, path)
+) WITHOUT ROWID;
+"""
+
+
+def _filters_key(
+    root: Path,
+    types: Sequence[str],
+    size_threshold: int,
+    age_threshold: float,
+    exclude: Sequence[str],
+    one_file_system: bool,
+    max_depth: int,
+) -> str:
+    excludes = ExcludeRules.for_root(
+        root,
+        require_sequence_of_type(exclude, str, "exclude"),
+        one_file_system,
+        max_depth,
+    )
+    return filter_key(types, size_threshold, age_threshold, excludes.signature())
+
+
+class ScanCursor:
+    """Saved, resumable walk of one root with one set of filters.
+
+    Parameters
+    ----------
+    root: Path
+        Scan root.
+    types, size_threshold, age_threshold, exclude, one_file_system, max_depth:
+        The filters later passed to `scanner.scan_directory()`.
+    path: Path, optional
+        Database file. Defaults to ``data/scan_cursor.sqlite3``.
+    """
+
+    def __init__(
+        self,
+        root: Path,
+        types: Sequence[str],
+        size_threshold: int,
+        age_threshold: float,
+        exclude: Sequence[str] = (),
+        one_file_system: bool = False,
+        max_depth: int = 0,
+        path: Optional[Path] = None,
+    ) -> None:
+        self.root = require_existing_dir(root, "root")
+        self.key = _filters_key(
+            self.root,
+            types,
+            size_threshold,
+            age_threshold,
+            exclude,
+            one_file_system,
+            max_depth,
+        )
+        self.path = path or CURSOR_PATH
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path))
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(_SCHEMA)
+        self._root_key = os.fsencode(str(self.root))
+        self._new_hits: List[ScanResult] = []
+        self.done = False
+        self.frontier: Dict[str, None] = self._load_frontier()
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self._conn.close()
+
+    def __enter__(self) -> "ScanCursor":
+        return self
+
+    def __exit__(self, *_exc: object) -> None:
+        self.close()
+
+    def _load_frontier(self) -> Dict[str, None]:
+        row = self._conn.execute(
+            "SELECT frontier FROM cursors WHERE root = ? AND filter_key = ?",
+            (self._root_key, self.key),
+        ).fetchone()
+        if row is None:
+            return {str(self.root): None}
+        return dict.fromkeys(os.fsdecode(part) for part in row[0].split(b"\0") if part)
+
+    @property
+    def resumed(self) -> bool:
+        """True when a saved, unfinished walk was loaded."""
+        return self.frontier != {str(self.root): None}
+
+    def matches(
+        self,
+        root: Path,
+        types: Sequence[str],
+        size_threshold: int,
+        age_threshold: float,
+        exclude: Sequence[str] = (),
+        one_file_system: bool = False,
+        max_depth: int = 0,
+    ) -> bool:
+        """Return True if this cursor belongs to ``root`` and these filters."""
+        return str(root) == str(self.root) and self.key == _filters_key(
+            self.root,
+            types,
+            size_threshold,
+            age_threshold,
+            exclude,
+            one_file_system,
+            max_depth,
+        )
+
+    def stored_hits(self) -> List[ScanResult]:
+        """Return the hits saved by earlier calls."""
+        rows = self._conn.execute(
+            "SELECT path, dev, ino, nlink, size, mtime, file_type FROM cursor_hits "
+            "WHERE root = ? AND filter_key = ?",
+            (self._root_key, self.key),
+        )
+        return [
+            ScanResult(
+                path=Path(os.fsdecode(path_key)),
+                size=size,
+                mtime=mtime,
+                file_type=file_type,
+                dev=dev,
+                inode=ino,
+                nlink=nlink,
+            )
+            for path_key, dev, ino, nlink, size, mtime, file_type in rows
+        ]
+
+    def track(self, batches: Iterable[List[ScanResult]]) -> Iterator[ScanResult]:
+        """Yield the saved hits, then the hits of ``batches``, saving regularly.
+
+        ``batches`` must come from a walk over `frontier` (one list per
+        directory), so frontier and saved hits always match. The state is
+        also saved when the walk ends early, e.g. on cancel.
+        """
+        self.done = False
+        yield from self.stored_hits()
+        last_save = time.monotonic()
+        try:
+            for batch in batches:
+                self._new_hits.extend(batch)
+                yield from batch
+                if time.monotonic() - last_save >= CHECKPOINT_SECONDS:
+                    self.save()
+                    last_save = time.monotonic()
+        finally:
+            self.save()
+
+    def save(self) -> None:
+        """Write new hits and the frontier; a finished walk is deleted instead.
+
+        After a finished walk the frontier points at the root again, so the
+        next scan with this cursor starts a fresh walk.
+        """
+        if not self.frontier:
+            self.reset()
+            self.done = True
+            return
+        with self._conn:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO cursor_hits "
+                "(root, filter_key, path, dev, ino, nlink, size, mtime, file_type) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (
+                    (
+                        self._root_key,
+                        self.key,
+                        os.fsencode(str(item.path)),
+                        item.dev,
+                        item.inode,
+                        item.nlink,
+                        item.size,
+                        item.mtime,
+                        item.file_type,
+                    )
+                    for item in self._new_hits
+                ),
+            )
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cursors (root, filter_key, frontier) "
+                "VALUES (?, ?, ?)",
+                (
+                    self._root_key,
+                    self.key,
+                    b"\0".join(os.fsencode(path) for path in self.frontier),
+                ),
+            )
+        self._new_hits.clear()
+
+    def reset(self) -> None:
+        """Forget the saved walk; the next scan starts at the root again."""
+        self._delete()
+        self._new_hits.clear()
+        self.frontier = {str(self.root): None}
+        self.done = False
+
+    def _delete(self) -> None:
+        with self._conn:
+            for table in ("cursors", "cursor_hits"):
+                self._conn.execute(
+                    f"DELETE FROM {table} WHERE root = ? AND filter_key = ?",
+                    (self._root_key, self.key),
+                )
@@ -0,0 +1,575 @@
+"""
+core.scan_index – dauerhafter Dateiindex für schnelle Wiederholungs-Scans.
+
+Der Index liegt als SQLite-Datenbank im Ordner ``data`` und speichert pro
+Datei ``(dev, inode, size, mtime_ns, file_type)``. Ein erneuter Scan
+vergleicht die Dateisystem-Metadaten mit dem Index und schreibt nur Zeilen,
+die sich wirklich geändert haben. Filterabfragen (Typ, Größe, Alter) laufen
+danach direkt über den Index. Der Index enthält immer alle Dateien eines
+Ordners, unabhängig vom Filter, damit andere Filter ohne neuen Lauf
+beantwortet werden können.
+
+Zusätzlich merkt sich der Index die mtime jedes Ordners. Hat sich die mtime
+eines Ordners nicht geändert, wurde darin nichts angelegt, gelöscht oder
+umbenannt: der Ordner wird dann nicht neu gelistet, seine Einträge kommen aus
+dem Index. Unterordner werden trotzdem einzeln geprüft. Hinweis: Ändert sich
+nur der Inhalt einer Datei (ohne Umbenennen), bleibt die Ordner-mtime gleich;
+ein Voll-Abgleich mit ``trust_dir_mtime=False`` erfasst solche Fälle. Mit
+``ScanIndex(reconcile_every=...)`` läuft dieser Voll-Abgleich automatisch,
+sobald der letzte für den Startordner älter ist.
+
+Jeder Ordner merkt sich seinen echten Eltern-Ordner, auch der Startordner
+eines Scans. So bleiben Unterordner erreichbar, wenn erst ``A/B`` und danach
+wieder ``A`` gescannt wird.
+
+Ausgeschlossene Ordner (Papierkorb, ``.cleanignore``, Preset-Muster, fremde
+Dateisysteme, Ordner jenseits von ``max_depth``, siehe ``core.excludes``)
+landen nicht im Index. Ändern sich die Ausschluss-Regeln
+eines Ordners, wird er einmal voll abgeglichen, damit wieder erlaubte
+Unterordner gefunden werden.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import os
+import sqlite3
+import time
+from concurrent.futures import (FIRST_COMPLETED, Future, ThreadPoolExecutor,
+                                wait)
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+from .excludes import ExcludeRules
+from .progress import ProgressToken
+from .scanner import ScanResult, _classify_name
+from .validation import (require_existing_dir, require_non_negative_number,
+                         require_sequence_of_type)
+
+INDEX_PATH: Path = (
+    Path(__file__).resolve().parent.parent / "data" / "scan_index.sqlite3"
+)
+
+# Bump when the table layout changes; the index is a cache and is rebuilt.
+SCHEMA_VERSION = 5
+
+# Directory mtimes this close to "now" may still change within the same
+# timestamp tick, so they are stored as unknown and relisted next time.
+_RACY_WINDOW_NS = 2_000_000_000
+
+# (dev, ino, nlink, size, mtime_ns, file_type)
+FileRow = Tuple[int, int, int, int, int, str]
+# (directory mtime_ns, listing or None when the stored snapshot still holds)
+_Visit = Tuple[int, Optional[Tuple[Dict[bytes, FileRow], List[str]]]]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path BLOB PRIMARY KEY,
+    parent BLOB NOT NULL,
+    dev INTEGER NOT NULL,
+    ino INTEGER NOT NULL,
+    nlink INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    file_type TEXT NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS files_parent ON files (parent);
+CREATE TABLE IF NOT EXISTS dirs (
+    path BLOB PRIMARY KEY,
+    parent BLOB,
+    mtime_ns INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS dirs_parent ON dirs (parent);
+CREATE TABLE IF NOT EXISTS runs (
+    root BLOB NOT NULL,
+    filter_key TEXT NOT NULL,
+    finished_at REAL NOT NULL,
+    PRIMARY KEY (root, filter_key)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS roots (
+    root BLOB PRIMARY KEY,
+    excludes TEXT NOT NULL,
+    reconciled_at REAL NOT NULL
+) WITHOUT ROWID;
+"""
+
+
+def _path_range(root: Path) -> Tuple[bytes, bytes]:
+    """Return the ``[low, high)`` BLOB range that covers all paths below root.
+
+    Paths are stored as ``os.fsencode`` bytes, so undecodable file names
+    survive the round trip and byte order equals code point order.
+    """
+    prefix = os.fsencode(str(root)).rstrip(os.sep.encode()) + os.sep.encode()
+    upper = prefix[:-1] + bytes([prefix[-1] + 1])
+    return prefix, upper
+
+
+def filter_key(
+    types: Sequence[str],
+    size_threshold: int,
+    age_threshold: float,
+    excludes: str = "",
+) -> str:
+    """Build a stable text key for one combination of scan filters."""
+    return (
+        f"{','.join(sorted(set(types)))}|{int(size_threshold)}|{float(age_threshold)}"
+        f"|{excludes}"
+    )
+
+
+def _list_metadata(
+    dirpath: str, excludes: Optional[ExcludeRules] = None
+) -> Tuple[Dict[bytes, FileRow], List[str]]:
+    """List one directory: ``({path: row} for files, [subdirectory paths])``.
+
+    Follows the same rules as the scanner: symlinked directories are not
+    descended, excluded directories (including other file systems and those
+    beyond ``max_depth``) are not returned, unreadable entries are skipped.
+    """
+    files: Dict[bytes, FileRow] = {}
+    subdirs: List[str] = []
+    with os.scandir(dirpath) as it:
+        entries = list(it)
+    descend = excludes is None or excludes.descends(dirpath)
+    for entry in entries:
+        try:
+            if entry.is_dir():
+                if (
+                    descend
+                    and not entry.is_symlink()
+                    and not (
+                        excludes is not None
+                        and (
+                            excludes.excludes(entry.path, True)
+                            or excludes.crosses_device(entry)
+                        )
+                    )
+                ):
+                    subdirs.append(entry.path)
+                continue
+            stat = entry.stat()
+        except OSError:
+            continue
+        files[os.fsencode(entry.path)] = (
+            stat.st_dev,
+            stat.st_ino,
+            stat.st_nlink,
+            stat.st_size,
+            stat.st_mtime_ns,
+            _classify_name(entry.name),
+        )
+    return files, subdirs
+
+
+def _visit_dir(
+    dirpath: bytes, known_mtime_ns: Optional[int], excludes: ExcludeRules
+) -> Optional[_Visit]:
+    """Stat one directory and list it unless its mtime is ``known_mtime_ns``.
+
+    Returns None when the directory cannot be read anymore. Runs in the
+    worker threads of a parallel `ScanIndex.refresh()`; it does not touch
+    the database.
+    """
+    try:
+        mtime_ns = os.stat(dirpath).st_mtime_ns
+        if mtime_ns == known_mtime_ns:
+            return mtime_ns, None
+        return mtime_ns, _list_metadata(os.fsdecode(dirpath), excludes)
+    except OSError:
+        return None
+
+
+class ScanIndex:
+    """SQLite-backed file index with incremental refresh.
+
+    Parameters
+    ----------
+    path: Path, optional
+        Database file. Defaults to ``data/scan_index.sqlite3``.
+    reconcile_every: float, optional
+        Seconds after which `refresh()` ignores directory mtimes once and
+        re-stats every file of a root, catching in-place rewrites.
+        0 (default) only reconciles when asked to.
+    """
+
+    def __init__(
+        self, path: Optional[Path] = None, reconcile_every: float = 0.0
+    ) -> None:
+        self.path = path or INDEX_PATH
+        self.reconcile_every = float(
+            require_non_negative_number(reconcile_every, "reconcile_every")
+        )
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(self.path))
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        version = self._conn.execute("PRAGMA user_version").fetchone()[0]
+        if version != SCHEMA_VERSION:
+            with self._conn:
+                for table in ("files", "dirs", "runs", "roots"):
+                    self._conn.execute(f"DROP TABLE IF EXISTS {table}")
+            self._conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        """Close the database connection."""
+        self._conn.close()
+
+    def __enter__(self) -> "ScanIndex":
+        return self
+
+    def __exit__(self, *_exc: object) -> None:
+        self.close()
+
+    def _stored_dirs(self, root: Path) -> Dict[bytes, Tuple[Optional[bytes], int]]:
+        root_key = os.fsencode(str(root))
+        low, high = _path_range(root)
+        cursor = self._conn.execute(
+            "SELECT path, parent, mtime_ns FROM dirs "
+            "WHERE path = ? OR (path >= ? AND path < ?)",
+            (root_key, low, high),
+        )
+        return {row[0]: (row[1], row[2]) for row in cursor}
+
+    def _stored_files(self, parent_key: bytes) -> Dict[bytes, FileRow]:
+        cursor = self._conn.execute(
+            "SELECT path, dev, ino, nlink, size, mtime_ns, file_type FROM files "
+            "WHERE parent = ?",
+            (parent_key,),
+        )
+        return {row[0]: tuple(row[1:]) for row in cursor}
+
+    def _stored_excludes(self, root: Path) -> Optional[str]:
+        row = self._conn.execute(
+            "SELECT excludes FROM roots WHERE root = ?", (os.fsencode(str(root)),)
+        ).fetchone()
+        return str(row[0]) if row else None
+
+    def _reconciled_at(self, root: Path) -> float:
+        row = self._conn.execute(
+            "SELECT reconciled_at FROM roots WHERE root = ?", (os.fsencode(str(root)),)
+        ).fetchone()
+        return float(row[0]) if row else 0.0
+
+    def indexed(self, root: Path) -> bool:
+        """Return True when ``root`` was refreshed before (a refresh is incremental)."""
+        return self._stored_excludes(Path(root)) is not None
+
+    def refresh(
+        self,
+        root: Path,
+        trust_dir_mtime: bool = True,
+        exclude: Sequence[str] = (),
+        progress: Optional[ProgressToken] = None,
+        one_file_system: bool = False,
+        max_depth: int = 0,
+        workers: int = 1,
+    ) -> Tuple[int, int]:
+        """Bring the index for ``root`` up to date with the file system.
+
+        Directories whose mtime matches the stored snapshot are not listed
+        again; their file rows stay as they are and only their known child
+        directories are visited. Changed directories are listed and only new
+        or changed files are written. Files and directories that disappeared
+        are removed. With ``workers > 1`` the ``stat``/``scandir`` calls run
+        in a thread pool while all database writes stay in the calling
+        thread; the resulting index is the same.
+
+        Parameters
+        ----------
+        root: Path
+            Directory to refresh.
+        trust_dir_mtime: bool, optional
+            ``False`` relists every directory (full reconciliation). Also
+            forced when the last one is older than ``reconcile_every``.
+        exclude: Sequence[str], optional
+            Extra exclude patterns; trash dir and ``.cleanignore`` always apply.
+        progress: ProgressToken, optional
+            Counts visited directories; a cancel rolls the refresh back.
+        one_file_system, max_depth:
+            Traversal limits as in `scanner.scan_directory()`. They are part
+            of the stored rules, so changing them relists the whole tree.
+        workers: int, optional
+            Threads for stat and listing calls. 1 (default) visits the
+            directories one by one.
+
+        Returns
+        -------
+        Tuple[int, int]
+            ``(written, removed)`` file row counts of this refresh.
+        """
+        validated_root = require_existing_dir(root, "root")
+        excludes = ExcludeRules.for_root(
+            validated_root,
+            require_sequence_of_type(exclude, str, "exclude"),
+            one_file_system,
+            max_depth,
+        )
+        if self._stored_excludes(validated_root) != excludes.signature():
+            # directories excluded before were never recorded: relist all
+            trust_dir_mtime = False
+        reconciled_at = self._reconciled_at(validated_root)
+        if self.reconcile_every and time.time() - reconciled_at >= self.reconcile_every:
+            trust_dir_mtime = False
+        if not trust_dir_mtime:
+            reconciled_at = time.time()
+        stored_dirs = self._stored_dirs(validated_root)
+        children: Dict[bytes, List[bytes]] = {}
+        for dir_key, (parent_key, _mtime_ns) in stored_dirs.items():
+            if parent_key is not None:
+                children.setdefault(parent_key, []).append(dir_key)
+
+        written = 0
+        removed = 0
+        now_ns = time.time_ns()
+        seen_dirs: Set[bytes] = set()
+        # the real parent, so a later scan of a parent folder still finds root
+        root_parent = (
+            os.fsencode(str(validated_root.parent))
+            if validated_root.parent != validated_root
+            else None
+        )
+        pending: List[Tuple[bytes, Optional[bytes]]] = [
+            (os.fsencode(str(validated_root)), root_parent)
+        ]
+        running: Dict[Future, Tuple[bytes, Optional[bytes]]] = {}
+
+        def known_mtime(dir_key: bytes) -> Optional[int]:
+            stored = stored_dirs.get(dir_key)
+            return stored[1] if trust_dir_mtime and stored is not None else None
+
+        validated_workers = int(require_non_negative_number(workers, "workers"))
+        pool = (
+            ThreadPoolExecutor(
+                max_workers=validated_workers, thread_name_prefix="index"
+            )
+            if validated_workers > 1
+            else None
+        )
+        with self._conn, pool or contextlib.nullcontext():
+            try:
+                while pending or running:
+                    if pool is None:
+                        dir_key, parent_key = pending.pop()
+                        visits = [
+                            (
+                                dir_key,
+                                parent_key,
+                                _visit_dir(dir_key, known_mtime(dir_key), excludes),
+                            )
+                        ]
+                    else:
+                        while pending:
+                            dir_key, parent_key = pending.pop()
+                            future = pool.submit(
+                                _visit_dir, dir_key, known_mtime(dir_key), excludes
+                            )
+                            running[future] = (dir_key, parent_key)
+                        timeout = progress.interval if progress is not None else None
+                        done, _ = wait(
+                            running, timeout=timeout, return_when=FIRST_COMPLETED
+                        )
+                        if progress is not None:
+                            progress.report()
+                            progress.check()
+                        visits = [
+                            (*running.pop(future), future.result()) for future in done
+                        ]
+                    for dir_key, parent_key, visit in visits:
+                        if visit is None:
+                            continue
+                        seen_dirs.add(dir_key)
+                        dir_mtime_ns, listing = visit
+                        if listing is None:
+                            pending.extend(
+                                (child_key, dir_key)
+                                for child_key in children.get(dir_key, [])
+                            )
+                            if progress is not None:
+                                progress.directory_done(0, len(pending) + len(running))
+                            continue
+                        listed, subdirs = listing
+                        known = self._stored_files(dir_key)
+                        changed = [
+                            (path_key, dir_key, *row)
+                            for path_key, row in listed.items()
+                            if known.pop(path_key, None) != row
+                        ]
+                        self._conn.executemany(
+                            "INSERT OR REPLACE INTO files "
+                            "(path, parent, dev, ino, nlink, size, mtime_ns, file_type) "
+                            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                            changed,
+                        )
+                        # whatever is left in `known` was not listed anymore
+                        self._conn.executemany(
+                            "DELETE FROM files WHERE path = ?",
+                            ((path_key,) for path_key in known),
+                        )
+                        written += len(changed)
+                        removed += len(known)
+                        racy = now_ns - dir_mtime_ns < _RACY_WINDOW_NS
+                        self._conn.execute(
+                            "INSERT OR REPLACE INTO dirs (path, parent, mtime_ns) VALUES (?, ?, ?)",
+                            (dir_key, parent_key, -1 if racy else dir_mtime_ns),
+                        )
+                        pending.extend(
+                            (os.fsencode(subdir), dir_key) for subdir in subdirs
+                        )
+                        if progress is not None:
+                            progress.directory_done(
+                                len(listed), len(pending) + len(running)
+                            )
+            finally:
+                # cancel or error: do not start queued directories
+                for future in running:
+                    future.cancel()
+
+            for dir_key in set(stored_dirs) - seen_dirs:
+                cursor = self._conn.execute(
+                    "DELETE FROM files WHERE parent = ?", (dir_key,)
+                )
+                removed += max(cursor.rowcount, 0)
+                self._conn.execute("DELETE FROM dirs WHERE path = ?", (dir_key,))
+            self._conn.execute(
+                "INSERT OR REPLACE INTO roots (root, excludes, reconciled_at) "
+                "VALUES (?, ?, ?)",
+                (os.fsencode(str(validated_root)), excludes.signature(), reconciled_at),
+            )
+        return written, removed
+
+    def query(
+        self,
+        root: Path,
+        types: List[str],
+        size_threshold: int,
+        age_threshold: float,
+        exclude: Sequence[str] = (),
+    ) -> List[ScanResult]:
+        """Answer a scan request from the index, sorted by path.
+
+        Excluded directories are already missing from the index after a
+        `refresh()` with the same ``exclude``; file patterns are applied here.
+        """
+        return list(
+            self.iter_query(root, types, size_threshold, age_threshold, exclude)
+        )
+
+    def iter_query(
+        self,
+        root: Path,
+        types: List[str],
+        size_threshold: int,
+        age_threshold: float,
+        exclude: Sequence[str] = (),
+    ) -> Iterator[ScanResult]:
+        """Like `query()`, but yield the rows one by one as SQLite returns them.
+
+        Arguments are validated right away. Consume the iterator before the
+        next `refresh()` on this index.
+        """
+        validated_root = require_existing_dir(root, "root")
+        excludes = ExcludeRules.for_root(
+            validated_root, require_sequence_of_type(exclude, str, "exclude")
+        )
+        validated_types = sorted(set(require_sequence_of_type(types, str, "types")))
+        min_size = int(require_non_negative_number(size_threshold, "size_threshold"))
+        min_age = require_non_negative_number(age_threshold, "age_threshold")
+        if not validated_types:
+            return iter(())
+        low, high = _path_range(validated_root)
+        sql = (
+            "SELECT path, dev, ino, nlink, size, mtime_ns, file_type FROM files "
+            "WHERE path >= ? AND path < ? AND size >= ? "
+            f"AND file_type IN ({','.join('?' * len(validated_types))})"
+        )
+        params: List[object] = [low, high, min_size, *validated_types]
+        if min_age:
+            sql += " AND mtime_ns <= ?"
+            params.append(int((time.time() - min_age) * 1_000_000_000))
+        sql += " ORDER BY path"
+        return (
+            ScanResult(
+                path=Path(os.fsdecode(path_key)),
+                size=size,
+                mtime=mtime_ns / 1_000_000_000,
+                file_type=file_type,
+                dev=dev,
+                inode=ino,
+                nlink=nlink,
+            )
+            for path_key, dev, ino, nlink, size, mtime_ns, file_type in (
+                self._conn.execute(sql, params)
+            )
+            if not (
+                excludes.filters_files
+                and excludes.excludes(os.fsdecode(path_key), False)
+            )
+        )
+
+    def scan(
+        self,
+        root: Path,
+        types: List[str],
+        size_threshold: int,
+        age_threshold: float,
+        max_age: float = 0.0,
+        exclude: Sequence[str] = (),
+        progress: Optional[ProgressToken] = None,
+        one_file_system: bool = False,
+        max_depth: int = 0,
+        workers: int = 1,
+    ) -> Iterator[ScanResult]:
+        """Refresh the index if needed and stream the answer from it.
+
+        When the same ``(root, filters)`` request was answered less than
+        ``max_age`` seconds ago, the disk is not touched at all. Otherwise the
+        index is refreshed incrementally first, with ``workers`` listing
+        threads (see `refresh()`). The hits are yielded sorted by path, as
+        in `iter_query()`.
+        """
+        validated_root = require_existing_dir(root, "root")
+        excludes = ExcludeRules.for_root(
+            validated_root,
+            require_sequence_of_type(exclude, str, "exclude"),
+            one_file_system,
+            max_depth,
+        )
+        key = filter_key(types, size_threshold, age_threshold, excludes.signature())
+        last = self.last_run(validated_root, key)
+        fresh = (
+            last is not None
+            and time.time() - last < max_age
+            and self._stored_excludes(validated_root) == excludes.signature()
+        )
+        if not fresh:
+            self.refresh(
+                validated_root,
+                exclude=exclude,
+                progress=progress,
+                one_file_system=one_file_system,
+                max_depth=max_depth,
+                workers=workers,
+            )
+            self.record_run(validated_root, key)
+        return self.iter_query(
+            validated_root, types, size_threshold, age_threshold, exclude=exclude
+        )
+
+    def last_run(self, root: Path, key: str) -> Optional[float]:
+        """Return the finish time of the last refresh for ``(root, key)``."""
+        row = self._conn.execute(
+            "SELECT finished_at FROM runs WHERE root = ? AND filter_key = ?",
+            (os.fsencode(str(root)), key),
+        ).fetchone()
+        return float(row[0]) if row else None
+
+    def record_run(self, root: Path, key: str) -> None:
+        """Remember that ``(root, key)`` was just answered from a fresh index."""
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO runs (root, filter_key, finished_at) "
+                "VALUES (?, ?, ?)",
+                (os.fsencode(str(root)), key, time.time()),
+            )
@@ -1,24 +1,107 @@
 from __future__ import annotations
 
 import hashlib
+import itertools
+import math
+import mmap
 import os
+import random
+import statistics
+import threading
 import time
+import zlib
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import (TYPE_CHECKING, Callable, Dict, Iterable, Iterator, List,
+                    Optional, Sequence, Set, Tuple, Union)
 
-from .validation import (require_condition, require_existing_dir,
+from .excludes import ExcludeRules
+from .image_similarity import (DEFAULT_IMAGE_HASH, DEFAULT_MAX_DISTANCE,
+                               similar_image_groups)
+from .progress import ProgressToken, ScanCancelled
+from .read_policy import DEFAULT_READ_POLICY, ReadPolicy
+from .validation import (require_choice, require_condition,
+                         require_existing_dir, require_non_empty_text,
                          require_non_negative_number, require_sequence_of_type,
                          require_type)
 
+try:  # optional, much faster non-cryptographic prefilter
+    import xxhash
+except ImportError:  # pragma: no cover - depends on the environment
+    xxhash = None
+
+if TYPE_CHECKING:
+    from .dir_tree import DirTreeBuilder
+    from .hash_cache import HashCache
+    from .result_store import ScanResultStore
+    from .scan_cursor import ScanCursor
+    from .scan_index import ScanIndex
+
 IMAGE_EXTS = {".png", ".jpg", ".jpeg", ".gif", ".bmp", ".tiff"}
 VIDEO_EXTS = {".mp4", ".mkv", ".avi", ".mov", ".flv", ".wmv", ".webm"}
 ARCHIVE_EXTS = {".zip", ".tar", ".gz", ".bz2", ".7z", ".rar"}
+ALL_TYPES = ["images", "videos", "archives", "other"]
+
+
+class _Crc32:
+    """hashlib-like wrapper around ``zlib.crc32`` (stdlib, not cryptographic).
+
+    About 7x faster than blake2b; good enough to bucket candidates, since
+    every duplicate is confirmed with a strong full-file hash.
+    """
+
+    def __init__(self) -> None:
+        self._crc = 0
+
+    def update(self, data: bytes) -> None:
+        self._crc = zlib.crc32(data, self._crc)
+
+    def hexdigest(self) -> str:
+        return f"{self._crc:08x}"
+
+
+# Hash algorithm registry: name -> factory returning a hashlib-like object
+# (update() / hexdigest()). Fast ones bucket candidates, strong ones confirm.
+HASH_ALGORITHMS: Dict[str, Callable[[], object]] = {
+    "sha256": hashlib.sha256,
+    "blake2b": hashlib.blake2b,
+    "crc32": _Crc32,
+}
+if xxhash is not None:
+    HASH_ALGORITHMS["xxh3_64"] = xxhash.xxh3_64
+DEFAULT_PREFILTER_ALGORITHM = "crc32"
+DEFAULT_CONFIRM_ALGORITHM = "sha256"
+
+
+def register_hash_algorithm(name: str, factory: Callable[[], object]) -> None:
+    """Make an additional hash algorithm available under ``name``."""
+    clean_name = require_non_empty_text(name, "name").lower()
+    require_condition(
+        callable(factory),
+        (
+            f"Ungültiger Input bei 'factory' für Hash '{clean_name}': aufrufbares Objekt erwartet. "
+            "Nächster Schritt: z. B. hashlib.sha256 übergeben."
+        ),
+    )
+    HASH_ALGORITHMS[clean_name] = factory
+
+
+def _new_hasher(algorithm: str) -> object:
+    """Create a hasher for a registered algorithm name."""
+    return HASH_ALGORITHMS[
+        require_choice(algorithm, list(HASH_ALGORITHMS), "algorithm")
+    ]()
 
 
 def _classify_file(path: Path) -> str:
     """Return a type label based on the file extension."""
-    ext = path.suffix.lower()
+    return _classify_name(path.name)
+
+
+def _classify_name(name: str) -> str:
+    """Return a type label for a bare file name (no stat, no Path object)."""
+    ext = os.path.splitext(name)[1].lower()
     if ext in IMAGE_EXTS:
         return "images"
     if ext in VIDEO_EXTS:
@@ -77,6 +160,339 @@ class ScanResult:
     mtime: float
     file_type: str
     duplicate_group: Optional[int] = None
+    dev: int = 0
+    inode: int = 0
+    nlink: int = 1
+
+    def inode_key(self) -> Tuple[int, int]:
+        """Identify the underlying file; hardlinks share the same key.
+
+        Results without inode data fall back to a key unique to the object.
+        """
+        if self.inode:
+            return (self.dev, self.inode)
+        return (-1, id(self))
+
+
+def unique_size(results: Iterable[ScanResult]) -> int:
+    """Sum the sizes of distinct inodes, counting hardlinked data once."""
+    sizes = {item.inode_key(): item.size for item in results}
+    return sum(sizes.values())
+
+
+def filter_results(
+    results: Iterable[ScanResult],
+    types: List[str],
+    size_threshold: int,
+    age_threshold: float,
+) -> List[ScanResult]:
+    """Apply the scanner filters to already collected results (no disk access).
+
+    Uses exactly the same rules as the traversal, so an unfiltered scan
+    followed by this call equals a filtered scan.
+    """
+    validated_types = set(require_sequence_of_type(types, str, "types"))
+    min_size = int(require_non_negative_number(size_threshold, "size_threshold"))
+    min_age = require_non_negative_number(age_threshold, "age_threshold")
+    now = time.time()
+    return [
+        item
+        for item in results
+        if item.file_type in validated_types
+        and (not min_size or item.size >= min_size)
+        and (not min_age or now - item.mtime >= min_age)
+    ]
+
+
+def _entry_stat(entry: os.DirEntry) -> os.stat_result:
+    """Return stat data for a directory entry.
+
+    ``DirEntry`` caches the result, so each entry costs at most one stat
+    call. Kept as a separate helper so benchmarks can count the calls.
+    """
+    return entry.stat()
+
+
+def _validate_scan_args(
+    root: Path,
+    types: List[str],
+    size_threshold: int,
+    age_threshold: float,
+) -> Tuple[Path, Set[str], int, float]:
+    """Validate the common scanner inputs and return normalized values."""
+    validated_root = require_existing_dir(root, "root")
+    validated_types = set(require_sequence_of_type(types, str, "types"))
+    validated_size_threshold = int(
+        require_non_negative_number(size_threshold, "size_threshold")
+    )
+    validated_age_threshold = require_non_negative_number(
+        age_threshold, "age_threshold"
+    )
+    return (
+        validated_root,
+        validated_types,
+        validated_size_threshold,
+        validated_age_threshold,
+    )
+
+
+def _list_directory(
+    dirpath: str,
+    types: Set[str],
+    size_threshold: int,
+    age_threshold: float,
+    now: float,
+    excludes: Optional[ExcludeRules] = None,
+) -> Tuple[List[ScanResult], List[str]]:
+    """List one directory and return ``(matching files, subdirectories)``.
+
+    Unreadable directories or entries are skipped silently, like ``os.walk``
+    does by default. This is the unit of work for both the sequential and
+    the parallel traversal. Subdirectories matched by ``excludes`` (patterns,
+    other file system, too deep) are not returned, so they are never
+    descended; excluded files are dropped by name before any stat call.
+    """
+    hits: List[ScanResult] = []
+    subdirs: List[str] = []
+    try:
+        with os.scandir(dirpath) as it:
+            entries = list(it)
+    except OSError:
+        return hits, subdirs
+    descend = excludes is None or excludes.descends(dirpath)
+    for entry in entries:
+        try:
+            if entry.is_dir():
+                if (
+                    descend
+                    and not entry.is_symlink()
+                    and not (
+                        excludes is not None
+                        and (
+                            excludes.excludes(entry.path, True)
+                            or excludes.crosses_device(entry)
+                        )
+                    )
+                ):
+                    subdirs.append(entry.path)
+                continue
+        except OSError:
+            continue
+        file_type = _classify_name(entry.name)
+        if file_type not in types:
+            continue
+        if (
+            excludes is not None
+            and excludes.filters_files
+            and excludes.excludes(entry.path, False)
+        ):
+            continue
+        try:
+            stat = _entry_stat(entry)
+        except OSError:
+            continue
+        if size_threshold and stat.st_size < size_threshold:
+            continue
+        if age_threshold:
+            age = now - stat.st_mtime
+            if age < age_threshold:
+                continue
+        hits.append(
+            ScanResult(
+                path=Path(entry.path),
+                size=stat.st_size,
+                mtime=stat.st_mtime,
+                file_type=file_type,
+                dev=stat.st_dev,
+                inode=stat.st_ino,
+                nlink=stat.st_nlink,
+            )
+        )
+    return hits, subdirs
+
+
+def _exclude_rules(
+    root: Path,
+    exclude: Sequence[str],
+    one_file_system: bool = False,
+    max_depth: int = 0,
+) -> ExcludeRules:
+    """Compile the exclude rules of one scan (trash dir, .cleanignore, limits)."""
+    return ExcludeRules.for_root(
+        root,
+        require_sequence_of_type(exclude, str, "exclude"),
+        require_type(one_file_system, bool, "one_file_system"),
+        int(require_non_negative_number(max_depth, "max_depth")),
+    )
+
+
+# Traversal frontier: directories not listed yet, in visiting order. A dict
+# keeps insertion order, pops like a stack (``popitem``) and lets the
+# parallel walk drop finished directories in O(1).
+Frontier = Dict[str, None]
+_TaskArgs = Tuple[Set[str], int, float, float, ExcludeRules]
+
+
+def _walk_sequential(
+    frontier: Frontier,
+    task_args: _TaskArgs,
+    deadline: Optional[float] = None,
+    progress: Optional[ProgressToken] = None,
+) -> Iterator[List[ScanResult]]:
+    """List the directories of ``frontier`` one by one, one hit batch each.
+
+    ``frontier`` is updated in place before a batch is yielded, so while the
+    generator is suspended it holds exactly the directories whose hits were
+    not handed out yet. No directory is started after ``deadline``
+    (``time.monotonic()``), but at least one is always listed so repeated
+    budgeted calls make progress. Cancellation is checked after each batch.
+    """
+    while frontier:
+        dirpath, _ = frontier.popitem()
+        hits, subdirs = _list_directory(dirpath, *task_args)
+        # reversed, so the first listed subdirectory is visited next (top-down)
+        frontier.update(dict.fromkeys(reversed(subdirs)))
+        yield hits
+        if progress is not None:
+            progress.directory_done(len(hits), len(frontier))
+        if deadline is not None and time.monotonic() >= deadline:
+            return
+
+
+def _walk_parallel(
+    frontier: Frontier,
+    task_args: _TaskArgs,
+    workers: int,
+    deadline: Optional[float] = None,
+    progress: Optional[ProgressToken] = None,
+) -> Iterator[List[ScanResult]]:
+    """Like `_walk_sequential()` with a bounded thread pool, one task per directory.
+
+    ``scandir`` and ``stat`` release the GIL, so several metadata requests
+    can be in flight at once. This mostly pays off on network mounts and
+    NVMe arrays where a single outstanding request leaves the device idle.
+    After ``deadline`` queued directories are dropped back into ``frontier``
+    and only the running ones are finished. With a ``progress`` token the
+    waiting loop wakes up regularly to report and check for cancellation.
+    """
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="scan") as pool:
+        running = {
+            pool.submit(_list_directory, dirpath, *task_args): dirpath
+            for dirpath in frontier
+        }
+        timeout = progress.interval if progress is not None else None
+        expired = False
+        listed = 0
+        try:
+            while running:
+                done, _ = wait(running, timeout=timeout, return_when=FIRST_COMPLETED)
+                if progress is not None:
+                    progress.report()
+                    progress.check()
+                listed += len(done)
+                if deadline is not None and not expired and listed:
+                    expired = time.monotonic() >= deadline
+                if expired:
+                    # budget used up: drop queued directories, finish running ones
+                    for future in [f for f in running if f not in done]:
+                        if future.cancel():
+                            del running[future]
+                for future in done:
+                    dirpath = running.pop(future)
+                    hits, subdirs = future.result()
+                    del frontier[dirpath]
+                    frontier.update(dict.fromkeys(subdirs))
+                    if not expired:
+                        running.update(
+                            (pool.submit(_list_directory, subdir, *task_args), subdir)
+                            for subdir in subdirs
+                        )
+                    yield hits
+                    if progress is not None:
+                        progress.directory_done(len(hits), len(frontier))
+        finally:
+            # cancel, error or an early stop: do not list queued directories
+            for future in running:
+                future.cancel()
+
+
+def _scan_batches(
+    root: Path,
+    types: List[str],
+    size_threshold: int,
+    age_threshold: float,
+    workers: int = 1,
+    exclude: Sequence[str] = (),
+    frontier: Optional[Frontier] = None,
+    deadline: Optional[float] = None,
+    progress: Optional[ProgressToken] = None,
+    one_file_system: bool = False,
+    max_depth: int = 0,
+) -> Iterator[List[ScanResult]]:
+    """Validate the scan inputs and return the per-directory hit batches.
+
+    Starts at ``root`` unless a ``frontier`` of a previous, unfinished walk
+    is given; that frontier is then continued and updated in place.
+    """
+    (
+        validated_root,
+        validated_types,
+        validated_size_threshold,
+        validated_age_threshold,
+    ) = _validate_scan_args(root, types, size_threshold, age_threshold)
+    task_args = (
+        validated_types,
+        validated_size_threshold,
+        validated_age_threshold,
+        time.time(),
+        _exclude_rules(validated_root, exclude, one_file_system, max_depth),
+    )
+    if frontier is None:
+        frontier = {str(validated_root): None}
+    if workers > 1:
+        return _walk_parallel(frontier, task_args, workers, deadline, progress)
+    return _walk_sequential(frontier, task_args, deadline, progress)
+
+
+def iter_scan(
+    root: Path,
+    types: List[str],
+    size_threshold: int,
+    age_threshold: float,
+    exclude: Sequence[str] = (),
+    progress: Optional[ProgressToken] = None,
+    one_file_system: bool = False,
+    max_depth: int = 0,
+) -> Iterator[ScanResult]:
+    """Walk ``root`` with ``os.scandir`` and yield matching files as found.
+
+    Files are classified by their name before any stat call, so entries
+    outside ``types`` never touch the inode. Directory detection uses the
+    ``d_type`` information from ``scandir`` and needs no stat either.
+    Symlinked directories are neither reported nor descended, matching the
+    previous ``os.walk`` behaviour; symlinks to files are reported with the
+    metadata of their target. The trash directory,
+    ``.cleanignore`` patterns and ``exclude`` globs prune the walk, and so
+    do ``one_file_system`` and ``max_depth`` (see `core.excludes`).
+
+    Parameters are the same as for `scan_directory()`.
+
+    Yields
+    ------
+    ScanResult
+        One entry per matching file, in traversal order.
+    """
+    for hits in _scan_batches(
+        root,
+        types,
+        size_threshold,
+        age_threshold,
+        exclude=exclude,
+        progress=progress,
+        one_file_system=one_file_system,
+        max_depth=max_depth,
+    ):
+        yield from hits
 
 
 def scan_directory(
@@ -84,9 +500,29 @@ def scan_directory(
     types: List[str],
     size_threshold: int,
     age_threshold: float,
-) -> List[ScanResult]:
+    workers: int = 1,
+    index: Optional["ScanIndex"] = None,
+    index_max_age: float = 0.0,
+    compact: bool = False,
+    exclude: Sequence[str] = (),
+    tree: Optional["DirTreeBuilder"] = None,
+    progress: Optional[ProgressToken] = None,
+    time_budget: float = 0.0,
+    cursor: Optional["ScanCursor"] = None,
+    one_file_system: bool = False,
+    max_depth: int = 0,
+) -> Union[List[ScanResult], "ScanResultStore"]:
     """Scan a directory and return files matching the filter criteria.
 
+    Thin wrapper around `iter_scan()` that collects all hits into a list.
+    With ``workers > 1`` directories are listed in parallel. In both modes
+    the result is sorted by path, so plans and GUI lists are reproducible.
+    With an ``index`` the request is answered from the persistent file
+    index (see `core.scan_index`), which is refreshed incrementally.
+    With a ``time_budget`` the walk stops starting new directories once the
+    budget is used up; a ``cursor`` (see `core.scan_cursor`) then lets a
+    later call continue from where this one stopped.
+
     Parameters
     ----------
     root: Path
@@ -97,48 +533,140 @@ def scan_directory(
         Files smaller than this size (in bytes) are ignored. Zero means no threshold.
     age_threshold: float
         Files younger than this age (in seconds) are ignored. Zero means no threshold.
+    workers: int, optional
+        Number of traversal threads. 1 (default) scans sequentially.
+    index: ScanIndex, optional
+        Persistent file index. When given, ``workers`` threads list the
+        changed directories during the index refresh.
+    index_max_age: float, optional
+        Seconds during which an identical ``(root, filters)`` request is
+        answered from the index without touching the disk. 0 always refreshes.
+    compact: bool, optional
+        Stream the hits into a columnar `ScanResultStore` instead of a list.
+        Uses an order of magnitude less memory on large trees.
+    exclude: Sequence[str], optional
+        Extra gitignore-style patterns (e.g. from a preset). The trash
+        directory and ``root/.cleanignore`` are always applied.
+    tree: DirTreeBuilder, optional
+        Receives every hit during the traversal to build cumulative
+        per-directory totals (see `core.dir_tree`).
+    progress: ProgressToken, optional
+        Receives directory and file counts (see `core.progress`); checked
+        for cancellation before every directory.
+    time_budget: float, optional
+        Seconds after which no further directory is listed. 0 (default)
+        scans the whole tree. Without a ``cursor`` the rest is skipped.
+    cursor: ScanCursor, optional
+        Persistent walk state for ``root`` and these filters. The scan
+        continues the saved frontier, returns the hits of all directories
+        covered so far (including earlier calls) and saves its progress;
+        ``cursor.done`` tells whether the tree is complete.
+    one_file_system: bool, optional
+        Do not descend into directories on another file system than
+        ``root`` (network shares, bind mounts). Checked before descending.
+    max_depth: int, optional
+        Directory levels to read, like ``find -maxdepth``: 1 only lists
+        ``root`` itself, 2 also its subfolders. 0 (default) is unlimited.
 
     Returns
     -------
-    List[ScanResult]
-        A list of files matching the criteria.
+    List[ScanResult] or ScanResultStore
+        The files matching the criteria, sorted by path.
+
+    Raises
+    ------
+    ScanCancelled
+        When ``progress`` was cancelled during the scan.
     """
-    validated_root = require_existing_dir(root, "root")
     validated_types = set(require_sequence_of_type(types, str, "types"))
-    validated_size_threshold = int(
-        require_non_negative_number(size_threshold, "size_threshold")
+    validated_workers = int(require_non_negative_number(workers, "workers"))
+    validated_exclude = require_sequence_of_type(exclude, str, "exclude")
+    validated_budget = require_non_negative_number(time_budget, "time_budget")
+    require_type(one_file_system, bool, "one_file_system")
+    require_non_negative_number(max_depth, "max_depth")
+    require_condition(
+        validated_workers >= 1,
+        (
+            "Ungültiger Input bei 'workers': mindestens 1 Thread nötig. "
+            "Nächster Schritt: Wert 1 (sequentiell) oder höher eintragen."
+        ),
     )
-    validated_age_threshold = require_non_negative_number(
-        age_threshold, "age_threshold"
+    require_condition(
+        index is None or (cursor is None and not validated_budget),
+        (
+            "Ungültige Kombination: Scan-Index und Etappen-Scan (time_budget/cursor) "
+            "schließen sich aus. Nächster Schritt: eines von beiden weglassen."
+        ),
     )
-    results: List[ScanResult] = []
-    now = time.time()
-    for dirpath, _dirnames, filenames in os.walk(validated_root):
-        for name in filenames:
-            path = Path(dirpath) / name
-            try:
-                stat = path.stat()
-            except Exception:
-                continue
-            file_type = _classify_file(path)
-            if file_type not in validated_types:
-                continue
-            if validated_size_threshold and stat.st_size < validated_size_threshold:
-                continue
-            if validated_age_threshold:
-                age = now - stat.st_mtime
-                if age < validated_age_threshold:
-                    continue
-            results.append(
-                ScanResult(
-                    path=path,
-                    size=stat.st_size,
-                    mtime=stat.st_mtime,
-                    file_type=file_type,
-                )
-            )
     require_condition(
-        all(item.file_type in validated_types for item in results),
+        cursor is None
+        or cursor.matches(
+            root,
+            types,
+            size_threshold,
+            age_threshold,
+            validated_exclude,
+            one_file_system,
+            max_depth,
+        ),
+        (
+            "Ungültiger Input bei 'cursor': gehört zu einem anderen Ordner oder Filter. "
+            "Nächster Schritt: ScanCursor mit denselben Werten öffnen."
+        ),
+    )
+    hits: Iterable[ScanResult]
+    if index is not None:
+        hits = index.scan(
+            root,
+            types,
+            size_threshold,
+            age_threshold,
+            max_age=require_non_negative_number(index_max_age, "index_max_age"),
+            exclude=validated_exclude,
+            progress=progress,
+            one_file_system=one_file_system,
+            max_depth=max_depth,
+            workers=validated_workers,
+        )
+    else:
+        batches = _scan_batches(
+            root,
+            types,
+            size_threshold,
+            age_threshold,
+            validated_workers,
+            validated_exclude,
+            frontier=cursor.frontier if cursor is not None else None,
+            deadline=(
+                time.monotonic() + validated_budget if validated_budget else None
+            ),
+            progress=progress,
+            one_file_system=one_file_system,
+            max_depth=max_depth,
+        )
+        if cursor is not None:
+            hits = cursor.track(batches)
+        else:
+            hits = itertools.chain.from_iterable(batches)
+    if tree is not None:
+        hits = tree.track(hits)
+    results: Union[List[ScanResult], "ScanResultStore"]
+    if compact:
+        from .result_store import ScanResultStore
+
+        # index rows stream straight into the columns, already in path order
+        results = ScanResultStore.from_results(hits)
+        if index is None or not _sorted_by_path(results):
+            results = results.sorted(key=lambda item: str(item.path))
+        types_ok = all(
+            ALL_TYPES[code] in validated_types for code in set(results.type_codes)
+        )
+    else:
+        results = list(hits)
+        results.sort(key=lambda item: str(item.path))
+        types_ok = all(item.file_type in validated_types for item in results)
+    require_condition(
+        types_ok,
         (
             "Interner Scanner-Fehler: Ergebnis enthält einen Dateityp außerhalb des Filters. "
             "Nächster Schritt: Protokoll prüfen und Scan erneut starten."
@@ -147,9 +675,434 @@ def scan_directory(
     return results
 
 
+def _sorted_by_path(results: Iterable[ScanResult]) -> bool:
+    """Check the `scan_directory()` order without building a key list.
+
+    The index sorts by path bytes, which only differs from ``str`` order for
+    undecodable file names.
+    """
+    previous = ""
+    for item in results:
+        current = str(item.path)
+        if current < previous:
+            return False
+        previous = current
+    return True
+
+
+@dataclass
+class ScanEstimate:
+    """Projected scan totals from `estimate_scan()`.
+
+    ``files`` and ``bytes`` are ``(estimate, low, high)`` with the interval
+    at the requested ``confidence``. When the whole tree could be walked
+    within the budget, ``exact`` is True and all three values are equal.
+    """
+
+    files: Tuple[float, float, float]
+    bytes: Tuple[float, float, float]
+    # file type -> estimated (files, bytes)
+    by_type: Dict[str, Tuple[float, float]]
+    confidence: float
+    probes: int
+    directories: int
+    exact: bool
+
+
+def estimate_scan(
+    root: Path,
+    types: List[str],
+    size_threshold: int,
+    age_threshold: float,
+    time_budget: float = 2.0,
+    confidence: float = 0.95,
+    exclude: Sequence[str] = (),
+    one_file_system: bool = False,
+    max_depth: int = 0,
+    seed: Optional[int] = None,
+) -> ScanEstimate:
+    """Estimate what `scan_directory()` would find, within ``time_budget`` seconds.
+
+    The first quarter of the budget walks the tree normally; small trees are
+    finished by then and reported exactly. Otherwise the rest of the budget
+    runs random root-to-leaf probes (Knuth's tree-size estimator): each probe
+    lists one directory per level, follows a random subdirectory and weights
+    the hits of every level by the product of the branching factors above it.
+    Each probe is an unbiased estimate of the totals; their mean and standard
+    error give a normal-approximation interval, whose lower end is never
+    below what was actually seen. Listings are cached, so the upper levels
+    are read only once. Very uneven trees widen the interval rather than
+    bias the estimate. Hardlinks count once per link.
+
+    Parameters are the same as for `scan_directory()`, plus:
+
+    time_budget: float, optional
+        Seconds to spend; at least two probes always run.
+    confidence: float, optional
+        Coverage of the interval, between 0 and 1 (default 95 %).
+    seed: int, optional
+        Seed for the probe choices, for reproducible estimates.
+    """
+    (
+        validated_root,
+        validated_types,
+        validated_size_threshold,
+        validated_age_threshold,
+    ) = _validate_scan_args(root, types, size_threshold, age_threshold)
+    budget = require_non_negative_number(time_budget, "time_budget")
+    level = require_non_negative_number(confidence, "confidence")
+    require_condition(
+        0 < level < 1,
+        (
+            "Ungültiger Input bei 'confidence': Wert zwischen 0 und 1 erwartet. "
+            "Nächster Schritt: z. B. 0.95 für 95 % eintragen."
+        ),
+    )
+    task_args = (
+        validated_types,
+        validated_size_threshold,
+        validated_age_threshold,
+        time.time(),
+        _exclude_rules(validated_root, exclude, one_file_system, max_depth),
+    )
+    # directory -> ({file type: [files, bytes]}, subdirectories)
+    listings: Dict[str, Tuple[Dict[str, List[int]], List[str]]] = {}
+
+    def listing(dirpath: str) -> Tuple[Dict[str, List[int]], List[str]]:
+        cached = listings.get(dirpath)
+        if cached is None:
+            hits, subdirs = _list_directory(dirpath, *task_args)
+            per_type: Dict[str, List[int]] = {}
+            for hit in hits:
+                total = per_type.setdefault(hit.file_type, [0, 0])
+                total[0] += 1
+                total[1] += hit.size
+            cached = listings[dirpath] = (per_type, subdirs)
+        return cached
+
+    start = time.monotonic()
+    pending = [str(validated_root)]
+    while pending and time.monotonic() - start < budget / 4:
+        pending.extend(reversed(listing(pending.pop())[1]))
+
+    seen_type: Dict[str, List[int]] = {}
+    for per_type, _subdirs in listings.values():
+        for name, (count, size) in per_type.items():
+            total = seen_type.setdefault(name, [0, 0])
+            total[0] += count
+            total[1] += size
+    seen_files = sum(count for count, _size in seen_type.values())
+    seen_bytes = sum(size for _count, size in seen_type.values())
+    if not pending:
+        return ScanEstimate(
+            files=(seen_files, seen_files, seen_files),
+            bytes=(seen_bytes, seen_bytes, seen_bytes),
+            by_type={name: (count, size) for name, (count, size) in seen_type.items()},
+            confidence=level,
+            probes=0,
+            directories=len(listings),
+            exact=True,
+        )
+
+    rng = random.Random(seed)
+    file_samples: List[float] = []
+    byte_samples: List[float] = []
+    type_sums: Dict[str, List[float]] = {}
+    while len(file_samples) < 2 or time.monotonic() - start < budget:
+        weight = 1
+        files = size_sum = 0.0
+        dirpath = str(validated_root)
+        while True:
+            per_type, subdirs = listing(dirpath)
+            for name, (count, size) in per_type.items():
+                files += weight * count
+                size_sum += weight * size
+                total = type_sums.setdefault(name, [0.0, 0.0])
+                total[0] += weight * count
+                total[1] += weight * size
+            if not subdirs:
+                break
+            weight *= len(subdirs)
+            dirpath = rng.choice(subdirs)
+        file_samples.append(files)
+        byte_samples.append(size_sum)
+
+    probes = len(file_samples)
+    z = statistics.NormalDist().inv_cdf(0.5 + level / 2)
+
+    def interval(samples: List[float], seen: int) -> Tuple[float, float, float]:
+        mean = statistics.fmean(samples)
+        half = z * statistics.stdev(samples) / math.sqrt(len(samples))
+        low = max(mean - half, seen)
+        return max(mean, low), low, max(mean + half, low)
+
+    return ScanEstimate(
+        files=interval(file_samples, seen_files),
+        bytes=interval(byte_samples, seen_bytes),
+        by_type={
+            name: (count / probes, size / probes)
+            for name, (count, size) in type_sums.items()
+        },
+        confidence=level,
+        probes=probes,
+        directories=len(listings),
+        exact=False,
+    )
+
+
+DUPLICATE_MODES = ("none", "quick", "safe", "content", "similar_images")
+
+# Bytes read from the start and from the end of a file in the partial stage
+PARTIAL_HASH_EDGE = 64 * 1024
+# Videos: number and size of the evenly spaced chunks of the sampled fingerprint
+VIDEO_SAMPLE_CHUNKS = 16
+VIDEO_SAMPLE_SIZE = 128 * 1024
+
+
+def _queue_setting(dev: int, name: str) -> Optional[str]:
+    """Read ``queue/<name>`` of block device ``dev`` from sysfs, or None."""
+    base = Path("/sys/dev/block") / f"{os.major(dev)}:{os.minor(dev)}"
+    # partitions keep the queue settings on their parent disk
+    for candidate in (base / "queue" / name, base / ".." / "queue" / name):
+        try:
+            return candidate.read_text(encoding="ascii").strip()
+        except OSError:
+            continue
+    return None
+
+
+def _device_is_rotational(dev: int) -> bool:
+    """Best-effort check whether block device ``dev`` is a spinning disk."""
+    return _queue_setting(dev, "rotational") == "1"
+
+
+class HashPool:
+    """Thread pool for file digests with per-device concurrency limits.
+
+    ``hashlib`` releases the GIL on large updates, so several files can be
+    hashed at once. Spinning disks get a single reader to avoid seek
+    thrashing; other devices allow up to ``per_device`` concurrent readers.
+
+    Parameters
+    ----------
+    workers: int
+        Total number of hashing threads.
+    per_device: int, optional
+        Concurrent reads per non-rotational device. Defaults to ``workers``.
+    """
+
+    def __init__(self, workers: int, per_device: Optional[int] = None) -> None:
+        self.workers = max(int(workers), 1)
+        self.per_device = max(int(per_device or self.workers), 1)
+        self._limits: Dict[int, threading.Semaphore] = {}
+        self._limits_lock = threading.Lock()
+
+    def _limit_for(self, dev: int) -> threading.Semaphore:
+        with self._limits_lock:
+            limit = self._limits.get(dev)
+            if limit is None:
+                slots = 1 if _device_is_rotational(dev) else self.per_device
+                limit = threading.Semaphore(slots)
+                self._limits[dev] = limit
+            return limit
+
+    def _run_one(
+        self,
+        digest: Callable[[ScanResult], str],
+        item: ScanResult,
+        progress: Optional[ProgressToken] = None,
+    ) -> str:
+        if progress is not None:
+            progress.check()
+        dev = item.dev
+        if not dev:
+            # results built without inode data (e.g. by hand)
+            try:
+                dev = os.stat(item.path).st_dev
+            except OSError:
+                return ""
+        with self._limit_for(dev):
+            return digest(item)
+
+    def map(
+        self,
+        digest: Callable[[ScanResult], str],
+        items: Sequence[ScanResult],
+        progress: Optional[ProgressToken] = None,
+    ) -> List[str]:
+        """Return ``[digest(item) for item in items]``, computed in parallel.
+
+        With ``progress`` the calling thread reports while it waits, and a
+        cancel drops all files not started yet.
+        """
+        if self.workers == 1 or len(items) < 2:
+            digests = []
+            for item in items:
+                if progress is not None:
+                    progress.check()
+                digests.append(digest(item))
+            return digests
+        with ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix="hash"
+        ) as pool:
+            if progress is None:
+                return list(pool.map(lambda item: self._run_one(digest, item), items))
+            futures = [
+                pool.submit(self._run_one, digest, item, progress) for item in items
+            ]
+            try:
+                running = set(futures)
+                while running:
+                    _done, running = wait(
+                        running, timeout=progress.interval, return_when=FIRST_COMPLETED
+                    )
+                    progress.report()
+                    progress.check()
+                return [future.result() for future in futures]
+            except ScanCancelled:
+                for future in futures:
+                    future.cancel()
+                raise
+
+
+def _refine_groups(
+    groups: Iterable[List[ScanResult]],
+    digest: Callable[[ScanResult], str],
+    pool: Optional[HashPool] = None,
+    progress: Optional[ProgressToken] = None,
+    cost: Callable[[ScanResult], int] = lambda f: f.size,
+) -> List[List[ScanResult]]:
+    """Split candidate groups by ``digest``; keep sub-groups with 2+ members.
+
+    All digests of one stage are computed up front (in parallel when a
+    ``pool`` is given), once per inode; grouping keeps the input order, so
+    the result is the same as with sequential hashing. Files whose digest is
+    empty (unreadable) are dropped, they are never duplicates. ``cost``
+    tells ``progress`` how many bytes the digest of one file reads.
+    """
+    candidates = [group for group in groups if len(group) > 1]
+    # hardlinks share their bytes: hash each inode only once
+    unique: Dict[Tuple[int, int], ScanResult] = {}
+    for group in candidates:
+        for f in group:
+            unique.setdefault(f.inode_key(), f)
+    representatives = list(unique.values())
+    if progress is not None:
+        progress.plan_hashing(sum(cost(f) for f in representatives))
+    digests = (pool or HashPool(1)).map(digest, representatives, progress)
+    digest_of = {f.inode_key(): h for f, h in zip(representatives, digests)}
+    refined: List[List[ScanResult]] = []
+    for group_files in candidates:
+        by_digest: Dict[str, List[ScanResult]] = {}
+        for f in group_files:
+            h = digest_of[f.inode_key()]
+            if not h:
+                continue
+            by_digest.setdefault(h, []).append(f)
+        refined.extend(g for g in by_digest.values() if len(g) > 1)
+    return refined
+
+
+def _partial_kind(algorithm: str) -> str:
+    return f"partial64k-{algorithm}"
+
+
+def _sampled_kind(algorithm: str) -> str:
+    return f"sampled{VIDEO_SAMPLE_CHUNKS}x{VIDEO_SAMPLE_SIZE // 1024}k-{algorithm}"
+
+
+def _sample_cost(size: int) -> int:
+    return min(size, VIDEO_SAMPLE_CHUNKS * VIDEO_SAMPLE_SIZE)
+
+
+def _partial_cost(f: ScanResult) -> int:
+    if f.file_type == "videos":
+        return _sample_cost(f.size)
+    return min(f.size, 2 * PARTIAL_HASH_EDGE)
+
+
+def _prefilter_digest(
+    hash_cache: Optional["HashCache"],
+    algorithm: str,
+    progress: Optional[ProgressToken],
+    read_policy: Optional[ReadPolicy] = None,
+) -> Callable[[ScanResult], str]:
+    """Return the candidate-stage digest: sampled for videos, edges otherwise."""
+
+    def digest(f: ScanResult) -> str:
+        return _cached_file_hash(
+            f.path,
+            hash_cache,
+            algorithm=algorithm,
+            partial=True,
+            progress=progress,
+            sampled=f.file_type == "videos",
+            read_policy=read_policy,
+        )
+
+    return digest
+
+
+def _content_groups(
+    files: Sequence[ScanResult],
+    hash_cache: Optional["HashCache"],
+    pool: Optional[HashPool] = None,
+    prefilter: str = DEFAULT_PREFILTER_ALGORITHM,
+    confirm: str = DEFAULT_CONFIRM_ALGORITHM,
+    progress: Optional[ProgressToken] = None,
+    read_policy: Optional[ReadPolicy] = None,
+) -> List[List[ScanResult]]:
+    """Find byte-identical files regardless of their names.
+
+    Three stages, each only looking at survivors of the previous one:
+    equal size, equal ``prefilter`` hash of the first and last 64 KiB (for
+    videos: of evenly spaced chunks, see `_sampled_hash()`), equal full
+    ``confirm`` hash. Small files are fully covered by the partial hash and
+    only skip the last stage when both algorithms are the same. Empty files
+    are ignored.
+    """
+    by_size: Dict[int, List[ScanResult]] = {}
+    for f in files:
+        if f.size > 0:
+            by_size.setdefault(f.size, []).append(f)
+    partial = _refine_groups(
+        by_size.values(),
+        _prefilter_digest(hash_cache, prefilter, progress, read_policy),
+        pool,
+        progress,
+        _partial_cost,
+    )
+    if prefilter == confirm:
+        done = [g for g in partial if g[0].size <= _partial_cost(g[0])]
+        partial = [g for g in partial if g[0].size > _partial_cost(g[0])]
+    else:
+        done = []
+    return done + _refine_groups(
+        partial,
+        lambda f: _cached_file_hash(
+            f.path,
+            hash_cache,
+            algorithm=confirm,
+            progress=progress,
+            read_policy=read_policy,
+        ),
+        pool,
+        progress,
+    )
+
+
 def detect_duplicates(
     files: List[ScanResult],
     mode: str = "none",
+    hash_cache: Optional["HashCache"] = None,
+    workers: int = 1,
+    per_device: Optional[int] = None,
+    prefilter: str = DEFAULT_PREFILTER_ALGORITHM,
+    confirm: str = DEFAULT_CONFIRM_ALGORITHM,
+    progress: Optional[ProgressToken] = None,
+    image_hash: str = DEFAULT_IMAGE_HASH,
+    image_distance: int = DEFAULT_MAX_DISTANCE,
+    read_policy: Optional[ReadPolicy] = None,
 ) -> Dict[int, List[ScanResult]]:
     """Group duplicate files.
 
@@ -158,91 +1111,386 @@ def detect_duplicates(
     files: List[ScanResult]
         A list of scan results from `scan_directory()`.
     mode: str
-        Duplicate detection mode: 'none' to skip, 'quick' to group by (name, size) and 'safe' to also compare sha256 hashes.
+        Duplicate detection mode: 'none' to skip, 'quick' to group by (name, size), 'safe' to also compare sha256 hashes
+        and 'content' to find identical content under any name (size, then partial hash, then full hash).
+        'similar_images' groups visually similar images (re-encoded, resized) by perceptual hash,
+        see `core.image_similarity`; it needs Pillow and ignores other file types. These
+        groups are not byte-identical: pass them to `planner.build_plan()` as
+        ``similar_images``, not as ``duplicate_groups``, so no member is kept automatically.
+    hash_cache: HashCache, optional
+        Persistent digest cache (see `core.hash_cache`). Unchanged files are
+        then not read again in 'safe' and 'content' mode.
+    workers: int, optional
+        Number of hashing threads (worker processes in 'similar_images'
+        mode). 1 (default) hashes sequentially; the result is identical in
+        both cases.
+    per_device: int, optional
+        Concurrent reads per SSD/network device (spinning disks always get
+        one). Defaults to ``workers``.
+    prefilter: str, optional
+        Fast algorithm from `HASH_ALGORITHMS` used on the first/last 64 KiB to
+        bucket candidates ('safe' and 'content'). Videos are bucketed by size
+        and `VIDEO_SAMPLE_CHUNKS` evenly spaced chunks instead, so only
+        videos whose samples collide are read completely.
+    confirm: str, optional
+        Strong algorithm from `HASH_ALGORITHMS` for the full-file hash that
+        confirms a duplicate.
+    progress: ProgressToken, optional
+        Receives the planned and hashed byte counts (see `core.progress`);
+        checked for cancellation before every file and every read block.
+    image_hash: str, optional
+        'phash' or 'dhash' for 'similar_images' mode.
+    image_distance: int, optional
+        Largest number of differing bits (of 64) between similar images.
+    read_policy: ReadPolicy, optional
+        Cache-friendly reads and a bandwidth cap for 'safe' and 'content'
+        mode (see `core.read_policy`). Pass one policy per run; its cap is
+        shared by all hashing threads. Defaults to plain reads.
 
     Returns
     -------
     Dict[int, List[ScanResult]]
         A dictionary mapping group identifiers to lists of duplicates. Each group contains two or more items.
+
+    Raises
+    ------
+    ScanCancelled
+        When ``progress`` was cancelled. Digests finished so far stay in
+        ``hash_cache``.
     """
     validated_files = require_sequence_of_type(files, ScanResult, "files")
     validated_mode = require_type(mode, str, "mode").strip().lower()
-    if validated_mode not in {"none", "quick", "safe"}:
-        return {}
-    groups: Dict[str, List[ScanResult]] = {}
-    if validated_mode == "none":
+    if validated_mode not in DUPLICATE_MODES or validated_mode == "none":
         return {}
-    for f in validated_files:
-        key = (f.path.name, f.size)
-        groups.setdefault(str(key), []).append(f)
-    # For safe mode, refine by comparing hashes
-    if validated_mode == "safe":
-        refined: Dict[str, List[ScanResult]] = {}
-        for group_files in groups.values():
-            if len(group_files) < 2:
-                continue
-            # compute hashes
-            hashes: Dict[str, List[ScanResult]] = {}
-            for f in group_files:
-                h = _file_hash(f.path)
-                hashes.setdefault(h, []).append(f)
-            for files_with_same_hash in hashes.values():
-                if len(files_with_same_hash) > 1:
-                    refined[str(id(files_with_same_hash))] = files_with_same_hash
-        # assign refined to groups; if none, return {}
-        out: Dict[int, List[ScanResult]] = {}
-        group_id = 0
-        for g in refined.values():
-            out[group_id] = g
-            group_id += 1
-        require_condition(
-            all(len(group) > 1 for group in out.values()),
-            (
-                "Interner Duplikat-Fehler: Eine Duplikatgruppe ist zu klein. "
-                "Nächster Schritt: Protokoll prüfen und Duplikatmodus auf 'quick' testen."
-            ),
-        )
-        return out
+    pool = HashPool(
+        int(require_non_negative_number(workers, "workers")) or 1, per_device
+    )
+    prefilter = require_choice(prefilter, list(HASH_ALGORITHMS), "prefilter")
+    confirm = require_choice(confirm, list(HASH_ALGORITHMS), "confirm")
+    try:
+        if validated_mode == "similar_images":
+            found = similar_image_groups(
+                validated_files,
+                hash_cache,
+                pool.workers,
+                image_hash,
+                image_distance,
+                progress,
+            )
+        elif validated_mode == "content":
+            found = _content_groups(
+                validated_files,
+                hash_cache,
+                pool,
+                prefilter,
+                confirm,
+                progress,
+                read_policy,
+            )
+        else:
+            groups: Dict[Tuple[str, int], List[ScanResult]] = {}
+            for f in validated_files:
+                groups.setdefault((f.path.name, f.size), []).append(f)
+            if validated_mode == "safe":
+                candidates = _refine_groups(
+                    groups.values(),
+                    _prefilter_digest(hash_cache, prefilter, progress, read_policy),
+                    pool,
+                    progress,
+                    _partial_cost,
+                )
+                found = _refine_groups(
+                    candidates,
+                    lambda f: _cached_file_hash(
+                        f.path,
+                        hash_cache,
+                        algorithm=confirm,
+                        progress=progress,
+                        read_policy=read_policy,
+                    ),
+                    pool,
+                    progress,
+                )
+            else:
+                found = [g for g in groups.values() if len(g) > 1]
+    finally:
+        # also on cancel: keep the digests computed so far
+        if hash_cache is not None:
+            hash_cache.flush()
+    # a group made only of hardlinks to one inode frees nothing when moved
+    found = [g for g in found if len({f.inode_key() for f in g}) > 1]
+    found.sort(key=lambda group: str(group[0].path))
+    out: Dict[int, List[ScanResult]] = dict(enumerate(found))
+    require_condition(
+        all(len(group) > 1 for group in out.values()),
+        (
+            "Interner Duplikat-Fehler: Ergebnis enthält eine Gruppe mit weniger als 2 Dateien. "
+            "Nächster Schritt: Protokoll prüfen und Duplikaterkennung erneut ausführen."
+        ),
+    )
+    return out
+
+
+def _cached_file_hash(
+    path: Path,
+    hash_cache: Optional["HashCache"],
+    algorithm: str = DEFAULT_CONFIRM_ALGORITHM,
+    partial: bool = False,
+    progress: Optional[ProgressToken] = None,
+    sampled: bool = False,
+    read_policy: Optional[ReadPolicy] = None,
+) -> str:
+    """Return the digest of ``path``, served from ``hash_cache`` when valid.
+
+    The file is stat'ed before and after hashing; a digest is only stored
+    when the file did not change in between. Cache entries are kept per
+    algorithm and per partial/sampled/full variant. With ``partial`` and
+    ``sampled`` the partial digest is `_sampled_hash()`. Cache hits are
+    taken off the planned bytes of ``progress``, so the read rate stays
+    honest. Files are read according to ``read_policy``.
+    """
+    if partial and sampled:
+        kind = _sampled_kind(algorithm)
     else:
-        out: Dict[int, List[ScanResult]] = {}
-        group_id = 0
-        for g in groups.values():
-            if len(g) > 1:
-                out[group_id] = g
-                group_id += 1
-        require_condition(
-            all(len(group) > 1 for group in out.values()),
-            (
-                "Interner Duplikat-Fehler: Ergebnis enthält eine Gruppe mit weniger als 2 Dateien. "
-                "Nächster Schritt: Protokoll prüfen und Duplikaterkennung erneut ausführen."
-            ),
+        kind = _partial_kind(algorithm) if partial else algorithm
+
+    def compute(target: Path) -> str:
+        if partial and sampled:
+            return _sampled_hash(
+                target, algorithm=algorithm, progress=progress, read_policy=read_policy
+            )
+        if partial:
+            return _partial_hash(
+                target, algorithm=algorithm, progress=progress, read_policy=read_policy
+            )
+        return _file_hash(
+            target, algorithm=algorithm, progress=progress, read_policy=read_policy
         )
-        return out
 
+    if hash_cache is None:
+        return compute(path)
+    try:
+        before = os.stat(path)
+    except OSError:
+        return ""
+    cached = hash_cache.get(before, kind)
+    if cached is not None:
+        if progress is not None:
+            size = before.st_size
+            if partial and sampled:
+                size = _sample_cost(size)
+            elif partial:
+                size = min(size, 2 * PARTIAL_HASH_EDGE)
+            progress.skip_hash(size)
+        return cached
+    digest = compute(path)
+    try:
+        after = os.stat(path)
+    except OSError:
+        return digest
+    if (after.st_size, after.st_mtime_ns) == (before.st_size, before.st_mtime_ns):
+        hash_cache.put(before, kind, digest)
+    return digest
+
+
+def _partial_hash(
+    path: Path,
+    edge: int = PARTIAL_HASH_EDGE,
+    algorithm: str = DEFAULT_PREFILTER_ALGORITHM,
+    progress: Optional[ProgressToken] = None,
+    read_policy: Optional[ReadPolicy] = None,
+) -> str:
+    """Hash the first and the last ``edge`` bytes of a file.
+
+    Files up to ``2 * edge`` bytes are hashed completely.
+    """
+    h = _new_hasher(algorithm)
+    policy = read_policy or DEFAULT_READ_POLICY
+    try:
+        with policy.open(path, sequential=False) as f:
+            head = f.read(edge)
+            h.update(head)
+            policy.consumed(f.fileno(), 0, len(head), progress)
+            if progress is not None:
+                progress.hashed(len(head))
+            size = os.fstat(f.fileno()).st_size
+            if size > edge:
+                start = max(size - edge, edge)
+                f.seek(start)
+                tail = f.read(edge)
+                h.update(tail)
+                policy.consumed(f.fileno(), start, len(tail), progress)
+                if progress is not None:
+                    progress.hashed(len(tail))
+    except ScanCancelled:
+        raise
+    except Exception:
+        return ""
+    return h.hexdigest()
 
-def _file_hash(path: Path, chunk_size: int = 1024 * 1024) -> str:
-    """Compute SHA256 hash of a file.
+
+def _sampled_hash(
+    path: Path,
+    chunks: int = VIDEO_SAMPLE_CHUNKS,
+    chunk_size: int = VIDEO_SAMPLE_SIZE,
+    algorithm: str = DEFAULT_PREFILTER_ALGORITHM,
+    progress: Optional[ProgressToken] = None,
+    read_policy: Optional[ReadPolicy] = None,
+) -> str:
+    """Hash the file size and ``chunks`` evenly spaced chunks of a file.
+
+    The first chunk starts at offset 0, the last one ends at the end of the
+    file. Chunks are read with positional reads (``os.pread``), so a
+    multi-GB video costs ``chunks * chunk_size`` bytes of I/O. Files up to
+    that size are hashed completely.
+    """
+    h = _new_hasher(algorithm)
+    chunks = max(int(chunks), 2)
+    policy = read_policy or DEFAULT_READ_POLICY
+    try:
+        with policy.open(path, sequential=False) as f:
+            fd = f.fileno()
+            size = os.fstat(fd).st_size
+            h.update(size.to_bytes(8, "little"))
+            if size <= chunks * chunk_size:
+                spans = [(offset, chunk_size) for offset in range(0, size, chunk_size)]
+            else:
+                spans = [
+                    (index * (size - chunk_size) // (chunks - 1), chunk_size)
+                    for index in range(chunks)
+                ]
+            for offset, length in spans:
+                if hasattr(os, "pread"):
+                    data = os.pread(fd, length, offset)
+                else:  # pragma: no cover - Windows has no pread
+                    f.seek(offset)
+                    data = f.read(length)
+                h.update(data)
+                policy.consumed(fd, offset, len(data), progress)
+                if progress is not None:
+                    progress.hashed(len(data))
+    except ScanCancelled:
+        raise
+    except Exception:
+        return ""
+    return h.hexdigest()
+
+
+# Files at least this large are hashed through mmap instead of read calls
+MMAP_THRESHOLD = 256 * 1024 * 1024
+_HASH_BUFFERS = threading.local()
+
+
+# Minimum read size on spinning disks: fewer, longer requests between seeks
+ROTATIONAL_CHUNK_SIZE = 4 * 1024 * 1024
+_DEVICE_CHUNK_SIZES: Dict[Tuple[int, int, int], int] = {}
+
+
+def _device_chunk_size(dev: int, block_size: int, minimum: int) -> int:
+    """Return the read size for hashing a file on device ``dev``.
+
+    Starts from ``minimum`` (at least `ROTATIONAL_CHUNK_SIZE` on spinning
+    disks) and rounds it up to a whole multiple of the device's
+    ``optimal_io_size`` from sysfs, e.g. a full RAID stripe. Without that
+    hint the file system ``block_size`` is used. Results are cached per
+    device.
+    """
+    key = (dev, block_size, minimum)
+    cached = _DEVICE_CHUNK_SIZES.get(key)
+    if cached is not None:
+        return cached
+    target = minimum
+    if _device_is_rotational(dev):
+        target = max(target, ROTATIONAL_CHUNK_SIZE)
+    try:
+        optimal = int(_queue_setting(dev, "optimal_io_size") or 0)
+    except ValueError:
+        optimal = 0
+    unit = optimal if optimal > 0 else (block_size if block_size > 0 else 4096)
+    size = max(unit, -(-target // unit) * unit)
+    _DEVICE_CHUNK_SIZES[key] = size
+    return size
+
+
+def _hash_buffer(size: int) -> memoryview:
+    """Return a reusable per-thread read buffer of at least ``size`` bytes."""
+    buffer = getattr(_HASH_BUFFERS, "buffer", None)
+    if buffer is None or len(buffer) < size:
+        buffer = bytearray(size)
+        _HASH_BUFFERS.buffer = buffer
+    return memoryview(buffer)[:size]
+
+
+def _file_hash(
+    path: Path,
+    chunk_size: int = 1024 * 1024,
+    algorithm: str = DEFAULT_CONFIRM_ALGORITHM,
+    progress: Optional[ProgressToken] = None,
+    read_policy: Optional[ReadPolicy] = None,
+) -> str:
+    """Compute the hash of a file (SHA256 by default).
+
+    Reads go into a preallocated, per-thread ``bytearray`` via ``readinto``
+    and are passed on as ``memoryview`` slices, so no new bytes object is
+    created per chunk. Files of at least `MMAP_THRESHOLD` bytes are mapped
+    with ``mmap`` instead, except with a gentle ``read_policy``: only
+    explicit reads let it drop every hashed chunk from the page cache. The
+    chunk size comes from the file's device (see `_device_chunk_size`).
 
     Parameters
     ----------
     path: Path
         File path to hash.
     chunk_size: int, optional
-        Read chunk size in bytes. Defaults to 1 MB.
+        Minimum read chunk size in bytes. Defaults to 1 MB.
+    algorithm: str, optional
+        Name of a registered algorithm from `HASH_ALGORITHMS`.
+    progress: ProgressToken, optional
+        Counts every chunk and raises `ScanCancelled` between chunks.
+    read_policy: ReadPolicy, optional
+        O_NOATIME/fadvise handling and bandwidth cap (see
+        `core.read_policy`). Defaults to plain reads.
 
     Returns
     -------
     str
         A hex digest of the file.
     """
-    h = hashlib.sha256()
+    h = _new_hasher(algorithm)
+    policy = read_policy or DEFAULT_READ_POLICY
     try:
-        with path.open("rb") as f:
-            while True:
-                data = f.read(chunk_size)
-                if not data:
-                    break
-                h.update(data)
+        with policy.open(path) as f:
+            fd = f.fileno()
+            stat = os.fstat(fd)
+            step = _device_chunk_size(
+                stat.st_dev, getattr(stat, "st_blksize", 0), chunk_size
+            )
+            if stat.st_size >= MMAP_THRESHOLD and not policy.gentle:
+                with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as mapped:
+                    view = memoryview(mapped)
+                    try:
+                        for offset in range(0, len(view), step):
+                            h.update(view[offset : offset + step])
+                            length = min(step, len(view) - offset)
+                            policy.throttle(length, progress)
+                            if progress is not None:
+                                progress.hashed(length)
+                    finally:
+                        view.release()
+            else:
+                buffer = _hash_buffer(step)
+                offset = 0
+                while True:
+                    read = f.readinto(buffer)
+                    if not read:
+                        break
+                    h.update(buffer[:read])
+                    policy.consumed(fd, offset, read, progress)
+                    offset += read
+                    if progress is not None:
+                        progress.hashed(read)
+    except ScanCancelled:
+        raise
     except Exception:
         return ""
     return h.hexdigest()
@@ -1,10 +1,12 @@
 from __future__ import annotations
 
 import json
-from dataclasses import asdict, dataclass
+from dataclasses import asdict, dataclass, field
 from pathlib import Path
 from typing import Dict, List
 
+from core.scanner import (DEFAULT_CONFIRM_ALGORITHM,
+                          DEFAULT_PREFILTER_ALGORITHM, HASH_ALGORITHMS)
 from core.validation import (ValidationError, require_choice,
                              require_existing_dir_from_text, require_output)
 
@@ -32,17 +34,50 @@ class Filters:
     types: List[str]
     size: str
     age: str
+    # gitignore-style patterns skipped while scanning (see core.excludes)
+    exclude: List[str] = field(default_factory=list)
+    # show only the N largest files (0 = all), e.g. for quick_large
+    top_n: int = 0
+    # stay on the file system of the scan root (no network shares/bind mounts)
+    one_file_system: bool = False
+    # directory levels to scan like find -maxdepth (1 = root only, 0 = all)
+    max_depth: int = 0
 
     @staticmethod
     def from_dict(data: Dict[str, object]) -> "Filters":
+        raw_exclude = data.get("exclude", [])
+        try:
+            top_n = max(int(data.get("top_n", 0)), 0)
+        except (TypeError, ValueError):
+            top_n = 0
+        try:
+            max_depth = max(int(data.get("max_depth", 0)), 0)
+        except (TypeError, ValueError):
+            max_depth = 0
         return Filters(
             types=list(data.get("types", [])),
             size=str(data.get("size", "any")),
             age=str(data.get("age", "any")),
+            exclude=(
+                [str(item) for item in raw_exclude if str(item).strip()]
+                if isinstance(raw_exclude, list)
+                else []
+            ),
+            top_n=top_n,
+            one_file_system=data.get("one_file_system", False) is True,
+            max_depth=max_depth,
         )
 
     def to_dict(self) -> Dict[str, object]:
-        return {"types": self.types, "size": self.size, "age": self.age}
+        return {
+            "types": self.types,
+            "size": self.size,
+            "age": self.age,
+            "exclude": self.exclude,
+            "top_n": self.top_n,
+            "one_file_system": self.one_file_system,
+            "max_depth": self.max_depth,
+        }
 
 
 @dataclass
@@ -68,6 +103,17 @@ class Settings:
     organizer_target_mode: str
     organizer_target_path: str
     assistant_tips_enabled: bool
+    scan_workers: int
+    use_scan_index: bool
+    live_watch: bool
+    use_hash_cache: bool
+    hash_workers: int
+    hash_per_device: int
+    hash_prefilter: str
+    hash_confirm: str
+    content_index_roots: List[str]
+    hash_gentle_reads: bool
+    hash_read_limit_mb: float
 
     @staticmethod
     def load(path: Path | None = None) -> "Settings":
@@ -130,6 +176,31 @@ class Settings:
             ),
             assistant_tips_enabled=merged.get("assistant_tips_enabled", True)
             is not False,
+            scan_workers=Settings._normalize_worker_count(
+                merged.get("scan_workers", 4)
+            ),
+            use_scan_index=merged.get("use_scan_index", True) is not False,
+            live_watch=merged.get("live_watch", False) is True,
+            use_hash_cache=merged.get("use_hash_cache", True) is not False,
+            hash_workers=Settings._normalize_worker_count(
+                merged.get("hash_workers", 4)
+            ),
+            hash_per_device=Settings._normalize_worker_count(
+                merged.get("hash_per_device", 2)
+            ),
+            hash_prefilter=Settings._normalize_hash_algorithm(
+                merged.get("hash_prefilter"), DEFAULT_PREFILTER_ALGORITHM
+            ),
+            hash_confirm=Settings._normalize_hash_algorithm(
+                merged.get("hash_confirm"), DEFAULT_CONFIRM_ALGORITHM
+            ),
+            content_index_roots=Settings._normalize_index_roots(
+                merged.get("content_index_roots", [])
+            ),
+            hash_gentle_reads=merged.get("hash_gentle_reads", False) is True,
+            hash_read_limit_mb=Settings._normalize_read_limit(
+                merged.get("hash_read_limit_mb", 0)
+            ),
         )
 
     @staticmethod
@@ -149,6 +220,52 @@ class Settings:
             return ["images", "documents", "videos", "other"]
         return list(dict.fromkeys(filtered))
 
+    @staticmethod
+    def _normalize_worker_count(raw_value: object, upper: int = 32) -> int:
+        """Clamp a thread count to 1..upper; invalid values fall back to 1."""
+
+        try:
+            count = int(raw_value)
+        except (TypeError, ValueError):
+            return 1
+        return min(max(count, 1), upper)
+
+    @staticmethod
+    def _normalize_hash_algorithm(raw_value: object, fallback: str) -> str:
+        """Accept only registered hash algorithms (e.g. xxh3_64 needs xxhash)."""
+
+        try:
+            return require_choice(
+                str(raw_value or "").strip().lower(),
+                list(HASH_ALGORITHMS),
+                "hash_algorithm",
+            )
+        except ValidationError:
+            return fallback
+
+    @staticmethod
+    def _normalize_read_limit(raw_value: object) -> float:
+        """Read cap in MB/s; invalid or negative values mean no cap (0)."""
+
+        try:
+            limit = float(raw_value)
+        except (TypeError, ValueError):
+            return 0.0
+        return limit if limit > 0 else 0.0
+
+    @staticmethod
+    def _normalize_index_roots(raw_roots: object) -> List[str]:
+        """Keep existing folders only (``~`` expanded), without duplicates."""
+
+        if not isinstance(raw_roots, list):
+            return []
+        roots = [
+            str(Path(str(item).strip()).expanduser())
+            for item in raw_roots
+            if str(item).strip()
+        ]
+        return list(dict.fromkeys(root for root in roots if Path(root).is_dir()))
+
     @staticmethod
     def _normalize_target_mode(mode: str) -> str:
         """Validate and normalize organizer target mode."""
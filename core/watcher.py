@@ -0,0 +1,379 @@
+"""
+core.watcher – Live-Überwachung eines Ordners per Linux-inotify.
+
+Ein ``ScanWatcher`` scannt den gewählten Ordner einmal vollständig und hält
+die ``ScanResult``-Liste danach über inotify-Ereignisse aktuell (Anlegen,
+Schreiben, Verschieben, Löschen). GUI („Analyse starten“) und Web-API
+(``/dry_run``) können so sofort antworten, ohne die Platte erneut zu lesen.
+
+inotify wird direkt über ``ctypes`` aus der libc angesprochen, es ist keine
+zusätzliche Abhängigkeit nötig. Läuft die Kernel-Warteschlange über
+(``IN_Q_OVERFLOW``), listet der Watcher nur die Ordner neu, deren mtime sich
+seit dem letzten Stand geändert hat; in allen anderen Ordnern prüft er die
+bekannten Dateien per ``stat``, damit auch an Ort und Stelle überschriebene
+Dateien stimmen.
+"""
+
+from __future__ import annotations
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+from pathlib import Path
+from stat import S_ISDIR
+from typing import Dict, List, Optional, Sequence, Set
+
+from .excludes import IGNORE_FILE_NAME, ExcludeRules
+from .scanner import (ALL_TYPES, ScanResult, _classify_name, _list_directory,
+                      filter_results)
+from .validation import require_existing_dir
+
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_DONT_FOLLOW = 0x02000000
+IN_EXCL_UNLINK = 0x04000000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (
+    IN_ATTRIB
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+    | IN_DELETE_SELF
+    | IN_MOVE_SELF
+    | IN_ONLYDIR
+    | IN_DONT_FOLLOW
+    | IN_EXCL_UNLINK
+)
+
+_EVENT_HEADER = struct.Struct("iIII")
+_LIBC: Optional[ctypes.CDLL] = None
+
+
+def _libc() -> ctypes.CDLL:
+    """Load libc once and check that the inotify functions exist."""
+    global _LIBC
+    if _LIBC is None:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [
+            ctypes.c_int,
+            ctypes.c_char_p,
+            ctypes.c_uint32,
+        ]
+        libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        _LIBC = libc
+    return _LIBC
+
+
+def is_supported() -> bool:
+    """Return True when this system offers inotify (Linux only)."""
+    if not sys.platform.startswith("linux"):
+        return False
+    try:
+        return hasattr(_libc(), "inotify_init1")
+    except OSError:
+        return False
+
+
+class ScanWatcher:
+    """Keep the scan results of one root current via inotify.
+
+    Call `start()` once; the initial scan runs in the background thread and
+    `ready` is set when the results can be used.
+    """
+
+    def __init__(self, root: Path) -> None:
+        self.root = require_existing_dir(root, "root")
+        self.ready = threading.Event()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._fd = -1
+        self._files: Dict[str, ScanResult] = {}
+        self._by_dir: Dict[str, Set[str]] = {}
+        self._wd_to_dir: Dict[int, str] = {}
+        self._dir_to_wd: Dict[str, int] = {}
+        self._dir_mtime: Dict[str, int] = {}
+        self._excludes = ExcludeRules.for_root(self.root)
+
+    # ----- public API -------------------------------------------------------
+
+    def start(self) -> None:
+        """Open the inotify instance and start the background thread."""
+        if self._thread is not None:
+            return
+        if not is_supported():
+            raise RuntimeError(
+                "Live-Überwachung braucht Linux-inotify. "
+                "Nächster Schritt: Analyse normal starten (ohne Live-Modus)."
+            )
+        fd = _libc().inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if fd < 0:
+            err = ctypes.get_errno()
+            raise RuntimeError(
+                f"inotify konnte nicht gestartet werden ({os.strerror(err)}). "
+                "Nächster Schritt: fs.inotify.max_user_instances prüfen oder ohne Live-Modus scannen."
+            )
+        self._fd = fd
+        self._thread = threading.Thread(
+            target=self._run, name="scan-watcher", daemon=True
+        )
+        self._thread.start()
+
+    def stop(self) -> None:
+        """Stop the background thread and release the inotify descriptor."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+            self._thread = None
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+        self.ready.clear()
+
+    def results(self) -> List[ScanResult]:
+        """Return all currently known files, sorted by path."""
+        with self._lock:
+            items = list(self._files.values())
+        items.sort(key=lambda item: str(item.path))
+        return items
+
+    def query(
+        self,
+        types: List[str],
+        size_threshold: int,
+        age_threshold: float,
+        exclude: Sequence[str] = (),
+        one_file_system: bool = False,
+        max_depth: int = 0,
+    ) -> List[ScanResult]:
+        """Answer a scan request from memory, same rules as `scan_directory()`.
+
+        Trash dir and ``.cleanignore`` are applied while watching; ``exclude``
+        patterns (e.g. from a preset), ``one_file_system`` and ``max_depth``
+        are applied to the results here, since the watch covers the whole
+        tree.
+        """
+        hits = filter_results(self.results(), types, size_threshold, age_threshold)
+        if not exclude and not one_file_system and not max_depth:
+            return hits
+        extra = ExcludeRules(self.root, exclude, one_file_system, max_depth)
+        return [hit for hit in hits if not extra.excludes_tree(str(hit.path), hit.dev)]
+
+    # ----- bookkeeping ------------------------------------------------------
+
+    def _add_watch(self, dirpath: str) -> None:
+        wd = _libc().inotify_add_watch(self._fd, os.fsencode(dirpath), WATCH_MASK)
+        if wd < 0:
+            # ENOSPC (max_user_watches) or permission problems: keep the
+            # directory in the results, it just is not live any more.
+            return
+        self._wd_to_dir[wd] = dirpath
+        self._dir_to_wd[dirpath] = wd
+
+    def _forget_dir(self, dirpath: str) -> None:
+        """Drop all files and watches at or below ``dirpath``."""
+        prefix = dirpath.rstrip(os.sep) + os.sep
+        for known_dir in [
+            d for d in self._by_dir if d == dirpath or d.startswith(prefix)
+        ]:
+            for file_path in self._by_dir.pop(known_dir, set()):
+                self._files.pop(file_path, None)
+        for known_dir in [
+            d for d in self._dir_to_wd if d == dirpath or d.startswith(prefix)
+        ]:
+            wd = self._dir_to_wd.pop(known_dir)
+            self._wd_to_dir.pop(wd, None)
+            self._dir_mtime.pop(known_dir, None)
+            _libc().inotify_rm_watch(self._fd, wd)
+
+    def _sync_dir(self, dirpath: str) -> List[str]:
+        """Relist one directory and replace its file entries; return subdirs."""
+        if dirpath not in self._dir_to_wd:
+            # watch before listing, so nothing created in between is missed
+            self._add_watch(dirpath)
+        try:
+            self._dir_mtime[dirpath] = os.stat(dirpath).st_mtime_ns
+        except OSError:
+            self._forget_dir(dirpath)
+            return []
+        hits, subdirs = _list_directory(
+            dirpath, set(ALL_TYPES), 0, 0.0, 0.0, self._excludes
+        )
+        for file_path in self._by_dir.pop(dirpath, set()):
+            self._files.pop(file_path, None)
+        self._by_dir[dirpath] = {str(hit.path) for hit in hits}
+        for hit in hits:
+            self._files[str(hit.path)] = hit
+        return subdirs
+
+    def _sync_tree(self, dirpath: str) -> None:
+        pending = [dirpath]
+        while pending:
+            pending.extend(self._sync_dir(pending.pop()))
+
+    def _update_file(self, dirpath: str, name: str) -> None:
+        """Re-stat one file like the traversal would and store the result."""
+        file_path = os.path.join(dirpath, name)
+        self._files.pop(file_path, None)
+        known = self._by_dir.setdefault(dirpath, set())
+        known.discard(file_path)
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return
+        if S_ISDIR(stat.st_mode) or self._excludes.excludes(file_path, False):
+            return
+        self._files[file_path] = ScanResult(
+            path=Path(file_path),
+            size=stat.st_size,
+            mtime=stat.st_mtime,
+            file_type=_classify_name(name),
+            dev=stat.st_dev,
+            inode=stat.st_ino,
+            nlink=stat.st_nlink,
+        )
+        known.add(file_path)
+
+    def _resync_changed_dirs(self) -> None:
+        """Overflow fallback after lost events.
+
+        Directories whose mtime changed are relisted. In the others no entry
+        was added or removed, but files may have been rewritten in place, so
+        their known files are re-stat'ed.
+        """
+        for dirpath in sorted(self._dir_mtime):
+            if dirpath not in self._dir_mtime:
+                continue  # removed by an earlier _forget_dir in this loop
+            try:
+                mtime_ns = os.stat(dirpath).st_mtime_ns
+            except OSError:
+                self._forget_dir(dirpath)
+                continue
+            if mtime_ns == self._dir_mtime[dirpath]:
+                for file_path in list(self._by_dir.get(dirpath, ())):
+                    self._update_file(dirpath, os.path.basename(file_path))
+                continue
+            for subdir in self._sync_dir(dirpath):
+                if subdir not in self._dir_to_wd:
+                    self._sync_tree(subdir)
+
+    # ----- event loop -------------------------------------------------------
+
+    def _run(self) -> None:
+        with self._lock:
+            self._sync_tree(str(self.root))
+        self.ready.set()
+        while not self._stop.is_set():
+            readable, _w, _x = select.select([self._fd], [], [], 0.5)
+            if not readable:
+                continue
+            try:
+                buffer = os.read(self._fd, 64 * 1024)
+            except BlockingIOError:
+                continue
+            except OSError:
+                break
+            with self._lock:
+                self._handle_events(buffer)
+
+    def _handle_events(self, buffer: bytes) -> None:
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(buffer):
+            wd, mask, _cookie, name_len = _EVENT_HEADER.unpack_from(buffer, offset)
+            raw_name = buffer[
+                offset + _EVENT_HEADER.size : offset + _EVENT_HEADER.size + name_len
+            ]
+            offset += _EVENT_HEADER.size + name_len
+            name = os.fsdecode(raw_name.rstrip(b"\0"))
+            if mask & IN_Q_OVERFLOW:
+                self._resync_changed_dirs()
+                continue
+            dirpath = self._wd_to_dir.get(wd)
+            if dirpath is None:
+                continue
+            if mask & IN_IGNORED or mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                if not name:
+                    self._forget_dir(dirpath)
+                continue
+            try:
+                self._dir_mtime[dirpath] = os.stat(dirpath).st_mtime_ns
+            except OSError:
+                pass
+            target = os.path.join(dirpath, name)
+            if name == IGNORE_FILE_NAME and dirpath == str(self.root):
+                # new ignore rules: rebuild everything with them
+                self._excludes = ExcludeRules.for_root(self.root)
+                self._forget_dir(dirpath)
+                self._sync_tree(dirpath)
+                continue
+            if mask & IN_ISDIR:
+                if mask & (IN_DELETE | IN_MOVED_FROM):
+                    self._forget_dir(target)
+                elif mask & (IN_CREATE | IN_MOVED_TO) and not self._excludes.excludes(
+                    target, True
+                ):
+                    self._sync_tree(target)
+                continue
+            if mask & (IN_DELETE | IN_MOVED_FROM):
+                self._files.pop(target, None)
+                self._by_dir.get(dirpath, set()).discard(target)
+            else:
+                self._update_file(dirpath, name)
+
+
+_WATCHERS: Dict[str, ScanWatcher] = {}
+_WATCHERS_LOCK = threading.Lock()
+
+
+def start_watch(root: Path) -> ScanWatcher:
+    """Return the running watcher for ``root`` or start a new one."""
+    validated_root = require_existing_dir(root, "root")
+    key = str(validated_root.resolve())
+    with _WATCHERS_LOCK:
+        watcher = _WATCHERS.get(key)
+        if watcher is None:
+            watcher = ScanWatcher(validated_root)
+            watcher.start()
+            _WATCHERS[key] = watcher
+        return watcher
+
+
+def get_watcher(root: Path) -> Optional[ScanWatcher]:
+    """Return the watcher for ``root`` if one is running and ready."""
+    try:
+        key = str(Path(root).resolve())
+    except OSError:
+        return None
+    with _WATCHERS_LOCK:
+        watcher = _WATCHERS.get(key)
+    if watcher is None or not watcher.ready.is_set():
+        return None
+    return watcher
+
+
+def stop_watch(root: Path) -> None:
+    """Stop and forget the watcher for ``root`` (no-op when none runs)."""
+    key = str(Path(root).resolve())
+    with _WATCHERS_LOCK:
+        watcher = _WATCHERS.pop(key, None)
+    if watcher is not None:
+        watcher.stop()
@@ -0,0 +1,127 @@
+"""Micro-Benchmark: alter gegen neuen Hash-Lesepfad in ``core.scanner``.
+
+Vergleicht Durchsatz (MB/s) und Spitzen-Speicher (max RSS) von
+
+* ``legacy``: ``f.read(chunk_size)`` mit neuem bytes-Objekt pro Block,
+* ``readinto``: wiederverwendeter ``bytearray`` + ``memoryview``,
+* ``mmap``: Abbildung der Datei in den Speicher.
+
+Jede Variante läuft in einem eigenen Prozess, damit max RSS vergleichbar
+bleibt. Hinweis: Beim mmap-Pfad zählen gelesene Dateiseiten zum RSS, obwohl
+sie zum Page-Cache gehören.
+
+Aufruf: ``python tools/hash_benchmark.py [--size-mb 512] [--rounds 3]``
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from core import scanner  # noqa: E402
+
+VARIANTS = ("legacy", "readinto", "mmap")
+
+
+def _legacy_hash(path: Path, chunk_size: int = 1024 * 1024) -> str:
+    """Nachbau des bisherigen Lesepfads als Vergleichswert."""
+    h = hashlib.sha256()
+    with path.open("rb") as f:
+        while True:
+            data = f.read(chunk_size)
+            if not data:
+                break
+            h.update(data)
+    return h.hexdigest()
+
+
+def _run_variant(variant: str, path: Path, rounds: int) -> None:
+    """Kindprozess: eine Variante messen und Ergebniszeile ausgeben."""
+    if variant == "legacy":
+        digest_fn = _legacy_hash
+    else:
+        # Schwelle so setzen, dass genau der gewünschte Pfad genutzt wird
+        scanner.MMAP_THRESHOLD = 0 if variant == "mmap" else 1 << 62
+        digest_fn = scanner._file_hash
+    size = path.stat().st_size
+    digest = ""
+    started = time.perf_counter()
+    for _ in range(rounds):
+        digest = digest_fn(path)
+    elapsed = time.perf_counter() - started
+    max_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    throughput = size * rounds / elapsed / (1024 * 1024) if elapsed else 0.0
+    print(f"{variant} {throughput:.1f} {max_rss_kb} {digest}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size-mb", type=int, default=512)
+    parser.add_argument("--rounds", type=int, default=3)
+    parser.add_argument("--variant", choices=VARIANTS, help=argparse.SUPPRESS)
+    parser.add_argument("--file", type=Path, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.size_mb < 1 or args.rounds < 1:
+        print(
+            "[BENCH][FEHLER] size-mb und rounds müssen >= 1 sein. Nächster Schritt: Werte erhöhen."
+        )
+        return 1
+
+    if args.variant:
+        _run_variant(args.variant, args.file, args.rounds)
+        return 0
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        sample = Path(tmp_dir) / "sample.bin"
+        block = os.urandom(1024 * 1024)
+        with sample.open("wb") as f:
+            for _ in range(args.size_mb):
+                f.write(block)
+
+        lines = []
+        for variant in VARIANTS:
+            completed = subprocess.run(
+                [
+                    sys.executable,
+                    __file__,
+                    "--variant",
+                    variant,
+                    "--file",
+                    str(sample),
+                    "--rounds",
+                    str(args.rounds),
+                ],
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+            lines.append(completed.stdout.split())
+
+    digests = {line[3] for line in lines}
+    if len(digests) != 1:
+        print(
+            "[BENCH][FEHLER] Prüfsummen weichen ab. Nächster Schritt: _file_hash prüfen."
+        )
+        return 1
+    print(f"[BENCH] Datei: {args.size_mb} MB, {args.rounds} Durchläufe")
+    for variant, throughput, max_rss_kb, _digest in lines:
+        print(
+            f"[BENCH] {variant:<9} {float(throughput):>8.1f} MB/s  "
+            f"max RSS {int(max_rss_kb) / 1024:>7.1f} MB"
+        )
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,89 @@
+"""Micro-Benchmark: Speicherbedarf von ``ScanResult``-Liste gegen ``ScanResultStore``.
+
+Erzeugt synthetische Treffer (ohne Plattenzugriff) in einer realistischen
+Ordnerstruktur und misst mit ``tracemalloc`` den belegten Speicher pro Datei
+für
+
+* ``list``: ``List[ScanResult]`` wie bisher von ``scan_directory()``,
+* ``store``: spaltenweiser ``ScanResultStore`` (``compact=True``).
+
+Aufruf: ``python tools/result_store_benchmark.py [--files 200000] [--per-dir 100]``
+"""
+
+from __future__ import annotations
+
+import argparse
+import gc
+import sys
+import tracemalloc
+from pathlib import Path
+from typing import Iterator
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from core.result_store import ScanResultStore  # noqa: E402
+from core.scanner import ALL_TYPES, ScanResult  # noqa: E402
+
+
+def _synthetic_results(files: int, per_dir: int) -> Iterator[ScanResult]:
+    """Treffer wie aus einem echten Download-Ordner, ohne die Platte zu lesen."""
+    for index in range(files):
+        folder = f"/home/nutzer/Downloads/projekt_{index // per_dir:05d}/unterordner"
+        yield ScanResult(
+            path=Path(f"{folder}/datei_{index:07d}_bericht.pdf"),
+            size=1024 * (index % 5000) + 17,
+            mtime=1_700_000_000.0 + index,
+            file_type=ALL_TYPES[index % len(ALL_TYPES)],
+            dev=2049,
+            inode=1_000_000 + index,
+            nlink=1,
+        )
+
+
+def _measure(variant: str, files: int, per_dir: int) -> int:
+    """Belegten Speicher (Bytes) einer fertig gebauten Ergebnis-Ablage messen."""
+    gc.collect()
+    tracemalloc.start()
+    if variant == "list":
+        results = list(_synthetic_results(files, per_dir))
+        # wie scan_directory(): die Sortierung legt den Pfadtext im Path ab
+        results.sort(key=lambda item: str(item.path))
+        container: object = results
+    else:
+        container = ScanResultStore.from_results(
+            _synthetic_results(files, per_dir)
+        ).sorted(key=lambda item: str(item.path))
+    current, _peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del container
+    return current
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--files", type=int, default=200_000)
+    parser.add_argument("--per-dir", type=int, default=100)
+    args = parser.parse_args()
+    if args.files < 1 or args.per_dir < 1:
+        print(
+            "[BENCH][FEHLER] files und per-dir müssen >= 1 sein. Nächster Schritt: Werte erhöhen."
+        )
+        return 1
+    measured = {
+        variant: _measure(variant, args.files, args.per_dir)
+        for variant in ("list", "store")
+    }
+    for variant, used in measured.items():
+        print(
+            f"[BENCH] {variant:5s}: {used / (1024 * 1024):8.1f} MB gesamt, "
+            f"{used / args.files:6.1f} Byte pro Datei"
+        )
+    factor = measured["list"] / measured["store"] if measured["store"] else 0.0
+    print(f"[BENCH] Ersparnis: Faktor {factor:.1f}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
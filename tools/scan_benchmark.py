@@ -0,0 +1,111 @@
+"""Benchmark: os.walk + Path.stat gegen die scandir-Engine des Scanners.
+
+Das Skript baut einen synthetischen Download-Baum in einem Temp-Ordner,
+zählt die stat-Aufrufe beider Varianten und misst die Laufzeit. So wird
+sichtbar, wie viele stat-Aufrufe die Klassifizierung vor dem stat spart.
+
+Aufruf: ``python tools/scan_benchmark.py [--dirs 200] [--files 50]``
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from core import scanner  # noqa: E402
+
+SAMPLE_SUFFIXES = (".jpg", ".mp4", ".zip", ".txt", ".pdf", ".docx", ".part", ".html")
+
+
+def _build_tree(base: Path, dir_count: int, files_per_dir: int) -> None:
+    if dir_count < 1 or files_per_dir < 1:
+        raise ValueError(
+            "dirs und files müssen >= 1 sein. Nächster Schritt: Werte erhöhen und erneut starten."
+        )
+    for dir_index in range(dir_count):
+        folder = base / f"ordner_{dir_index // 20}" / f"teil_{dir_index}"
+        folder.mkdir(parents=True, exist_ok=True)
+        for file_index in range(files_per_dir):
+            suffix = SAMPLE_SUFFIXES[file_index % len(SAMPLE_SUFFIXES)]
+            (folder / f"datei_{file_index}{suffix}").write_bytes(b"x" * file_index)
+
+
+def _legacy_scan(root: Path, types: set[str]) -> tuple[int, int]:
+    """Nachbau der alten Schleife: stat für jede Datei, dann Filter."""
+    stat_calls = 0
+    hits = 0
+    for dirpath, _dirnames, filenames in os.walk(root):
+        for name in filenames:
+            path = Path(dirpath) / name
+            try:
+                path.stat()
+            except OSError:
+                continue
+            stat_calls += 1
+            if scanner._classify_file(path) in types:
+                hits += 1
+    return stat_calls, hits
+
+
+def _scandir_scan(root: Path, types: list[str]) -> tuple[int, int]:
+    counter = {"calls": 0}
+    original = scanner._entry_stat
+
+    def counting_stat(entry: os.DirEntry) -> os.stat_result:
+        counter["calls"] += 1
+        return original(entry)
+
+    scanner._entry_stat = counting_stat
+    try:
+        hits = sum(1 for _ in scanner.iter_scan(root, types, 0, 0.0))
+    finally:
+        scanner._entry_stat = original
+    return counter["calls"], hits
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--dirs", type=int, default=200)
+    parser.add_argument("--files", type=int, default=50)
+    parser.add_argument(
+        "--types", default="images,videos", help="Kommagetrennte Dateitypen"
+    )
+    args = parser.parse_args()
+    types = [item.strip() for item in args.types.split(",") if item.strip()]
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        base = Path(tmp_dir)
+        _build_tree(base, args.dirs, args.files)
+
+        started = time.perf_counter()
+        legacy_stats, legacy_hits = _legacy_scan(base, set(types))
+        legacy_secs = time.perf_counter() - started
+
+        started = time.perf_counter()
+        new_stats, new_hits = _scandir_scan(base, types)
+        new_secs = time.perf_counter() - started
+
+    if legacy_hits != new_hits:
+        print(
+            f"[BENCH][FEHLER] Trefferzahl weicht ab ({legacy_hits} vs. {new_hits}). "
+            "Nächster Schritt: Scanner-Logik prüfen."
+        )
+        return 1
+    saved = 100.0 * (1 - new_stats / legacy_stats) if legacy_stats else 0.0
+    print(f"[BENCH] Treffer: {new_hits}")
+    print(f"[BENCH] os.walk+stat: {legacy_stats} stat-Aufrufe, {legacy_secs:.3f} s")
+    print(f"[BENCH] scandir:      {new_stats} stat-Aufrufe, {new_secs:.3f} s")
+    print(f"[BENCH] Eingesparte stat-Aufrufe: {saved:.1f} %")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -4,11 +4,13 @@ Dieses Skript führt minimale Importe der Kernmodule und der GUI aus, um
 sicherzustellen, dass zur Entwicklungszeit keine Importfehler auftreten.
 """
 
+import hashlib
 import importlib
 import json
 import os
 import sys
 import tempfile
+import time
 from pathlib import Path
 
 
@@ -114,6 +116,19 @@ def run_core_planner_checks(planner_module: object, scan_result_cls: type) -> No
                 "Zielpfad sollte relativ zum Scan-Root berechnet werden."
             )
 
+        similar_plan = build_plan(
+            files=[move_result],
+            duplicate_groups={},
+            root=root,
+            trash_dir=trash_dir,
+            similar_images={0: [keep_result, move_result]},
+        )
+        if [item.reason for item in similar_plan.items] != ["similar_image"]:
+            raise AssertionError(
+                "Ähnliche Bilder sollten den Grund 'similar_image' erhalten und nur "
+                "verschoben werden, wenn sie ausgewählt sind."
+            )
+
         count, total_bytes = plan.summary()
         expected_bytes = keep_file.stat().st_size + move_file.stat().st_size
         if count != 2:
@@ -135,14 +150,16 @@ def run_core_scanner_checks(scanner_module: object) -> None:
     detect_duplicates = getattr(scanner_module, "detect_duplicates", None)
     parse_size = getattr(scanner_module, "_parse_size", None)
     parse_age = getattr(scanner_module, "_parse_age", None)
+    unique_size = getattr(scanner_module, "unique_size", None)
     if (
         scan_directory is None
         or detect_duplicates is None
         or parse_size is None
         or parse_age is None
+        or unique_size is None
     ):
         raise AssertionError(
-            "scan_directory, detect_duplicates oder Parser fehlen im Scanner-Modul."
+            "scan_directory, detect_duplicates, unique_size oder Parser fehlen im Scanner-Modul."
         )
 
     if parse_size("2kb") != 2048:
@@ -168,6 +185,9 @@ def run_core_scanner_checks(scanner_module: object) -> None:
         duplicate_a.write_text("DUPLICATE", encoding="utf-8")
         duplicate_b.write_text("DUPLICATE", encoding="utf-8")
         other_file.write_text("IMG", encoding="utf-8")
+        trashed = root / ".downloads_organizer_trash" / "a" / "same.txt"
+        trashed.parent.mkdir(parents=True, exist_ok=True)
+        trashed.write_text("DUPLICATE", encoding="utf-8")
 
         scan_results = scan_directory(
             root=root,
@@ -175,11 +195,74 @@ def run_core_scanner_checks(scanner_module: object) -> None:
             size_threshold=0,
             age_threshold=0.0,
         )
+        if any(
+            ".downloads_organizer_trash" in item.path.parts for item in scan_results
+        ):
+            raise AssertionError(
+                "scan_directory darf den Papierkorb-Ordner nicht erneut durchsuchen."
+            )
         if len(scan_results) != 2:
             raise AssertionError(
                 "scan_directory sollte bei Typfilter 'other' nur Textdateien liefern."
             )
 
+        parallel_results = scan_directory(
+            root=root,
+            types=["other"],
+            size_threshold=0,
+            age_threshold=0.0,
+            workers=3,
+        )
+        if [item.path for item in parallel_results] != [
+            item.path for item in scan_results
+        ]:
+            raise AssertionError(
+                "scan_directory mit workers>1 sollte dieselbe sortierte Liste liefern."
+            )
+        compact_results = scan_directory(
+            root=root,
+            types=["other"],
+            size_threshold=0,
+            age_threshold=0.0,
+            compact=True,
+        )
+        if list(compact_results) != list(scan_results):
+            raise AssertionError(
+                "scan_directory mit compact=True sollte dieselben Treffer liefern."
+            )
+        if list(compact_results.filter(["other"], 5, 0.0)) != scan_directory(
+            root, ["other"], 5, 0.0
+        ):
+            raise AssertionError(
+                "ScanResultStore.filter sollte dieselben Regeln wie der Scanner nutzen."
+            )
+        mixed = [
+            scanner_module.ScanResult(
+                Path(folder) / name,
+                size,
+                1.0,
+                "other",
+                dev=dev,
+                inode=inode,
+                nlink=links,
+            )
+            for folder, name, size, dev, inode, links in (
+                ("/a", "eins", 1, 7, 11, 1),
+                ("/a", "zwei", 2, 7, 12, 2),
+                ("/b", "drei", 3, 9, 13, 1),
+                ("/a", "vier", 4, 7, 14, 1),
+            )
+        ]
+        mixed_store = importlib.import_module(
+            "core.result_store"
+        ).ScanResultStore.from_results(mixed)
+        if list(mixed_store) != mixed or list(
+            mixed_store.sorted(key=lambda item: item.size)
+        ) != sorted(mixed, key=lambda item: item.size):
+            raise AssertionError(
+                "ScanResultStore sollte Ordner, Geräte und Link-Zahlen unverändert liefern."
+            )
+
         duplicate_groups = detect_duplicates(scan_results, mode="safe")
         if len(duplicate_groups) != 1:
             raise AssertionError(
@@ -192,11 +275,548 @@ def run_core_scanner_checks(scanner_module: object) -> None:
                 "Duplikatgruppe im Modus 'safe' sollte beide gleichen Dateien enthalten."
             )
 
+        renamed_copy = root / "b" / "same (1).txt"
+        renamed_copy.write_text("DUPLICATE", encoding="utf-8")
+        content_groups = detect_duplicates(
+            scan_directory(root, ["other"], 0, 0.0), mode="content"
+        )
+        if [len(group) for group in content_groups.values()] != [3]:
+            raise AssertionError(
+                "detect_duplicates im Modus 'content' sollte auch umbenannte Kopien finden."
+            )
+        for algorithm in ("crc32", "blake2b", "sha256"):
+            if algorithm not in scanner_module.HASH_ALGORITHMS:
+                raise AssertionError(
+                    f"Hash-Verfahren '{algorithm}' sollte ohne Zusatzpaket registriert sein."
+                )
+        if scanner_module.DEFAULT_PREFILTER_ALGORITHM != "crc32":
+            raise AssertionError(
+                "Vorfilter sollte standardmäßig das schnelle crc32 nutzen."
+            )
+        zlib_module = importlib.import_module("zlib")
+        crc = scanner_module.HASH_ALGORITHMS["crc32"]()
+        crc.update(b"DUPLI")
+        crc.update(b"CATE")
+        if crc.hexdigest() != f"{zlib_module.crc32(b'DUPLICATE'):08x}":
+            raise AssertionError(
+                "crc32-Hasher sollte blockweise wie zlib.crc32 rechnen."
+            )
+        scanner_module.register_hash_algorithm("Smoke_MD5", hashlib.md5)
+        try:
+            split_groups = detect_duplicates(
+                scan_directory(root, ["other"], 0, 0.0),
+                mode="content",
+                prefilter="crc32",
+                confirm="smoke_md5",
+            )
+        finally:
+            scanner_module.HASH_ALGORITHMS.pop("smoke_md5", None)
+        if split_groups != content_groups:
+            raise AssertionError(
+                "Vorfilter und Bestätigungs-Hash sollten frei kombinierbar sein, "
+                "ohne das Ergebnis zu ändern."
+            )
+        try:
+            detect_duplicates(scan_results, mode="safe", prefilter="gibt_es_nicht")
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(
+                "detect_duplicates sollte unbekannte Hash-Verfahren ablehnen."
+            )
+
+        # mmap ab MMAP_THRESHOLD, darunter readinto: beide gleiche Prüfsumme
+        block_file = root / "block.bin"
+        block_bytes = os.urandom(3 * 1024 * 1024 + 123)
+        block_file.write_bytes(block_bytes)
+        threshold = scanner_module.MMAP_THRESHOLD
+        try:
+            for limit in (len(block_bytes) - 1, len(block_bytes), len(block_bytes) + 1):
+                scanner_module.MMAP_THRESHOLD = limit
+                if (
+                    scanner_module._file_hash(block_file)
+                    != hashlib.sha256(block_bytes).hexdigest()
+                    or scanner_module._file_hash(block_file, algorithm="crc32")
+                    != f"{zlib_module.crc32(block_bytes):08x}"
+                ):
+                    raise AssertionError(
+                        "_file_hash sollte mit mmap und readinto dieselbe Prüfsumme "
+                        "wie hashlib liefern."
+                    )
+        finally:
+            scanner_module.MMAP_THRESHOLD = threshold
+        block_file.unlink()
+
+        # Lesegröße folgt dem Gerät: RAID-Streifen und drehende Platten
+        queue_setting = scanner_module._queue_setting
+        mib = 1024 * 1024
+        try:
+            for settings, expected in (
+                ({"rotational": "0", "optimal_io_size": "0"}, mib),
+                (
+                    {"rotational": "0", "optimal_io_size": str(3 * 512 * 1024)},
+                    3 * mib // 2,
+                ),
+                ({"rotational": "1", "optimal_io_size": "0"}, 4 * mib),
+            ):
+                scanner_module._DEVICE_CHUNK_SIZES.clear()
+                scanner_module._queue_setting = (
+                    lambda _dev, name, values=settings: values.get(name)
+                )
+                if scanner_module._device_chunk_size(1, 4096, mib) != expected:
+                    raise AssertionError(
+                        "_device_chunk_size sollte optimal_io_size und drehende "
+                        "Platten berücksichtigen."
+                    )
+        finally:
+            scanner_module._queue_setting = queue_setting
+            scanner_module._DEVICE_CHUNK_SIZES.clear()
+
+        pool_items = scan_directory(root, ["other"], 0, 0.0)
+
+        def content_digest(item: object) -> str:
+            return hashlib.sha256(item.path.read_bytes()).hexdigest()
+
+        if scanner_module.HashPool(4).map(content_digest, pool_items) != [
+            content_digest(item) for item in pool_items
+        ] or detect_duplicates(
+            pool_items, mode="content", workers=4
+        ) != detect_duplicates(
+            pool_items, mode="content", workers=1
+        ):
+            raise AssertionError(
+                "HashPool mit mehreren Threads sollte dieselben Prüfsummen und "
+                "Gruppen wie sequenzielles Hashen liefern."
+            )
+
+        hardlink_root = root / "links"
+        hardlink_root.mkdir()
+        original = hardlink_root / "original.bin"
+        original.write_bytes(b"HARDLINK")
+        os.link(original, hardlink_root / "link.bin")
+        linked = scan_directory(hardlink_root, ["other"], 0, 0.0)
+        if detect_duplicates(linked, mode="content") != {}:
+            raise AssertionError(
+                "Hardlinks auf dieselbe Datei sind keine Duplikate (kein Platzgewinn)."
+            )
+        if unique_size(linked) != len(b"HARDLINK"):
+            raise AssertionError(
+                "unique_size sollte hardgelinkte Daten nur einmal zählen."
+            )
+
+        estimate = scanner_module.estimate_scan(root, ["other"], 0, 0.0)
+        if not estimate.exact or estimate.files[0] != len(
+            scan_directory(root, ["other"], 0, 0.0)
+        ):
+            raise AssertionError(
+                "estimate_scan sollte kleine Ordner vollständig und exakt zählen."
+            )
+
+        top_level = scan_directory(root, ["other"], 0, 0.0, max_depth=1)
+        if any(item.path.parent != root for item in top_level):
+            raise AssertionError(
+                "scan_directory mit max_depth=1 sollte nur den Startordner lesen."
+            )
+        if scan_directory(
+            root, ["other"], 0, 0.0, one_file_system=True
+        ) != scan_directory(root, ["other"], 0, 0.0):
+            raise AssertionError(
+                "one_file_system sollte Ordner auf demselben Dateisystem nicht auslassen."
+            )
+
+        scan_index_module = importlib.import_module("core.scan_index")
+        all_types = ["images", "videos", "archives", "other"]
+        with scan_index_module.ScanIndex(Path(tmp_dir) / "walk.sqlite3") as index:
+            if index.indexed(root):
+                raise AssertionError(
+                    "ScanIndex.indexed sollte neue Ordner nicht kennen."
+                )
+            for workers in (1, 3):
+                if scan_directory(
+                    root, all_types, 0, 0.0, workers=workers, index=index
+                ) != scan_directory(root, all_types, 0, 0.0):
+                    raise AssertionError(
+                        "scan_directory mit ScanIndex sollte dieselben Treffer wie "
+                        "ein normaler Durchlauf liefern."
+                    )
+            if not index.indexed(root):
+                raise AssertionError(
+                    "ScanIndex.indexed sollte gescannte Ordner kennen."
+                )
+            (root / "b" / "neu.txt").write_text("NEU", encoding="utf-8")
+            (root / "photo.png").write_text("IMG, länger", encoding="utf-8")
+            indexed = scan_directory(root, all_types, 0, 0.0, index=index)
+            walked = scan_directory(root, all_types, 0, 0.0)
+            (root / "b" / "neu.txt").unlink()
+            if indexed != walked or scan_directory(
+                root, all_types, 0, 0.0, index=index
+            ) != scan_directory(root, all_types, 0, 0.0):
+                raise AssertionError(
+                    "ScanIndex sollte neue, geänderte und gelöschte Dateien beim "
+                    "Auffrischen wie ein normaler Durchlauf erfassen."
+                )
+
+        # alte Ordner-mtimes: der Index vertraut ihnen und listet nicht neu
+        nested = Path(tmp_dir) / "verschachtelt"
+        (nested / "innen").mkdir(parents=True)
+        (nested / "innen" / "tief.txt").write_text("TIEF", encoding="utf-8")
+        for folder in (nested / "innen", nested):
+            os.utime(folder, (time.time() - 3600, time.time() - 3600))
+        with scan_index_module.ScanIndex(Path(tmp_dir) / "nested.sqlite3") as index:
+            index.refresh(nested)
+            index.refresh(nested / "innen")
+            index.refresh(nested)
+            if [item.path for item in index.query(nested, ["other"], 0, 0.0)] != [
+                nested / "innen" / "tief.txt"
+            ]:
+                raise AssertionError(
+                    "ScanIndex sollte Unterordner behalten, wenn erst ein Unterordner "
+                    "und dann wieder der Elternordner gescannt wird."
+                )
+            (nested / "innen" / "tief.txt").write_text("TIEFER", encoding="utf-8")
+            os.utime(nested / "innen", (time.time() - 3600, time.time() - 3600))
+        with scan_index_module.ScanIndex(
+            Path(tmp_dir) / "nested.sqlite3", reconcile_every=1e-6
+        ) as index:
+            index.refresh(nested)
+            if [item.size for item in index.query(nested, ["other"], 0, 0.0)] != [6]:
+                raise AssertionError(
+                    "ScanIndex mit reconcile_every sollte überschriebene Dateien "
+                    "beim fälligen Voll-Abgleich erfassen."
+                )
+
+        watcher_module = importlib.import_module("core.watcher")
+        if watcher_module.is_supported():
+            watched = Path(tmp_dir) / "live"
+            watched.mkdir()
+            watcher = watcher_module.start_watch(watched)
+            try:
+                if not watcher.ready.wait(5):
+                    raise AssertionError(
+                        "ScanWatcher sollte den Startscan abschließen."
+                    )
+                (watched / "neu.txt").write_text("NEU", encoding="utf-8")
+                deadline = time.monotonic() + 5
+                while not watcher.query(["other"], 0, 0.0):
+                    if time.monotonic() > deadline:
+                        raise AssertionError(
+                            "ScanWatcher sollte neue Dateien per inotify erfassen."
+                        )
+                    time.sleep(0.05)
+            finally:
+                watcher_module.stop_watch(watched)
+            if watcher_module.get_watcher(watched) is not None:
+                raise AssertionError("stop_watch sollte den Watcher beenden.")
+            # verlorene Ereignisse: Überlauf-Abgleich muss den Inhalt neu lesen
+            (watched / "neu.txt").write_text("ÜBERSCHRIEBEN", encoding="utf-8")
+            watcher._resync_changed_dirs()
+            if [item.size for item in watcher.results()] != [
+                (watched / "neu.txt").stat().st_size
+            ]:
+                raise AssertionError(
+                    "ScanWatcher sollte beim Überlauf-Abgleich überschriebene "
+                    "Dateien neu erfassen."
+                )
+
+        cursor_module = importlib.import_module("core.scan_cursor")
+        cursor_path = Path(tmp_dir) / "cursor.sqlite3"
+        with cursor_module.ScanCursor(root, ["other"], 0, 0.0, path=cursor_path) as cur:
+            # kleinstes Budget: jeder Aufruf liest nur einen Ordner
+            partial = scan_directory(
+                root, ["other"], 0, 0.0, time_budget=1e-9, cursor=cur
+            )
+        with cursor_module.ScanCursor(root, ["other"], 0, 0.0, path=cursor_path) as cur:
+            if cur.done or not cur.resumed:
+                raise AssertionError("ScanCursor sollte den offenen Stand speichern.")
+            while not cur.done:
+                partial = scan_directory(
+                    root, ["other"], 0, 0.0, time_budget=1e-9, cursor=cur
+                )
+        if partial != scan_directory(root, ["other"], 0, 0.0):
+            raise AssertionError(
+                "Fortgesetzter Etappen-Scan sollte alle Treffer liefern."
+            )
+
+        progress_module = importlib.import_module("core.progress")
+        token = progress_module.ProgressToken()
+        scan_directory(root, ["other"], 0, 0.0, progress=token)
+        if token.snapshot().files != len(scan_directory(root, ["other"], 0, 0.0)):
+            raise AssertionError("ProgressToken sollte alle gefundenen Dateien zählen.")
+        token.cancel()
+        try:
+            detect_duplicates(scan_results, mode="safe", progress=token)
+        except progress_module.ScanCancelled:
+            pass
+        else:
+            raise AssertionError(
+                "detect_duplicates sollte nach cancel() mit ScanCancelled abbrechen."
+            )
+
         if detect_duplicates(scan_results, mode="ungültig") != {}:
             raise AssertionError(
                 "detect_duplicates sollte bei ungültigem Modus ein leeres Ergebnis liefern."
             )
 
+        # größer als die Stichprobe: Videos werden erst per Stichprobe verglichen
+        video_bytes = bytes(range(256)) * (3 * 4096)
+        (root / "film.mp4").write_bytes(video_bytes)
+        (root / "film_kopie.mkv").write_bytes(video_bytes)
+        (root / "film_anders.mp4").write_bytes(video_bytes[:-1] + b"X")
+        videos = scan_directory(root, ["videos"], 0, 0.0)
+        video_groups = detect_duplicates(videos, mode="content")
+        if [sorted(f.path.name for f in g) for g in video_groups.values()] != [
+            ["film.mp4", "film_kopie.mkv"]
+        ]:
+            raise AssertionError(
+                "detect_duplicates sollte Videos per Stichprobe vorsortieren und "
+                "per vollständigem Hash bestätigen."
+            )
+
+        archives_module = importlib.import_module("core.archives")
+        zipfile_module = importlib.import_module("zipfile")
+        (root / "paket").mkdir()
+        (root / "paket" / "liesmich.txt").write_text("INHALT", encoding="utf-8")
+        with zipfile_module.ZipFile(root / "paket.zip", "w") as archive:
+            archive.writestr("liesmich.txt", "INHALT")
+        with zipfile_module.ZipFile(root / "fremd.zip", "w") as archive:
+            archive.writestr("liesmich.txt", "ANDERER INHALT")
+        extracted = archives_module.find_extracted_archives(
+            scan_directory(root, ["archives"], 0, 0.0)
+        )
+        if extracted != {root / "paket.zip": root / "paket"}:
+            raise AssertionError(
+                "find_extracted_archives sollte nur das bereits entpackte Archiv melden."
+            )
+
+        content_index_module = importlib.import_module("core.content_index")
+        scan_index_module = importlib.import_module("core.scan_index")
+        storage = Path(tmp_dir) / "ablage"
+        storage.mkdir()
+        (storage / "gesichert.txt").write_text("DUPLICATE", encoding="utf-8")
+        with scan_index_module.ScanIndex(
+            Path(tmp_dir) / "index.sqlite3"
+        ) as listing, content_index_module.ContentIndex(
+            Path(tmp_dir) / "inhalt.sqlite3", scan_index=listing
+        ) as content_index:
+            content_index.update_root(storage)
+            stored = content_index.lookup(
+                scan_directory(root, ["other"], 0, 0.0, compact=True)
+            )
+            # volle Prüfsummen sind jetzt bekannt; gelöschte Ablage zählt nicht mehr
+            (storage / "gesichert.txt").unlink()
+            if content_index.lookup(scan_directory(root, ["other"], 0, 0.0)) != {}:
+                raise AssertionError(
+                    "ContentIndex.lookup sollte gelöschte Ablage-Dateien nicht melden."
+                )
+        if {path.name for path in stored} != {"same.txt", "same (1).txt"} or any(
+            matches != [storage / "gesichert.txt"] for matches in stored.values()
+        ):
+            raise AssertionError(
+                "ContentIndex.lookup sollte Inhalte finden, die schon im Ablage-Ordner liegen."
+            )
+
+        read_policy_module = importlib.import_module("core.read_policy")
+        gentle = read_policy_module.ReadPolicy(gentle=True)
+        if scanner_module._file_hash(
+            duplicate_a, read_policy=gentle
+        ) != scanner_module._file_hash(duplicate_a):
+            raise AssertionError(
+                "Schonendes Lesen (ReadPolicy) darf die Prüfsumme nicht verändern."
+            )
+        gentle_groups = detect_duplicates(
+            scan_directory(root, ["other"], 0, 0.0), "content", read_policy=gentle
+        )
+        if len(gentle_groups) != 1:
+            raise AssertionError(
+                "detect_duplicates sollte mit ReadPolicy dieselben Gruppen liefern."
+            )
+        hash_cache_module = importlib.import_module("core.hash_cache")
+        with hash_cache_module.HashCache(Path(tmp_dir) / "hashes.sqlite3") as cache:
+            first_token = progress_module.ProgressToken()
+            first = detect_duplicates(
+                scan_results, mode="safe", hash_cache=cache, progress=first_token
+            )
+            cached_token = progress_module.ProgressToken()
+            second = detect_duplicates(
+                scan_results, mode="safe", hash_cache=cache, progress=cached_token
+            )
+        if (
+            second != first
+            or first_token.snapshot().bytes_hashed == 0
+            or cached_token.snapshot().bytes_hashed != 0
+        ):
+            raise AssertionError(
+                "Zweiter Lauf mit HashCache sollte dieselben Gruppen ohne "
+                "erneutes Lesen liefern."
+            )
+
+        throttled = read_policy_module.ReadPolicy(max_bytes_per_second=1_000_000)
+        started = time.monotonic()
+        throttled.throttle(100_000)
+        throttled.throttle(100_000)
+        if time.monotonic() - started < 0.19:
+            raise AssertionError(
+                "ReadPolicy sollte die Lesebandbreite auf max_bytes_per_second begrenzen."
+            )
+
+        similarity_module = importlib.import_module("core.image_similarity")
+        base = 0x0F0F_1234_ABCD_5678
+        near_hashes = [base, base ^ 0b101, 0xFFFF_0000_FFFF_0000, base ^ 0b1]
+        if similarity_module.cluster_hashes(near_hashes, 2) != [[0, 1, 3]]:
+            raise AssertionError(
+                "cluster_hashes sollte nahe Bild-Hashes zu einer Gruppe zusammenfassen."
+            )
+        if similarity_module.PIL_AVAILABLE:
+            image_module = importlib.import_module("PIL.Image")
+            photo = image_module.new("RGB", (64, 48))
+            photo.paste((240, 200, 40), (0, 0, 32, 48))
+            photo.save(root / "foto.png")
+            photo.resize((32, 24)).save(root / "foto_klein.jpg", quality=60)
+            images = scan_directory(root, ["images"], 0, 0.0)
+            similar = detect_duplicates(images, mode="similar_images")
+            if [sorted(f.path.name for f in g) for g in similar.values()] != [
+                ["foto.png", "foto_klein.jpg"]
+            ]:
+                raise AssertionError(
+                    "detect_duplicates im Modus 'similar_images' sollte verkleinerte "
+                    "Kopien eines Bildes finden."
+                )
+            if similarity_module.POOL_CONTEXT.get_start_method() == "fork":
+                raise AssertionError(
+                    "Der Bild-Hash-Pool darf den (mehrfädigen) Prozess nicht forken."
+                )
+            pool_dir = root / "bilder_pool"
+            pool_dir.mkdir()
+            for number in range(similarity_module.BATCH_SIZE + 3):
+                tile = image_module.new("L", (16, 16))
+                tile.paste(number * 7 % 256, (0, 0, 8, 16))
+                tile.save(pool_dir / f"bild_{number:02d}.png")
+            pool_images = scan_directory(pool_dir, ["images"], 0, 0.0)
+            sequential_groups = similarity_module.similar_image_groups(pool_images)
+            pooled_groups = similarity_module.similar_image_groups(
+                pool_images, workers=2
+            )
+            if [[f.path for f in g] for g in pooled_groups] != [
+                [f.path for f in g] for g in sequential_groups
+            ] or not pooled_groups:
+                raise AssertionError(
+                    "similar_image_groups mit Prozess-Pool (mehrere Stapel) sollte "
+                    "dieselben Gruppen liefern wie der sequentielle Lauf."
+                )
+
+
+def run_core_aggregate_checks(scan_result_cls: type) -> None:
+    """Run behaviour checks for the streaming aggregates (TopN, totals, rollup)."""
+    aggregates = importlib.import_module("core.aggregates")
+    root = Path("/daten")
+    items = [
+        scan_result_cls(root / "a" / "klein.txt", 10, 3000.0, "other"),
+        scan_result_cls(root / "a" / "x" / "gross.mp4", 500, 1000.0, "videos"),
+        scan_result_cls(root / "b" / "mittel.jpg", 200, 2000.0, "images"),
+        scan_result_cls(root / "b" / "link.jpg", 200, 2500.0, "images", None, 1, 7, 2),
+        scan_result_cls(root / "b" / "link2.jpg", 200, 2500.0, "images", None, 1, 7, 2),
+        scan_result_cls(root / "oben.zip", 50, 1500.0, "archives"),
+    ]
+
+    largest = aggregates.TopN(2)
+    oldest = aggregates.TopN(2, by="age")
+    for item in items:
+        largest.add(item)
+        oldest.add(item)
+    if [item.path.name for item in largest.results()] != ["gross.mp4", "mittel.jpg"]:
+        raise AssertionError(
+            "TopN sollte die größten Dateien liefern, bei Gleichstand die zuerst gesehene."
+        )
+    if [item.path.name for item in oldest.results()] != ["gross.mp4", "oben.zip"]:
+        raise AssertionError("TopN(by='age') sollte die ältesten Dateien liefern.")
+    if aggregates.top_n(items, 0) != []:
+        raise AssertionError("top_n mit n=0 sollte nichts behalten.")
+
+    totals = aggregates.TypeTotals()
+    for item in items:
+        totals.add(item)
+    images = totals.totals["images"]
+    if (images.count, images.bytes) != (3, 400) or totals.totals["other"].bytes != 10:
+        raise AssertionError(
+            "TypeTotals sollte pro Typ zählen und Hardlinks nur einmal addieren."
+        )
+
+    rollup = aggregates.DirectoryRollup(root)
+    for item in items:
+        rollup.add(item)
+    rollup.add(scan_result_cls(Path("/anderswo/z.txt"), 999, 0.0, "other"))
+    if rollup.largest() != [(root / "a", 510), (root / "b", 400), (root, 50)]:
+        raise AssertionError(
+            "DirectoryRollup sollte pro direktem Unterordner summieren, fremde "
+            "Pfade ignorieren und Hardlinks nur einmal zählen."
+        )
+    if rollup.counts[root / "b"] != 3 or rollup.largest(1) != [(root / "a", 510)]:
+        raise AssertionError("DirectoryRollup sollte Dateien zählen und kürzen können.")
+
+    summary = aggregates.summarize(items, top=1, root=root)
+    if (summary.files, summary.bytes) != (6, 960) or summary.by_directory != (
+        rollup.largest()
+    ):
+        raise AssertionError(
+            "summarize sollte alle Kennzahlen in einem Durchlauf liefern."
+        )
+
+
+def run_core_dir_tree_checks(scan_result_cls: type) -> None:
+    """Run behaviour checks for cumulative folder totals and lazy drill-down."""
+    dir_tree = importlib.import_module("core.dir_tree")
+    root = Path("/daten")
+    items = [
+        scan_result_cls(root / "a" / "klein.txt", 10, 0.0, "other"),
+        scan_result_cls(root / "a" / "x" / "gross.mp4", 500, 0.0, "videos"),
+        scan_result_cls(root / "a" / "x" / "y" / "tief.zip", 40, 0.0, "archives"),
+        scan_result_cls(root / "b" / "link.jpg", 200, 0.0, "images", None, 1, 7, 2),
+        scan_result_cls(root / "b" / "link2.jpg", 200, 0.0, "images", None, 1, 7, 2),
+        scan_result_cls(root / "oben.zip", 50, 0.0, "archives"),
+    ]
+    builder = dir_tree.DirTreeBuilder(root)
+    if list(builder.track(items)) != items:
+        raise AssertionError(
+            "DirTreeBuilder.track sollte Treffer unverändert durchreichen."
+        )
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        with dir_tree.DirTree(Path(tmp_dir) / "tree.sqlite3") as tree:
+            tree.store(builder)
+            if tree.scanned_at(root) is None:
+                raise AssertionError("DirTree.store sollte den Zeitpunkt merken.")
+            total = tree.total(root)
+            if total is None or (total.bytes, total.files) != (800, 6):
+                raise AssertionError(
+                    "DirTree.total sollte alle Treffer aufsummieren, Hardlinks einmal."
+                )
+            level_one = [(t.path, t.bytes, t.files) for t in tree.children(root)]
+            if level_one != [(root / "a", 550, 3), (root / "b", 200, 2)]:
+                raise AssertionError(
+                    "DirTree.children sollte direkte Unterordner samt Inhalt der "
+                    "tieferen Ebenen liefern, größte zuerst."
+                )
+            drill = tree.children(root, root / "a" / "x")
+            if [(t.path, t.bytes) for t in drill] != [(root / "a" / "x" / "y", 40)]:
+                raise AssertionError(
+                    "DirTree.children sollte beim Aufklappen nur die nächste Ebene lesen."
+                )
+            if (
+                tree.children(root, root / "a" / "x" / "y") != []
+                or len(tree.children(root, limit=1)) != 1
+            ):
+                raise AssertionError(
+                    "DirTree.children sollte leere Ebenen und limit berücksichtigen."
+                )
+            smaller = dir_tree.DirTreeBuilder(root)
+            for item in items[:1]:
+                smaller.add(item)
+            tree.store(smaller)
+            if [t.path for t in tree.children(root)] != [root / "a"]:
+                raise AssertionError(
+                    "DirTree.store sollte den alten Baum desselben Startordners ersetzen."
+                )
+
 
 def run_core_validation_checks(validation_module: object) -> None:
     """Prüft zentrale Input-/Output-Validierung mit klaren Next Steps."""
@@ -379,6 +999,18 @@ def main() -> int:
         print("Core scanner checks failed:", e)
         return 1
 
+    try:
+        run_core_aggregate_checks(scan_result_cls)
+    except Exception as e:
+        print("Core aggregate checks failed:", e)
+        return 1
+
+    try:
+        run_core_dir_tree_checks(scan_result_cls)
+    except Exception as e:
+        print("Core dir tree checks failed:", e)
+        return 1
+
     try:
         run_core_validation_checks(validation_module)
     except Exception as e: